@@ -0,0 +1,214 @@
+"""
+Flow benchmarks against the in-memory EC2 stand-in.
+
+Drives the create, modify and delete flows non-interactively (prompts are
+answered from a script) for synthetic VPCs of each requested size, and
+reports wall time, API calls per operation, throttled calls and peak Python
+memory as JSON.
+
+    python benchmarks/bench_flows.py --sizes 10 100 1000 --latency-ms 20 --rate 100
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import questionary  # noqa: E402
+
+import cli.cidr_index as cidr_index_module  # noqa: E402
+from benchmarks.fake_ec2 import FakeEC2, synthetic_vpc  # noqa: E402
+from cli.cache import CachingEC2Client  # noqa: E402
+from cli.cidr_index import CidrIndex  # noqa: E402
+
+REGION = "bench-1"
+BENCH_PRINCIPAL = "arn:aws:iam::000000000000:user/bench"
+
+DEFAULT_SIZES = (10, 100, 1000)
+
+
+def first(choices):
+    return _value(choices[0])
+
+
+def every(choices):
+    return [_value(choice) for choice in choices]
+
+
+def _value(choice):
+    if isinstance(choice, dict):
+        return choice["value"]
+    return getattr(choice, "value", choice)
+
+
+class ScriptedPrompts:
+    """Answer questionary prompts in order; an answer may be a callable that picks from the prompt's choices."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    def _prompt(self, message, choices=None, **kwargs):
+        if not self.answers:
+            raise RuntimeError(f"Benchmark script ran out of answers at prompt: {message}")
+        answer = self.answers.pop(0)
+        value = answer(choices) if callable(answer) else answer
+        return _Answered(value)
+
+    @contextlib.contextmanager
+    def installed(self):
+        with patch.object(questionary, "select", self._prompt), \
+             patch.object(questionary, "checkbox", self._prompt), \
+             patch.object(questionary, "autocomplete", self._prompt), \
+             patch.object(questionary, "text", self._prompt), \
+             patch.object(questionary, "confirm", self._prompt):
+            yield
+
+
+class _Answered:
+    def __init__(self, value):
+        self.value = value
+
+    def ask(self):
+        return self.value
+
+
+def _seed_cidr_index(fake, path):
+    index = CidrIndex([REGION])
+    for vpc in fake.vpcs.values():
+        index.add(vpc["CidrBlock"], "vpc", vpc["VpcId"], vpc["VpcId"], REGION)
+    for subnet in fake.subnets.values():
+        index.add(subnet["CidrBlock"], "subnet", subnet["SubnetId"], subnet["VpcId"], REGION)
+    index.save(path)
+
+
+@contextlib.contextmanager
+def _scratch_cidr_index(fake, state_dir=None):
+    """Point the CIDR index at a seeded file in a scratch directory, covering only the fake region."""
+    with contextlib.ExitStack() as stack:
+        if state_dir is None:
+            state_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="vpc-builder-bench-"))
+        path = os.path.join(state_dir, "cidr-index.json")
+        _seed_cidr_index(fake, path)
+        stack.enter_context(patch.object(cidr_index_module, "CIDR_INDEX_PATH", path))
+        stack.enter_context(patch.object(cidr_index_module, "_index", None))
+        stack.enter_context(patch.object(cidr_index_module, "configured_regions", return_value=[REGION]))
+        yield
+
+
+# ---------- SCENARIOS ----------
+# Each returns (fake, vpc_id, answers, run) for a VPC of the given size.
+
+def create_subnet_flow(size, fake):
+    from cli.create import create_subnet_flow as flow
+    vpc_id = synthetic_vpc(fake, 0)
+    public = size // 2
+    answers = ["Automatic (plan CIDRs across AZs)", str(public), str(size - public), every, "", "", True]
+    return vpc_id, answers, flow
+
+
+def delete_entire_vpc(size, fake):
+    from cli.delete import delete_entire_vpc as flow
+    vpc_id = synthetic_vpc(fake, size)
+    return vpc_id, [first, True], lambda ec2, vpc_id: flow(ec2)
+
+
+def delete_subnets(size, fake):
+    from cli.delete import delete_subnets_in_vpc as flow
+    vpc_id = synthetic_vpc(fake, size)
+    return vpc_id, [every], flow
+
+
+def modify_subnet(size, fake):
+    from cli.modify import modify_subnet as flow
+    vpc_id = synthetic_vpc(fake, size)
+    return vpc_id, [first, "Enable Auto-assign Public IP", first], lambda ec2, vpc_id: flow(ec2)
+
+
+def associate_route_table(size, fake):
+    from cli.modify import associate_subnet_with_route_table as flow
+    vpc_id = synthetic_vpc(fake, size)
+    return vpc_id, [first, True, first], flow
+
+
+SCENARIOS = {
+    "create_subnet_flow": create_subnet_flow,
+    "delete_entire_vpc": delete_entire_vpc,
+    "delete_subnets": delete_subnets,
+    "modify_subnet": modify_subnet,
+    "associate_route_table": associate_route_table,
+}
+
+
+def run_scenario(name, size, latency=0.0, rate=0.0, state_dir=None):
+    """
+    Run one scenario on a fresh stand-in and return its measurements. The
+    CIDR index lives in state_dir (a temporary directory by default), never
+    in the user's state directory.
+    """
+    fake = FakeEC2(REGION, latency=latency, rate=rate)
+    vpc_id, answers, flow = SCENARIOS[name](size, fake)
+    ec2 = CachingEC2Client(fake)
+    prompts = ScriptedPrompts(answers)
+
+    with _scratch_cidr_index(fake, state_dir):
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with prompts.installed(), contextlib.redirect_stdout(io.StringIO()), \
+                 patch("cli.preflight.current_principal", return_value=BENCH_PRINCIPAL):
+                flow(ec2, vpc_id)
+            wall = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "subnets": size,
+        "wall_ms": round(wall * 1000, 2),
+        "api_calls": sum(fake.calls.values()),
+        "calls_by_operation": dict(sorted(fake.calls.items())),
+        "throttled_calls": fake.throttled,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "unanswered_prompts": len(prompts.answers),
+    }
+
+
+def run(sizes=DEFAULT_SIZES, scenarios=tuple(SCENARIOS), latency=0.0, rate=0.0):
+    return {
+        "benchmark": "flows",
+        "latency_ms": latency * 1000,
+        "rate_per_second": rate,
+        "results": [run_scenario(name, size, latency, rate) for name in scenarios for size in sizes],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="subnets per synthetic VPC")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latency added to every API call")
+    parser.add_argument("--rate", type=float, default=0.0, help="requests/second before the stand-in throttles (0 = off)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.scenarios, args.latency_ms / 1000, args.rate)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Start-up time benchmark.
+
+Measures how long `import main` and `python main.py --help` take in fresh
+interpreters and which heavy modules the import pulls in. Prints a JSON
+report; with --max-ms it exits non-zero when the median import time regresses
+past the limit, so it can gate CI.
+
+    python benchmarks/bench_startup.py --runs 10 --max-ms 250
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of the import path of main.py.
+HEAVY_MODULES = ("boto3", "botocore", "questionary", "cli.access", "cli.create", "cli.modify", "cli.delete")
+
+IMPORT_PROBE = (
+    "import json, sys, time; t = time.perf_counter(); import main; "
+    "elapsed = (time.perf_counter() - t) * 1000; "
+    f"print(json.dumps({{'ms': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))"
+)
+
+
+def measure_import():
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def measure_help():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--help"], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(runs):
+    imports = [measure_import() for _ in range(runs)]
+    helps = [measure_help() for _ in range(runs)]
+    return {
+        "benchmark": "startup",
+        "runs": runs,
+        "import_main_ms": {"median": statistics.median(r["ms"] for r in imports), "max": max(r["ms"] for r in imports)},
+        "main_help_ms": {"median": statistics.median(helps), "max": max(helps)},
+        "heavy_modules_loaded": sorted({m for r in imports for m in r["loaded"]}),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="fail if the median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    print(json.dumps(report, indent=2))
+    if report["heavy_modules_loaded"]:
+        return 1
+    if args.max_ms is not None and report["import_main_ms"]["median"] > args.max_ms:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
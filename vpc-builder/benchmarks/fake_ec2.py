@@ -0,0 +1,360 @@
+"""
+In-memory EC2 stand-in for benchmarks.
+
+Implements the subset of the EC2 API the flows use, with a configurable
+per-call latency and an optional server-side request rate. Calls over the
+rate are counted as throttled and delayed the way botocore's retry would
+delay them, so concurrency changes show up in wall time the same way they
+would against AWS.
+"""
+import functools
+import itertools
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+# Filter name -> values a resource exposes for it.
+FILTERS = {
+    "vpc-id": lambda r: [r.get("VpcId")],
+    "attachment.vpc-id": lambda r: [a["VpcId"] for a in r.get("Attachments", [])],
+    "association.subnet-id": lambda r: [a.get("SubnetId") for a in r.get("Associations", [])],
+    "subnet-id": lambda r: [r.get("SubnetId")],
+    "route-table-id": lambda r: [r.get("RouteTableId")],
+    "internet-gateway-id": lambda r: [r.get("InternetGatewayId")],
+    "group-id": lambda r: [r.get("GroupId")],
+    "state": lambda r: [r.get("State")],
+}
+
+
+def _filter_values(name):
+    if name.startswith("tag:"):
+        key = name[len("tag:"):]
+        return lambda r: [t["Value"] for t in r.get("Tags", []) if t["Key"] == key]
+    if name == "tag-key":
+        return lambda r: [t["Key"] for t in r.get("Tags", [])]
+    return FILTERS.get(name)
+
+
+def _matches(resource, filters):
+    for f in filters or []:
+        values = _filter_values(f["Name"])
+        if values is not None and not set(values(resource)) & set(f.get("Values", [])):
+            return False
+    return True
+
+
+def _error(code, message):
+    return ClientError({"Error": {"Code": code, "Message": message}}, code)
+
+
+def _tags(tag_specifications):
+    return [tag for spec in tag_specifications or [] for tag in spec.get("Tags", [])]
+
+
+class FakeEC2:
+    """
+    Thread-safe in-memory EC2 with injected latency.
+
+    latency: seconds added to every call.
+    rate: requests per second the "service" accepts before throttling (0 = unlimited).
+    retry_delay: seconds a throttled call waits before it is retried.
+    """
+
+    def __init__(self, region="bench-1", latency=0.0, rate=0.0, retry_delay=0.05):
+        self.meta = SimpleNamespace(region_name=region)
+        self.latency = latency
+        self.rate = rate
+        self.retry_delay = retry_delay
+        self.calls = Counter()
+        self.throttled = 0
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._window = []
+        self.vpcs = {}
+        self.subnets = {}
+        self.route_tables = {}
+        self.internet_gateways = {}
+        self.security_groups = {}
+        self.network_acls = {}
+
+    # ---------- harness ----------
+    def _call(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+        while self.rate and not self._admit():
+            with self._lock:
+                self.throttled += 1
+            time.sleep(self.retry_delay)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _admit(self):
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate:
+                return False
+            self._window.append(now)
+            return True
+
+    def _new_id(self, prefix):
+        return f"{prefix}-{next(self._ids):08x}"
+
+    def can_paginate(self, operation):
+        return operation.startswith("describe_") and operation != "describe_availability_zones"
+
+    def get_paginator(self, operation):
+        return _Paginator(self, operation)
+
+    # ---------- describes ----------
+    def _describe(self, operation, store, result_key, Filters=None, ids=None, **kwargs):
+        self._call(operation)
+        with self._lock:
+            items = [r for key, r in store.items() if (not ids or key in ids) and _matches(r, Filters)]
+        return {result_key: items}
+
+    def describe_vpcs(self, Filters=None, VpcIds=None, **kwargs):
+        return self._describe("describe_vpcs", self.vpcs, "Vpcs", Filters, VpcIds)
+
+    def describe_subnets(self, Filters=None, SubnetIds=None, **kwargs):
+        return self._describe("describe_subnets", self.subnets, "Subnets", Filters, SubnetIds)
+
+    def describe_route_tables(self, Filters=None, **kwargs):
+        return self._describe("describe_route_tables", self.route_tables, "RouteTables", Filters)
+
+    def describe_internet_gateways(self, Filters=None, **kwargs):
+        return self._describe("describe_internet_gateways", self.internet_gateways, "InternetGateways", Filters)
+
+    def describe_security_groups(self, Filters=None, **kwargs):
+        return self._describe("describe_security_groups", self.security_groups, "SecurityGroups", Filters)
+
+    def describe_network_acls(self, Filters=None, **kwargs):
+        return self._describe("describe_network_acls", self.network_acls, "NetworkAcls", Filters)
+
+    def describe_nat_gateways(self, **kwargs):
+        return self._describe("describe_nat_gateways", {}, "NatGateways")
+
+    def describe_vpc_endpoints(self, **kwargs):
+        return self._describe("describe_vpc_endpoints", {}, "VpcEndpoints")
+
+    def describe_network_interfaces(self, **kwargs):
+        return self._describe("describe_network_interfaces", {}, "NetworkInterfaces")
+
+    def describe_addresses(self, **kwargs):
+        return self._describe("describe_addresses", {}, "Addresses")
+
+    def describe_availability_zones(self, **kwargs):
+        self._call("describe_availability_zones")
+        region = self.meta.region_name
+        return {"AvailabilityZones": [{"ZoneName": f"{region}{z}", "State": "available"} for z in "abc"]}
+
+    # ---------- mutations ----------
+    def create_vpc(self, CidrBlock, TagSpecifications=None, **kwargs):
+        self._call("create_vpc")
+        with self._lock:
+            vpc_id = self._new_id("vpc")
+            self.vpcs[vpc_id] = {"VpcId": vpc_id, "CidrBlock": CidrBlock, "IsDefault": False,
+                                 "State": "available", "Tags": _tags(TagSpecifications)}
+            rtb_id, acl_id, sg_id = self._new_id("rtb"), self._new_id("acl"), self._new_id("sg")
+            self.route_tables[rtb_id] = {"RouteTableId": rtb_id, "VpcId": vpc_id, "Routes": [],
+                                         "Associations": [{"Main": True, "RouteTableId": rtb_id,
+                                                           "RouteTableAssociationId": self._new_id("rtbassoc")}]}
+            self.network_acls[acl_id] = {"NetworkAclId": acl_id, "VpcId": vpc_id, "IsDefault": True}
+            self.security_groups[sg_id] = {"GroupId": sg_id, "GroupName": "default", "VpcId": vpc_id,
+                                           "IpPermissions": [], "IpPermissionsEgress": []}
+        return {"Vpc": self.vpcs[vpc_id]}
+
+    def create_subnet(self, VpcId, CidrBlock, AvailabilityZone=None, TagSpecifications=None, **kwargs):
+        self._call("create_subnet")
+        with self._lock:
+            if VpcId not in self.vpcs:
+                raise _error("InvalidVpcID.NotFound", f"The vpc ID '{VpcId}' does not exist")
+            if any(s["CidrBlock"] == CidrBlock and s["VpcId"] == VpcId for s in self.subnets.values()):
+                raise _error("InvalidSubnet.Conflict", f"The CIDR '{CidrBlock}' conflicts with another subnet")
+            subnet_id = self._new_id("subnet")
+            self.subnets[subnet_id] = {"SubnetId": subnet_id, "VpcId": VpcId, "CidrBlock": CidrBlock,
+                                       "AvailabilityZone": AvailabilityZone or f"{self.meta.region_name}a",
+                                       "MapPublicIpOnLaunch": False, "Tags": _tags(TagSpecifications)}
+        return {"Subnet": self.subnets[subnet_id]}
+
+    def create_route_table(self, VpcId, TagSpecifications=None, **kwargs):
+        self._call("create_route_table")
+        with self._lock:
+            rtb_id = self._new_id("rtb")
+            self.route_tables[rtb_id] = {"RouteTableId": rtb_id, "VpcId": VpcId, "Routes": [],
+                                         "Associations": [], "Tags": _tags(TagSpecifications)}
+        return {"RouteTable": self.route_tables[rtb_id]}
+
+    def create_internet_gateway(self, TagSpecifications=None, **kwargs):
+        self._call("create_internet_gateway")
+        with self._lock:
+            igw_id = self._new_id("igw")
+            self.internet_gateways[igw_id] = {"InternetGatewayId": igw_id, "Attachments": [],
+                                              "Tags": _tags(TagSpecifications)}
+        return {"InternetGateway": self.internet_gateways[igw_id]}
+
+    def create_security_group(self, GroupName, Description, VpcId, TagSpecifications=None, **kwargs):
+        self._call("create_security_group")
+        with self._lock:
+            sg_id = self._new_id("sg")
+            self.security_groups[sg_id] = {"GroupId": sg_id, "GroupName": GroupName, "VpcId": VpcId,
+                                           "Description": Description, "IpPermissions": [],
+                                           "IpPermissionsEgress": [], "Tags": _tags(TagSpecifications)}
+        return {"GroupId": sg_id}
+
+    def create_tags(self, Resources, Tags, **kwargs):
+        self._call("create_tags")
+        with self._lock:
+            for store in (self.vpcs, self.subnets, self.route_tables, self.internet_gateways, self.security_groups):
+                for resource_id in Resources:
+                    if resource_id in store:
+                        keys = {t["Key"] for t in Tags}
+                        store[resource_id]["Tags"] = [t for t in store[resource_id].get("Tags", []) if t["Key"] not in keys] + Tags
+        return {}
+
+    def attach_internet_gateway(self, InternetGatewayId, VpcId, **kwargs):
+        self._call("attach_internet_gateway")
+        with self._lock:
+            self.internet_gateways[InternetGatewayId]["Attachments"] = [{"VpcId": VpcId, "State": "available"}]
+        return {}
+
+    def detach_internet_gateway(self, InternetGatewayId, VpcId, **kwargs):
+        self._call("detach_internet_gateway")
+        with self._lock:
+            self.internet_gateways[InternetGatewayId]["Attachments"] = []
+        return {}
+
+    def associate_route_table(self, RouteTableId, SubnetId, **kwargs):
+        self._call("associate_route_table")
+        with self._lock:
+            assoc_id = self._new_id("rtbassoc")
+            self.route_tables[RouteTableId]["Associations"].append(
+                {"Main": False, "RouteTableId": RouteTableId, "SubnetId": SubnetId, "RouteTableAssociationId": assoc_id})
+        return {"AssociationId": assoc_id}
+
+    def disassociate_route_table(self, AssociationId, **kwargs):
+        self._call("disassociate_route_table")
+        with self._lock:
+            for rt in self.route_tables.values():
+                rt["Associations"] = [a for a in rt["Associations"] if a["RouteTableAssociationId"] != AssociationId]
+        return {}
+
+    def modify_subnet_attribute(self, SubnetId, MapPublicIpOnLaunch=None, **kwargs):
+        self._call("modify_subnet_attribute")
+        with self._lock:
+            if MapPublicIpOnLaunch is not None:
+                self.subnets[SubnetId]["MapPublicIpOnLaunch"] = MapPublicIpOnLaunch["Value"]
+        return {}
+
+    def _delete(self, operation, store, resource_id, blocked=None):
+        self._call(operation)
+        with self._lock:
+            if resource_id not in store:
+                raise _error("InvalidID.NotFound", f"The ID '{resource_id}' does not exist")
+            if blocked and blocked():
+                raise _error("DependencyViolation", f"The resource '{resource_id}' has dependencies and cannot be deleted.")
+            del store[resource_id]
+        return {}
+
+    def delete_subnet(self, SubnetId, **kwargs):
+        result = self._delete("delete_subnet", self.subnets, SubnetId)
+        with self._lock:
+            for rt in self.route_tables.values():
+                rt["Associations"] = [a for a in rt["Associations"] if a.get("SubnetId") != SubnetId]
+        return result
+
+    def delete_route_table(self, RouteTableId, **kwargs):
+        rt = self.route_tables.get(RouteTableId, {})
+        return self._delete("delete_route_table", self.route_tables, RouteTableId,
+                            lambda: any(a.get("SubnetId") or a.get("Main") for a in rt.get("Associations", [])))
+
+    def delete_internet_gateway(self, InternetGatewayId, **kwargs):
+        igw = self.internet_gateways.get(InternetGatewayId, {})
+        return self._delete("delete_internet_gateway", self.internet_gateways, InternetGatewayId,
+                            lambda: bool(igw.get("Attachments")))
+
+    def delete_security_group(self, GroupId, **kwargs):
+        return self._delete("delete_security_group", self.security_groups, GroupId)
+
+    def delete_network_acl(self, NetworkAclId, **kwargs):
+        return self._delete("delete_network_acl", self.network_acls, NetworkAclId)
+
+    def delete_vpc(self, VpcId, **kwargs):
+        def blocked():
+            return (
+                any(s["VpcId"] == VpcId for s in self.subnets.values())
+                or any(a["VpcId"] == VpcId for igw in self.internet_gateways.values() for a in igw["Attachments"])
+                or any(rt["VpcId"] == VpcId and not any(a.get("Main") for a in rt["Associations"])
+                       for rt in self.route_tables.values())
+                or any(sg["VpcId"] == VpcId and sg["GroupName"] != "default" for sg in self.security_groups.values())
+            )
+
+        result = self._delete("delete_vpc", self.vpcs, VpcId, blocked)
+        with self._lock:
+            for store in (self.route_tables, self.network_acls, self.security_groups):
+                for resource_id in [k for k, r in store.items() if r.get("VpcId") == VpcId]:
+                    del store[resource_id]
+        return result
+
+
+class _Paginator:
+    """Splits a describe result into PageSize (default PAGE_SIZE) pages, charging one call per page like the real API."""
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, ec2, operation):
+        self._ec2 = ec2
+        self._operation = operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        page_size = (PaginationConfig or {}).get("PageSize") or self.PAGE_SIZE
+        resp = getattr(self._ec2, self._operation)(**kwargs)
+        (result_key, items), = resp.items()
+        for start in range(0, max(len(items), 1), page_size):
+            if start:
+                self._ec2._call(self._operation)
+            yield {result_key: items[start:start + page_size]}
+
+
+def _dry_run_aware(method):
+    @functools.wraps(method)
+    def call(self, *args, DryRun=False, **kwargs):
+        if DryRun:
+            self._call(method.__name__)
+            raise _error("DryRunOperation", "Request would have succeeded, but DryRun flag is set.")
+        return method(self, *args, **kwargs)
+    return call
+
+
+# Mutations honour DryRun the way EC2 does, so permission preflights can run against the stand-in.
+for _name in [n for n in vars(FakeEC2) if n.split("_")[0] in ("create", "delete", "attach", "detach", "associate", "disassociate", "modify")]:
+    setattr(FakeEC2, _name, _dry_run_aware(getattr(FakeEC2, _name)))
+
+
+def synthetic_vpc(ec2, subnets, cidr="10.0.0.0/16", name="bench"):
+    """Populate ec2 with one VPC holding `subnets` /26 subnets, a route table per 10 subnets, an IGW and some SGs."""
+    latency, rate = ec2.latency, ec2.rate
+    ec2.latency, ec2.rate = 0.0, 0.0
+    try:
+        vpc_id = ec2.create_vpc(CidrBlock=cidr, TagSpecifications=[{"Tags": [{"Key": "Name", "Value": name}]}])["Vpc"]["VpcId"]
+        base = int.from_bytes(bytes(int(octet) for octet in cidr.split("/")[0].split(".")), "big")
+        zones = [z["ZoneName"] for z in ec2.describe_availability_zones()["AvailabilityZones"]]
+        rtb_id = None
+        for i in range(subnets):
+            start = base + i * 64
+            subnet_cidr = ".".join(str(b) for b in start.to_bytes(4, "big")) + "/26"
+            subnet_id = ec2.create_subnet(VpcId=vpc_id, CidrBlock=subnet_cidr, AvailabilityZone=zones[i % len(zones)],
+                                          TagSpecifications=[{"Tags": [{"Key": "Name", "Value": f"{name}-{i + 1}"}]}])["Subnet"]["SubnetId"]
+            if i % 10 == 0:
+                rtb_id = ec2.create_route_table(VpcId=vpc_id)["RouteTable"]["RouteTableId"]
+                ec2.create_security_group(GroupName=f"{name}-sg-{i // 10}", Description="bench", VpcId=vpc_id)
+            ec2.associate_route_table(RouteTableId=rtb_id, SubnetId=subnet_id)
+        igw_id = ec2.create_internet_gateway()["InternetGateway"]["InternetGatewayId"]
+        ec2.attach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
+        ec2.calls.clear()
+        return vpc_id
+    finally:
+        ec2.latency, ec2.rate = latency, rate
@@ -1,7 +1,12 @@
 from botocore.exceptions import ClientError
-from cli.aws_client import AWSClient
+from cli.aws_client import AWSClient, region_codes
 from cli.prompts import confirm_action
-from cli.display import show_info, show_success, show_failure
+from cli.display import console, show_info, show_success, show_failure, show_tree, show_warning
+from cli.helpers import error_message, format_age
+from cli.output import emit_resource, machine_output
+from cli.preflight import MissingPermissions, require_permissions
+from cli.scan import find_vpc_in_regions
+from cli.topology import build_topology_tree, fetch_vpc_topology
 
 def run_access_flow():
     show_info("You chose to access an existing VPC.")
@@ -9,7 +14,7 @@ def run_access_flow():
     ec2 = AWSClient.get_ec2_client()
     region = AWSClient._session.region_name  # current selected region
 
-    vpc_input = input("Enter the VPC ID or Name: ").strip()
+    vpc_input = console.input("Enter the VPC ID or Name: ").strip()
     if not vpc_input:
         show_failure("VPC ID or Name cannot be empty.")
         return
@@ -17,48 +22,81 @@ def run_access_flow():
     show_info(f"Searching for VPC: {vpc_input} in region {region}...")
 
     vpc = get_vpc_by_id_or_name(ec2, vpc_input)
+    if not vpc and confirm_action(f"Not found in {region}. Search all regions?"):
+        vpc = get_vpc_by_id_or_name(ec2, vpc_input, regions=region_codes())
 
-    if vpc:
-        show_success(f"✅ Found VPC: {vpc['VpcId']} (CIDR: {vpc['CidrBlock']})")
-    else:
+    if not vpc:
         show_failure("❌ VPC not found.")
+        return
+
+    found_in = f" in {vpc['Region']}" if "Region" in vpc else ""
+    show_success(f"✅ Found VPC: {vpc['VpcId']} (CIDR: {vpc['CidrBlock']}){found_in}")
+    show_vpc_topology(AWSClient.get_regional_client(vpc["Region"]) if "Region" in vpc else ec2, vpc)
+
+def show_vpc_topology(ec2, vpc):
+    show_info(f"Loading resources in {vpc['VpcId']}...")
+    resources, errors = fetch_vpc_topology(ec2, vpc["VpcId"])
+    show_tree(build_topology_tree(vpc, resources))
+    for section, error in errors.items():
+        show_warning(f"Could not load {section.replace('_', ' ')}: {error_message(error)}")
 
-def get_vpc_by_id_or_name(ec2_client, vpc_input: str):
+def get_vpc_by_id_or_name(ec2_client, vpc_input: str, regions=None):
+    """Find a VPC by ID or Name tag; with regions, search all of them concurrently instead of ec2_client's."""
     try:
-        # Try lookup by VPC ID first
-        response = ec2_client.describe_vpcs(VpcIds=[vpc_input])
-        return response["Vpcs"][0] if response["Vpcs"] else None
+        if regions:
+            return find_vpc_in_regions(vpc_input, regions)
+        return AWSClient.get_vpc_inventory(ec2_client).find(vpc_input)
     except ClientError as e:
-        if "InvalidVpcID.NotFound" in str(e):
-            return get_vpc_by_name(ec2_client, vpc_input)
-        else:
-            show_failure(f"AWS Error: {str(e)}")
-            return None
+        show_failure(f"AWS Error: {str(e)}")
+        return None
 
 def get_vpc_by_name(ec2_client, name: str):
     try:
-        response = ec2_client.describe_vpcs(
-            Filters=[{"Name": "tag:Name", "Values": [name]}]
-        )
-        return response["Vpcs"][0] if response["Vpcs"] else None
+        inventory = AWSClient.get_vpc_inventory(ec2_client)
+        ids = inventory.ids_for_name(name)
+        return inventory.get(ids[0]) if ids else None
     except ClientError as e:
         show_failure(f"AWS Error: {str(e)}")
         return None
 
 def list_accessible_vpcs(ec2):
     """Return list of (vpc_id, vpc_name) tuples user can access in selected region."""
-    vpcs = []
     try:
-        response = ec2.describe_vpcs()
-        for vpc in response['Vpcs']:
-            vpc_id = vpc['VpcId']
-            name_tag = next((t['Value'] for t in vpc.get('Tags', []) if t['Key'] == 'Name'), '')
-            vpcs.append((vpc_id, name_tag))
+        inventory = AWSClient.get_vpc_inventory(ec2)
+        if machine_output():
+            # List live so each VPC's record (full describe output) goes out as its page arrives.
+            inventory.refresh(on_vpc=lambda vpc: emit_resource("vpc", vpc, "VpcId", ec2.meta.region_name))
+        vpcs = inventory.vpcs()
     except ClientError as e:
         show_failure(f"Error fetching VPCs: {e.response['Error']['Message']}")
+        return []
     return vpcs
 
-def verify_vpc_access(ec2, vpc_id: str) -> bool:
-    # Dummy for now, assume access granted
+def vpc_search_values(ec2):
+    """values() for picker.pick over VPC IDs: their Name and CIDR, from the inventory."""
+    inventory = AWSClient.get_vpc_inventory(ec2)
+
+    def values(vpc_id):
+        record = inventory.get(vpc_id) or {}
+        return [record.get("Name", ""), record.get("CidrBlock", "")]
+    return values
+
+def vpc_picker_message(ec2, message):
+    """Picker prompt, noting when the choices come from the on-disk snapshot rather than a live listing."""
+    age = AWSClient.get_vpc_inventory(ec2).snapshot_age
+    if age is None:
+        return message
+    return f"{message} (snapshot from {format_age(age)} ago, refreshing in background)"
+
+def verify_vpc_access(ec2, vpc_id: str, operations=()) -> bool:
+    """True if the VPC is visible and a DryRun preflight allows every operation the caller is about to run."""
+    vpc = AWSClient.get_vpc_inventory(ec2).get(vpc_id)
+    if not vpc:
+        return False
+    try:
+        require_permissions(ec2, operations, {"vpc": vpc_id, "vpc_cidr": vpc.get("CidrBlock")})
+    except MissingPermissions as e:
+        show_failure(str(e))
+        return False
     return True
 
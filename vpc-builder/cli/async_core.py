@@ -0,0 +1,96 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from cli.executor import MAX_WORKERS
+
+
+class AsyncCore:
+    """
+    asyncio execution core shared by the create/modify/delete flows.
+
+    The event loop runs on a background thread, and blocking boto3 calls run
+    in its thread-pool executor, so the (synchronous) prompts stay responsive
+    while AWS work happens behind them. Flows hand work over with submit()
+    (fire and forget, e.g. prefetching) or run() (wait for the result).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._loop = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vpc-builder-aws")
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(self._executor)
+                threading.Thread(target=self._loop.run_forever, name="vpc-builder-loop", daemon=True).start()
+        return self._loop
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking call (e.g. a boto3 method) in the executor and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def gather_limited(self, calls, limit=None, return_exceptions=True):
+        """Run zero-argument blocking callables concurrently, at most `limit` at a time, preserving order."""
+        semaphore = asyncio.Semaphore(limit or self.max_workers)
+
+        async def bounded(func):
+            async with semaphore:
+                return await self.call(func)
+
+        return await asyncio.gather(*(bounded(func) for func in calls), return_exceptions=return_exceptions)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the core's loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the core's loop and block until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def run_all(self, calls, limit=None):
+        """Blocking helper for bulk operations: results (or exceptions) in the order of calls."""
+        return self.run(self.gather_limited(calls, limit))
+
+    def run_stream(self, calls, limit=None):
+        """
+        Like run_all, but calls may be a generator (e.g. fed by a paginator):
+        each call starts as soon as it is produced, with at most `limit` in
+        flight, so the first page is being worked on while the next is fetched.
+        """
+        slots = threading.BoundedSemaphore(limit or self.max_workers)
+        futures = []
+        try:
+            for func in calls:
+                slots.acquire()
+                future = self.submit(self.call(func))
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+        finally:
+            # If the source fails (e.g. a page request), the calls already started still finish first.
+            wait(futures)
+        return [future.exception() or future.result() for future in futures]
+
+
+_core = None
+_core_lock = threading.Lock()
+
+
+def get_core():
+    global _core
+    with _core_lock:
+        if _core is None:
+            _core = AsyncCore()
+        return _core
+
+
+def prefetch(*calls):
+    """Start blocking calls in the background and return immediately; errors are left for the real call to report."""
+    core = get_core()
+    return core.submit(core.gather_limited(calls))
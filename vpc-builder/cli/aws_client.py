@@ -1,5 +1,18 @@
-import boto3
-import questionary
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cli.cache import CachingEC2Client
+from cli.executor import MAX_WORKERS
+from cli.throttle import RETRY_CONFIG, get_rate_limiter
+from cli.inventory import VpcInventory
+from cli.metrics import instrument
+
+# boto3, botocore and questionary are imported on first use: together they are
+# most of the tool's start-up time, and scripted runs may never need a prompt.
+
+# Shared with the AWS CLI, so assumed-role credentials survive between launches.
+CREDENTIAL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".aws", "cli", "cache")
 
 # Common AWS regions list (you can expand it)
 AWS_REGIONS = [
@@ -17,7 +30,13 @@ AWS_REGIONS = [
     "Custom Region"
 ]
 
+def region_codes():
+    """Region codes from AWS_REGIONS, e.g. ["us-east-1", "us-east-2", ...]."""
+    return [r.split()[0] for r in AWS_REGIONS if r != "Custom Region"]
+
 def select_region():
+    import questionary
+
     choice = questionary.select(
         "Select AWS region:",
         choices=AWS_REGIONS,
@@ -28,26 +47,156 @@ def select_region():
         region = questionary.text("Enter custom AWS region code (e.g., eu-west-3):").ask()
         region = region.strip()
         if not region:
-            print("Empty input, defaulting to us-east-1")
+            from cli.display import show_warning
+
+            show_warning("Empty input, defaulting to us-east-1")
             return "us-east-1"
         return region
     else:
         # Extract the region code before the first space (e.g. "us-east-1")
         return choice.split()[0]
 
+def resolve_region(session):
+    """Region from AWS_REGION / AWS_DEFAULT_REGION or the profile's config, or None if neither sets one."""
+    return os.environ.get("AWS_REGION") or session.region_name
+
+def enable_credential_cache(session):
+    """Reuse cached assume-role credentials instead of calling STS on every launch."""
+    from botocore.credentials import JSONFileCache
+
+    try:
+        provider = session._session.get_component("credential_provider").get_provider("assume-role")
+    except Exception:
+        return
+    provider.cache = JSONFileCache(CREDENTIAL_CACHE_DIR)
+
+def new_session(profile=None, region=None):
+    import boto3
+
+    session = boto3.Session(profile_name=profile, region_name=region)
+    enable_credential_cache(session)
+    return session
+
+def client_config(max_connections=MAX_WORKERS):
+    from botocore.config import Config
+
+    # One HTTP connection per worker thread, so parallel flows never queue on the pool.
+    return Config(retries=RETRY_CONFIG, max_pool_connections=max_connections)
+
+def build_ec2_client(session, region=None, max_connections=MAX_WORKERS):
+    """EC2 client with adaptive retries, the shared rate limiter and the describe cache."""
+    client = session.client("ec2", region_name=region, config=client_config(max_connections))
+    get_rate_limiter().attach(client)
+    instrument(client)
+    return CachingEC2Client(client)
+
+class ClientPool:
+    """
+    Thread-safe cache of boto3 clients keyed by (profile, region, service).
+
+    boto3 clients can be shared between threads but sessions cannot, so each
+    thread that has to build a client does so from its own Session. Every
+    client gets a connection pool sized for MAX_WORKERS concurrent calls.
+    """
+
+    def __init__(self, max_connections=MAX_WORKERS):
+        self.max_connections = max_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def session(self, profile=None):
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        if profile not in sessions:
+            sessions[profile] = new_session(profile)
+        return sessions[profile]
+
+    def get(self, service, region, profile=None):
+        key = (profile, region, service)
+        with self._lock:
+            client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        session = self.session(profile)
+        if service == "ec2":
+            client = build_ec2_client(session, region, self.max_connections)
+        else:
+            client = instrument(session.client(service, region_name=region, config=client_config(self.max_connections)))
+        with self._lock:
+            # Another thread may have built the same client meanwhile; keep the first one.
+            return self._clients.setdefault(key, client)
+
+    def warm_up(self, regions, service="ec2", profile=None):
+        """Build clients for several regions concurrently and open a connection to each."""
+        def warm(region):
+            client = self.get(service, region, profile)
+            if service == "ec2":
+                client.describe_availability_zones()
+            return client
+
+        with ThreadPoolExecutor(max_workers=min(self.max_connections, len(regions) or 1)) as pool:
+            return dict(zip(regions, pool.map(warm, regions)))
+
 class AWSClient:
+    _profile = None
+    _region = None
     _session = None
-    _ec2 = None
+    _pool = ClientPool()
+    _inventories = {}
+
+    @classmethod
+    def configure(cls, profile=None, region=None):
+        """Set the profile and/or region up front; a region given here is never prompted for."""
+        cls._profile = profile
+        cls._region = region
+        cls._session = None
+
+    @classmethod
+    def use_region(cls, region):
+        """Pin the session to a region without prompting, e.g. when it comes from a spec file."""
+        cls.configure(profile=cls._profile, region=region)
+
+    @classmethod
+    def new_session(cls, region=None):
+        return new_session(cls._profile, region)
 
     @classmethod
     def get_session(cls):
         if cls._session is None:
-            region = select_region()
-            cls._session = boto3.Session(region_name=region)
+            session = cls.new_session(cls._region)
+            region = cls._region or resolve_region(session)
+            if not region:
+                region = select_region()
+            if region != session.region_name:
+                session = cls.new_session(region)
+            cls._session = session
         return cls._session
 
+    @classmethod
+    def get_client(cls, service, region=None):
+        """Pooled client for any service; region defaults to the selected one."""
+        return cls._pool.get(service, region or cls.get_session().region_name, cls._profile)
+
     @classmethod
     def get_ec2_client(cls):
-        if cls._ec2 is None:
-            cls._ec2 = cls.get_session().client("ec2")
-        return cls._ec2
+        return cls.get_client("ec2")
+
+    @classmethod
+    def get_regional_client(cls, region):
+        """EC2 client for an arbitrary region, reusing the selected profile's credentials without prompting."""
+        return cls._pool.get("ec2", region, cls._profile)
+
+    @classmethod
+    def warm_up(cls, regions):
+        return cls._pool.warm_up(regions, profile=cls._profile)
+
+    @classmethod
+    def get_vpc_inventory(cls, ec2=None):
+        ec2 = ec2 or cls.get_ec2_client()
+        if ec2 not in cls._inventories:
+            from cli.snapshot import get_snapshot
+            cls._inventories[ec2] = VpcInventory(ec2, snapshot=get_snapshot())
+        return cls._inventories[ec2]
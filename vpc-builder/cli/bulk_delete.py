@@ -0,0 +1,221 @@
+import fnmatch
+import os
+import re
+import time
+from calendar import timegm
+from concurrent.futures import ThreadPoolExecutor
+
+from cli.aws_client import AWSClient
+from cli.display import BulkProgress, show_failure, show_info, show_success, show_table, show_warning
+from cli.executor import MAX_WORKERS, OK
+from cli.helpers import CREATED_AT_TAG, TIMESTAMP_FORMAT, error_message, format_age, get_name_tag, paginate
+from cli.output import emit_result
+from cli.preflight import MissingPermissions
+from cli.teardown import teardown_vpc
+
+# VPCs torn down at the same time in one region; each teardown runs its own DAG of calls.
+BULK_PER_REGION = int(os.environ.get("VPC_BUILDER_BULK_PER_REGION", "3"))
+
+DELETED = "deleted"
+PARTIAL = "partial"
+FAILED = "failed"
+
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_age(text):
+    """'90m' -> 5400, '36h' -> 129600, '7d' -> 604800. A bare number is hours."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", text or "")
+    if not match:
+        raise ValueError(f"Invalid age: {text!r} (use e.g. 90m, 36h or 7d)")
+    return float(match.group(1)) * AGE_UNITS[match.group(2) or "h"]
+
+
+def parse_tag_filters(items):
+    """['env=test', 'ephemeral'] -> {'env': 'test', 'ephemeral': None}; None means the tag only has to exist."""
+    tags = {}
+    for item in items or []:
+        for part in item.split(","):
+            part = part.strip()
+            if part:
+                key, sep, value = part.partition("=")
+                tags[key.strip()] = value.strip() if sep else None
+    return tags
+
+
+def vpc_age(vpc, now=None):
+    """Seconds since the VPC's created-at tag, or None for VPCs this tool didn't create."""
+    tags = {t["Key"]: t["Value"] for t in vpc.get("Tags", [])}
+    try:
+        created = timegm(time.strptime(tags[CREATED_AT_TAG], TIMESTAMP_FORMAT))
+    except (KeyError, ValueError):
+        return None
+    return (now or time.time()) - created
+
+
+def _server_filters(tags):
+    filters = [{"Name": "is-default", "Values": ["false"]}]
+    for key, value in tags.items():
+        if value is None:
+            filters.append({"Name": "tag-key", "Values": [key]})
+        else:
+            filters.append({"Name": f"tag:{key}", "Values": [value]})
+    return filters
+
+
+def matches(vpc, tags=None, older_than=None, name_pattern=None, now=None):
+    """Whether a VPC passes every given filter. Default VPCs never match."""
+    if vpc.get("IsDefault"):
+        return False
+    vpc_tags = {t["Key"]: t["Value"] for t in vpc.get("Tags", [])}
+    for key, value in (tags or {}).items():
+        if key not in vpc_tags or (value is not None and not fnmatch.fnmatchcase(vpc_tags[key], value)):
+            return False
+    if name_pattern and not fnmatch.fnmatchcase(get_name_tag(vpc), name_pattern):
+        return False
+    if older_than is not None:
+        age = vpc_age(vpc, now)
+        if age is None or age < older_than:
+            return False
+    return True
+
+
+def select_vpcs(regions, tags=None, older_than=None, name_pattern=None):
+    """
+    VPCs matching the filters in every region, listed concurrently. Tag filters
+    are applied by describe_vpcs itself; name and age are checked locally.
+    Returns (targets, errors): targets are dicts with Region, VpcId, Name,
+    CidrBlock and Age; errors maps region -> message.
+    """
+    if not (tags or older_than is not None or name_pattern):
+        raise ValueError("Give at least one tag, age or name filter.")
+    now = time.time()
+
+    def fetch(region):
+        client = AWSClient.get_regional_client(region)
+        return [
+            {
+                "Region": region,
+                "VpcId": vpc["VpcId"],
+                "Name": get_name_tag(vpc),
+                "CidrBlock": vpc.get("CidrBlock", ""),
+                "Age": vpc_age(vpc, now),
+            }
+            for vpc in paginate(client, "describe_vpcs", "Vpcs", Filters=_server_filters(tags or {}))
+            if matches(vpc, tags, older_than, name_pattern, now)
+        ]
+
+    targets, errors = [], {}
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(regions) or 1)) as pool:
+        futures = [(region, pool.submit(fetch, region)) for region in regions]
+        for region, future in futures:
+            try:
+                targets.extend(future.result())
+            except Exception as e:
+                errors[region] = error_message(e)
+    return targets, errors
+
+
+def _teardown_one(target):
+    client = AWSClient.get_regional_client(target["Region"])
+    outcome = {"Region": target["Region"], "VpcId": target["VpcId"], "Name": target["Name"]}
+    try:
+        results = teardown_vpc(client, target["VpcId"], preflight=True)
+    except MissingPermissions as e:
+        return {**outcome, "Status": FAILED, "Steps": 0, "Detail": f"Nothing was deleted. {e}"}
+    except Exception as e:
+        # One VPC's discovery failing (throttling, a lost connection...) must not stop the rest.
+        return {**outcome, "Status": FAILED, "Steps": 0, "Detail": error_message(e)}
+    finally:
+        AWSClient.get_vpc_inventory(client).invalidate()
+
+    failed = {key: result for key, result in results.items() if result.status != OK}
+    if not failed:
+        return {**outcome, "Status": DELETED, "Steps": len(results), "Detail": ""}
+    first_key, first = next(iter(failed.items()))
+    detail = f"{len(failed)} of {len(results)} steps did not complete; {first_key} {first.status}"
+    if first.error is not None:
+        detail += f": {error_message(first.error)}"
+    return {**outcome, "Status": PARTIAL if len(failed) < len(results) else FAILED, "Steps": len(results), "Detail": detail}
+
+
+def bulk_teardown(targets, per_region=BULK_PER_REGION, on_done=None):
+    """
+    Tear every target VPC down, all regions in parallel but at most
+    per_region VPCs at a time within one region, so one region's API rate
+    limit isn't shared by more teardowns than it can take. Returns one
+    outcome dict per target, in the order given.
+    """
+    by_region = {}
+    for target in targets:
+        by_region.setdefault(target["Region"], []).append(target)
+
+    pools = {region: ThreadPoolExecutor(max_workers=max(1, per_region)) for region in by_region}
+    try:
+        futures = [pools[target["Region"]].submit(_teardown_one, target) for target in targets]
+        if on_done:
+            for future in futures:
+                future.add_done_callback(lambda f: on_done(f.result()))
+        return [future.result() for future in futures]
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+
+def _record_outcome(progress, outcome):
+    key = f"{outcome['Region']}/{outcome['VpcId']}"
+    emit_result("delete", "vpc", outcome["VpcId"], OK if outcome["Status"] == DELETED else outcome["Status"],
+                outcome["Detail"] or None, region=outcome["Region"], name=outcome["Name"], steps=outcome["Steps"])
+    if outcome["Status"] == DELETED:
+        progress.done(key, f"{outcome['Steps']} steps")
+    else:
+        progress.failed(key, outcome["Detail"])
+
+
+def show_targets(targets):
+    show_table(
+        f"VPCs selected for deletion ({len(targets)})",
+        ["Region", "VPC", "Name", "CIDR", "Age"],
+        [
+            (t["Region"], t["VpcId"], t["Name"], t["CidrBlock"], "unknown" if t["Age"] is None else format_age(t["Age"]))
+            for t in targets
+        ],
+    )
+
+
+def show_report(outcomes):
+    show_table(
+        "Bulk delete report",
+        ["Region", "VPC", "Name", "Status", "Steps", "Detail"],
+        [(o["Region"], o["VpcId"], o["Name"], o["Status"], o["Steps"], o["Detail"]) for o in outcomes],
+    )
+    deleted = sum(o["Status"] == DELETED for o in outcomes)
+    if deleted == len(outcomes):
+        show_success(f"Deleted all {deleted} VPC(s).")
+    else:
+        show_failure(f"Deleted {deleted} of {len(outcomes)} VPC(s); see the report above.")
+
+
+def run_bulk_delete(regions, tags=None, older_than=None, name_pattern=None, assume_yes=False, confirm=None):
+    """Select, confirm and tear down. Returns the outcomes, or None if nothing was deleted."""
+    try:
+        targets, errors = select_vpcs(regions, tags, older_than, name_pattern)
+    except ValueError as e:
+        show_failure(str(e))
+        return None
+    for region, message in sorted(errors.items()):
+        show_warning(f"Could not list VPCs in {region}: {message}")
+    if not targets:
+        show_info("No VPCs match the filters.")
+        return None
+
+    show_targets(targets)
+    if not assume_yes and not (confirm and confirm(f"Delete these {len(targets)} VPC(s) and everything in them?")):
+        show_info("Bulk delete cancelled.")
+        return None
+
+    show_info(f"Tearing down {len(targets)} VPC(s), up to {BULK_PER_REGION} at a time per region...")
+    with BulkProgress("Bulk delete", total=len(targets), summary=False) as progress:
+        outcomes = bulk_teardown(targets, on_done=lambda outcome: _record_outcome(progress, outcome))
+    show_report(outcomes)
+    return outcomes
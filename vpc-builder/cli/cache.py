@@ -0,0 +1,297 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Seconds a cached describe result stays valid, and how many results are kept.
+DESCRIBE_CACHE_TTL = 60
+DESCRIBE_CACHE_SIZE = 256
+# Seconds a pagination waits for the next page of an identical one in flight before fetching alone.
+IN_FLIGHT_PAGE_WAIT = 10
+
+MUTATING_PREFIXES = (
+    "create_", "delete_", "attach_", "detach_", "associate_", "disassociate_",
+    "modify_", "replace_", "allocate_", "release_", "authorize_", "revoke_",
+    "assign_", "unassign_", "accept_", "reject_", "enable_", "disable_",
+)
+
+# Describe operations made stale by a mutation, matched against the mutating
+# operation's name. Order matters: the first family found in the name wins.
+MUTATION_FAMILIES = (
+    ("vpc_endpoint", ("describe_vpc_endpoints", "describe_route_tables", "describe_network_interfaces")),
+    ("nat_gateway", ("describe_nat_gateways", "describe_network_interfaces", "describe_addresses")),
+    ("internet_gateway", ("describe_internet_gateways",)),
+    ("route", ("describe_route_tables",)),
+    ("network_acl", ("describe_network_acls",)),
+    ("network_interface", ("describe_network_interfaces",)),
+    ("security_group", ("describe_security_groups", "describe_security_group_rules")),
+    ("subnet", ("describe_subnets", "describe_route_tables", "describe_network_acls")),
+    ("address", ("describe_addresses", "describe_network_interfaces")),
+    ("vpc", ("describe_vpcs", "describe_security_groups", "describe_route_tables", "describe_network_acls")),
+)
+
+# create_tags / delete_tags only touch the describes for the tagged ID types.
+TAGGED_ID_PREFIXES = {
+    "vpc": "describe_vpcs",
+    "subnet": "describe_subnets",
+    "rtb": "describe_route_tables",
+    "igw": "describe_internet_gateways",
+    "nat": "describe_nat_gateways",
+    "sg": "describe_security_groups",
+    "eni": "describe_network_interfaces",
+    "acl": "describe_network_acls",
+    "eipalloc": "describe_addresses",
+    "vpce": "describe_vpc_endpoints",
+}
+
+
+def cache_key(operation, kwargs):
+    """Build a key that ignores the order of filters, filter values and ID lists."""
+    normalized = {}
+    for name, value in kwargs.items():
+        if name == "Filters":
+            value = sorted(
+                ({"Name": f["Name"], "Values": sorted(f.get("Values", []))} for f in value),
+                key=lambda f: f["Name"],
+            )
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            value = sorted(value)
+        normalized[name] = value
+    return operation, json.dumps(normalized, sort_keys=True, default=str)
+
+
+def stale_operations(operation, kwargs):
+    """Return the describe operations a mutation invalidates, or None for all of them."""
+    if operation in ("create_tags", "delete_tags"):
+        affected = set()
+        for resource_id in kwargs.get("Resources", []):
+            describe = TAGGED_ID_PREFIXES.get(resource_id.split("-")[0])
+            if describe is None:
+                return None
+            affected.add(describe)
+        return affected
+
+    for family, describes in MUTATION_FAMILIES:
+        if family in operation:
+            return set(describes)
+    return None
+
+
+def uncached(ec2):
+    """Return the raw client behind a CachingEC2Client, for reads that must never be served stale."""
+    return ec2.client if isinstance(ec2, CachingEC2Client) else ec2
+
+
+class CachingEC2Client:
+    """
+    Write-through cache around a boto3 EC2 client.
+
+    describe_* calls and paginated describes are served from an LRU/TTL cache
+    keyed by operation and normalized parameters. Concurrent identical describe
+    calls and paginations share one request stream, so a foreground lookup
+    joins a background prefetch that is still in flight. Any mutating call
+    made through the wrapper drops the cached describes it could have
+    changed, so the tool never shows a stale view of its own changes.
+    Callers get their own copy of every response and page, so mutating one
+    never changes what the cache serves next.
+    Everything else is passed straight through to the wrapped client.
+    """
+
+    def __init__(self, client, ttl=DESCRIBE_CACHE_TTL, max_entries=DESCRIBE_CACHE_SIZE):
+        self._client = client
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("describe_"):
+            return self._cached_call(name, attr)
+        if name.startswith(MUTATING_PREFIXES):
+            return self._mutating_call(name, attr)
+        return attr
+
+    def get_paginator(self, operation):
+        return _CachedPaginator(self, operation, self._client.get_paginator(operation))
+
+    def invalidate(self, *operations):
+        """Drop cached results for the given describe operations, or everything if none are given."""
+        with self._lock:
+            self._generation += 1
+            if not operations:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[1] in operations]:
+                del self._entries[key]
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, self._generation
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None, self._generation
+            self._entries.move_to_end(key)
+            return value, self._generation
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            # A mutation landed while we were fetching; the result may already be stale.
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _cached_call(self, operation, method):
+        def call(**kwargs):
+            key = ("call",) + cache_key(operation, kwargs)
+            value, generation = self._lookup(key)
+            if value is not None:
+                return copy.deepcopy(value)
+
+            with self._lock:
+                pending = self._in_flight.get(key)
+                if pending is not None:
+                    owner = False
+                else:
+                    owner = True
+                    pending = self._in_flight[key] = Future()
+            if not owner:
+                return copy.deepcopy(pending.result())
+
+            try:
+                value = method(**kwargs)
+            except BaseException as e:
+                pending.set_exception(e)
+                raise
+            else:
+                pending.set_result(value)
+                self._store(key, value, generation)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+            return copy.deepcopy(value)
+        return call
+
+    def _mutating_call(self, operation, method):
+        def call(**kwargs):
+            try:
+                return method(**kwargs)
+            finally:
+                if not kwargs.get("DryRun"):
+                    self.invalidate(*(stale_operations(operation, kwargs) or ()))
+        return call
+
+
+class _PageStream:
+    """Pages of one in-flight pagination, readable by identical paginations while they arrive."""
+
+    def __init__(self):
+        self.pages = []
+        self.owner_thread = threading.get_ident()
+        self._finished = False
+        self._abandoned = False
+        self._error = None
+        self._changed = threading.Condition()
+
+    def append(self, page):
+        with self._changed:
+            self.pages.append(page)
+            self._changed.notify_all()
+
+    def finish(self, error=None, abandoned=False):
+        with self._changed:
+            if self._finished:
+                return
+            self._finished, self._error, self._abandoned = True, error, abandoned
+            self._changed.notify_all()
+
+    def follow(self, timeout=None):
+        """
+        Yield the pages as the owner fetches them. Returns how many were read
+        if the owner stopped early or no page came within timeout seconds
+        (e.g. its generator was left suspended), so the caller can go on alone.
+        """
+        timeout = IN_FLIGHT_PAGE_WAIT if timeout is None else timeout
+        read = 0
+        while True:
+            with self._changed:
+                if not self._changed.wait_for(lambda: len(self.pages) > read or self._finished, timeout):
+                    self._finished = self._abandoned = True
+                    return read
+                if len(self.pages) > read:
+                    page = self.pages[read]
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return read if self._abandoned else None
+            yield copy.deepcopy(page)
+            read += 1
+
+
+class _CachedPaginator:
+    def __init__(self, cache, operation, paginator):
+        self._cache = cache
+        self._operation = operation
+        self._paginator = paginator
+
+    def paginate(self, **kwargs):
+        key = ("paginate",) + cache_key(self._operation, kwargs)
+        pages, generation = self._cache._lookup(key)
+        if pages is not None:
+            for page in pages:
+                yield copy.deepcopy(page)
+            return
+
+        with self._cache._lock:
+            stream = self._cache._in_flight.get(key)
+            owner = stream is None
+            if owner:
+                stream = self._cache._in_flight[key] = _PageStream()
+        if not owner and stream.owner_thread == threading.get_ident():
+            # A nested identical pagination on the owner's own thread would wait for itself.
+            yield from self._paginator.paginate(**kwargs)
+            return
+        if not owner:
+            read = yield from stream.follow()
+            if read is not None:
+                # The owner stopped reading early; fetch the remaining pages ourselves.
+                with self._cache._lock:
+                    if self._cache._in_flight.get(key) is stream:
+                        del self._cache._in_flight[key]
+                for number, page in enumerate(self._paginator.paginate(**kwargs)):
+                    if number >= read:
+                        yield page
+            return
+
+        try:
+            for page in self._paginator.paginate(**kwargs):
+                stream.append(page)
+                yield copy.deepcopy(page)
+        except GeneratorExit:
+            stream.finish(abandoned=True)
+            raise
+        except BaseException as e:
+            stream.finish(error=e)
+            raise
+        else:
+            stream.finish()
+            self._cache._store(key, stream.pages, generation)
+        finally:
+            stream.finish(abandoned=True)
+            with self._cache._lock:
+                if self._cache._in_flight.get(key) is stream:
+                    del self._cache._in_flight[key]
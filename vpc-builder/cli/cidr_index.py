@@ -0,0 +1,261 @@
+import bisect
+import ipaddress
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cli.aws_client import AWSClient, region_codes
+from cli.display import show_info, show_warning
+from cli.executor import MAX_WORKERS
+from cli.helpers import STATE_DIR, error_message, paginate, save_json
+
+CIDR_INDEX_PATH = os.path.join(STATE_DIR, "cidr-index.json")
+# Seconds before the persisted index is rebuilt from AWS.
+CIDR_INDEX_TTL = int(os.environ.get("VPC_BUILDER_CIDR_INDEX_TTL", "3600"))
+
+
+def configured_regions():
+    """Regions checked for collisions: VPC_BUILDER_CIDR_REGIONS (comma separated) or AWS_REGIONS."""
+    regions = os.environ.get("VPC_BUILDER_CIDR_REGIONS")
+    return [r.strip() for r in regions.split(",") if r.strip()] if regions else region_codes()
+
+
+class _IntervalList:
+    """
+    CIDR blocks sorted by start address, plus the same blocks bucketed by size.
+
+    Two CIDR blocks are always either disjoint or nested, so a block overlaps
+    [start, end] only if it starts inside it (one bisect over the sorted
+    starts) or contains start. A block of a given size containing start must
+    begin at start rounded down to that size, so the containing blocks are one
+    dict probe per block size present, at most 33: O(log n + matches) however
+    wide the blocks are or where they sit.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._entries = []
+        self._by_size = {}
+
+    def add(self, start, end, entry):
+        i = bisect.bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._entries.insert(i, (start, end, entry))
+        self._by_size.setdefault(end - start + 1, {}).setdefault(start, []).append(entry)
+
+    def remove(self, start, entry):
+        i = bisect.bisect_left(self._starts, start)
+        while i < len(self._starts) and self._starts[i] == start:
+            _, end, candidate = self._entries[i]
+            if candidate is entry:
+                del self._starts[i], self._entries[i]
+                bucket = self._by_size[end - start + 1]
+                bucket[start].remove(entry)
+                if not bucket[start]:
+                    del bucket[start]
+                if not bucket:
+                    del self._by_size[end - start + 1]
+                return
+            i += 1
+
+    def overlapping(self, start, end):
+        hi = bisect.bisect_right(self._starts, end)
+        lo = bisect.bisect_left(self._starts, start)
+        found = [entry for _, _, entry in self._entries[lo:hi]]
+        # Blocks starting before `start` overlap only if they contain it.
+        for size, bucket in self._by_size.items():
+            block_start = start - start % size
+            if block_start < start:
+                found.extend(bucket.get(block_start, ()))
+        return found
+
+
+class CidrIndex:
+    """Every VPC CIDR (primary and secondary) and subnet CIDR across a set of regions."""
+
+    def __init__(self, regions=(), built_at=None):
+        self.regions = sorted(set(regions))
+        self.built_at = built_at if built_at is not None else time.time()
+        self._entries = []
+        self._vpc_blocks = _IntervalList()
+        self._subnet_blocks = {}
+        self._vpc_cidrs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, cidr, kind, resource_id, vpc_id, region):
+        network = ipaddress.IPv4Network(cidr)
+        entry = {"cidr": str(network), "kind": kind, "id": resource_id, "vpc_id": vpc_id, "region": region}
+        start, end = int(network.network_address), int(network.broadcast_address)
+        with self._lock:
+            self._entries.append(entry)
+            if kind == "vpc":
+                self._vpc_blocks.add(start, end, entry)
+                self._vpc_cidrs.setdefault(vpc_id, []).append(network)
+            else:
+                self._subnet_blocks.setdefault(vpc_id, _IntervalList()).add(start, end, entry)
+        return entry
+
+    def remove(self, resource_ids):
+        """Drop the CIDRs of deleted resources; a deleted VPC takes its subnets with it. Returns how many went."""
+        resource_ids = set(resource_ids)
+        with self._lock:
+            gone = [e for e in self._entries if e["id"] in resource_ids or e["vpc_id"] in resource_ids]
+            for entry in gone:
+                network = ipaddress.IPv4Network(entry["cidr"])
+                start = int(network.network_address)
+                if entry["kind"] == "vpc":
+                    self._vpc_blocks.remove(start, entry)
+                    self._vpc_cidrs[entry["vpc_id"]].remove(network)
+                    if not self._vpc_cidrs[entry["vpc_id"]]:
+                        del self._vpc_cidrs[entry["vpc_id"]]
+                else:
+                    self._subnet_blocks[entry["vpc_id"]].remove(start, entry)
+            if gone:
+                gone_ids = {id(e) for e in gone}
+                self._entries = [e for e in self._entries if id(e) not in gone_ids]
+        return len(gone)
+
+    def vpc_overlaps(self, cidr):
+        network = ipaddress.IPv4Network(cidr)
+        return self._vpc_blocks.overlapping(int(network.network_address), int(network.broadcast_address))
+
+    def subnet_overlaps(self, cidr, vpc_id):
+        network = ipaddress.IPv4Network(cidr)
+        blocks = self._subnet_blocks.get(vpc_id)
+        if not blocks:
+            return []
+        return blocks.overlapping(int(network.network_address), int(network.broadcast_address))
+
+    def problems(self, cidr, vpc_id=None):
+        """
+        Why cidr cannot be used: for a new VPC (vpc_id=None) any overlap with
+        another VPC; for a subnet, falling outside the VPC or overlapping one
+        of its subnets. An empty list means the CIDR is free.
+        """
+        network = ipaddress.IPv4Network(cidr)
+        if vpc_id is None:
+            return [
+                f"overlaps {e['id']} {e['cidr']} in {e['region']}" for e in self.vpc_overlaps(network)
+            ]
+
+        problems = []
+        vpc_cidrs = self._vpc_cidrs.get(vpc_id)
+        if vpc_cidrs and not any(network.subnet_of(block) for block in vpc_cidrs):
+            problems.append(f"is outside {vpc_id} ({', '.join(str(b) for b in vpc_cidrs)})")
+        problems += [f"overlaps subnet {e['id']} {e['cidr']}" for e in self.subnet_overlaps(network, vpc_id)]
+        return problems
+
+    def is_stale(self, regions, ttl=CIDR_INDEX_TTL):
+        return time.time() - self.built_at > ttl or not set(regions) <= set(self.regions)
+
+    def to_dict(self):
+        with self._lock:
+            return {"built_at": self.built_at, "regions": self.regions, "entries": list(self._entries)}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(data.get("regions", []), data.get("built_at", 0))
+        for e in data.get("entries", []):
+            index.add(e["cidr"], e["kind"], e["id"], e["vpc_id"], e["region"])
+        return index
+
+    def save(self, path=None):
+        save_json(path or CIDR_INDEX_PATH, self.to_dict())
+
+    @classmethod
+    def load(cls, path=None):
+        try:
+            with open(path or CIDR_INDEX_PATH) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def build_cidr_index(regions, max_workers=MAX_WORKERS):
+    """Fetch VPC and subnet CIDRs from every region concurrently. Returns (index, errors)."""
+    clients = {region: AWSClient.get_regional_client(region) for region in regions}
+
+    def fetch(task):
+        region, operation, result_key = task
+        return region, operation, list(paginate(clients[region], operation, result_key))
+
+    tasks = [(region, op, key) for region in regions
+             for op, key in (("describe_vpcs", "Vpcs"), ("describe_subnets", "Subnets"))]
+    index, errors = CidrIndex(regions), {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(task[0], pool.submit(fetch, task)) for task in tasks]
+        for region, future in futures:
+            try:
+                region, operation, items = future.result()
+            except Exception as e:
+                errors.setdefault(region, error_message(e))
+                continue
+            for item in items:
+                if operation == "describe_vpcs":
+                    cidrs = [
+                        assoc["CidrBlock"] for assoc in item.get("CidrBlockAssociationSet", [])
+                        if assoc.get("CidrBlockState", {}).get("State") in ("associated", "associating", None)
+                    ] or [item["CidrBlock"]]
+                    for cidr in cidrs:
+                        index.add(cidr, "vpc", item["VpcId"], item["VpcId"], region)
+                else:
+                    index.add(item["CidrBlock"], "subnet", item["SubnetId"], item["VpcId"], region)
+    return index, errors
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_cidr_index(ec2):
+    """get_cidr_index for a flow: covers ec2's region and returns None (with a warning) if AWS can't be read."""
+    show_info("Checking CIDRs against the org-wide index...")
+    try:
+        return get_cidr_index([ec2.meta.region_name])
+    except Exception as e:
+        show_warning(f"CIDR overlap check unavailable: {error_message(e)}")
+        return None
+
+
+def get_cidr_index(extra_regions=(), refresh=False):
+    """
+    The org-wide CIDR index: loaded from disk, rebuilt when older than the
+    TTL or missing one of the requested regions, and persisted again.
+    """
+    global _index
+    regions = sorted(set(configured_regions()) | set(extra_regions))
+    with _index_lock:
+        if _index is None and not refresh:
+            _index = CidrIndex.load()
+        if refresh or _index is None or _index.is_stale(regions):
+            _index, errors = build_cidr_index(regions)
+            for region, message in errors.items():
+                show_warning(f"CIDRs in {region} could not be read, so overlaps there are not checked: {message}")
+            # Failed regions stay uncovered, so the next check reads them again instead of trusting an empty list.
+            _index.regions = [region for region in _index.regions if region not in errors]
+            _index.save()
+        return _index
+
+
+def remember_cidr(cidr, kind, resource_id, vpc_id, region):
+    """Add a CIDR the tool just created to the loaded index so the next check sees it."""
+    with _index_lock:
+        if _index is None:
+            return
+        _index.add(cidr, kind, resource_id, vpc_id, region)
+        _index.save()
+
+
+def forget_cidr(*resource_ids):
+    """Drop deleted VPCs (with their subnets) and subnets from the index so their CIDRs can be reused."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CidrIndex.load()
+        if _index is not None and _index.remove(resource_ids):
+            _index.save()
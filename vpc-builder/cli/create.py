@@ -1,11 +1,17 @@
-import boto3
 from botocore.exceptions import ClientError
 import ipaddress
 import questionary
-from cli.display import show_info, show_success, show_failure, show_warning
+from cli.display import show_info, show_success, show_failure, show_table
 from cli.prompts import confirm_action
-from cli.access import list_accessible_vpcs, verify_vpc_access
+from cli.access import list_accessible_vpcs, verify_vpc_access, vpc_picker_message, vpc_search_values
 from cli.aws_client import AWSClient
+from cli.cidr_index import load_cidr_index, remember_cidr
+from cli.executor import OK, TaskGraph
+from cli.helpers import error_message, paginate, tag_specifications
+from cli.output import records_result
+from cli.picker import choice_label, pick
+from cli.waiters import WaiterError, get_waiter_service
+from utils.subnet_planner import plan_subnet_layout
 
 def run_create_flow():
     ec2 = AWSClient.get_ec2_client()
@@ -26,7 +32,7 @@ def run_create_flow():
             show_failure("No accessible VPCs found. Cannot create Internet Gateway.")
             return
 
-        vpc_id = select_vpc(ec2, vpcs)
+        vpc_id = select_vpc(ec2, vpcs, CREATE_OPERATIONS["Internet Gateway"])
         if not vpc_id:
             return
 
@@ -38,7 +44,7 @@ def run_create_flow():
             show_failure("No accessible VPCs found. Cannot create Subnet.")
             return
 
-        vpc_id = select_vpc(ec2, vpcs)
+        vpc_id = select_vpc(ec2, vpcs, CREATE_OPERATIONS["Subnet"])
         if not vpc_id:
             return
 
@@ -50,7 +56,7 @@ def run_create_flow():
             show_failure("No accessible VPCs found. Cannot create Route Table.")
             return
 
-        vpc_id = select_vpc(ec2, vpcs)
+        vpc_id = select_vpc(ec2, vpcs, CREATE_OPERATIONS["Route Table"])
         if not vpc_id:
             return
 
@@ -62,7 +68,7 @@ def run_create_flow():
             show_failure("No accessible VPCs found. Cannot create NAT Gateway.")
             return
 
-        vpc_id = select_vpc(ec2, vpcs)
+        vpc_id = select_vpc(ec2, vpcs, CREATE_OPERATIONS["NAT Gateway"])
         if not vpc_id:
             return
 
@@ -74,7 +80,7 @@ def run_create_flow():
             show_failure("No accessible VPCs found. Cannot create Security Group.")
             return
 
-        vpc_id = select_vpc(ec2, vpcs)
+        vpc_id = select_vpc(ec2, vpcs, CREATE_OPERATIONS["Security Group"])
         if not vpc_id:
             return
 
@@ -83,30 +89,23 @@ def run_create_flow():
     else:
         show_info("Create flow exited.")
 
-def select_vpc(ec2, vpcs):
-    try:
-        response = ec2.describe_vpcs()
-        vpcs = []
-        for vpc in response.get("Vpcs", []):
-            vpc_id = vpc.get("VpcId")
-            name = None
-            for tag in vpc.get("Tags", []):
-                if tag["Key"] == "Name":
-                    name = tag["Value"]
-                    break
-            vpcs.append((vpc_id, name))
-    except Exception as e:
-        show_failure(f"Failed to fetch VPCs: {str(e)}")
-        return None
-
-    choices = [f"{vpc_id} ({name})" if name else vpc_id for vpc_id, name in vpcs]
-    vpc_choice = questionary.select("Select the VPC:", choices=choices).ask()
-    if not vpc_choice:
+# Operations each menu entry will call once a VPC is picked, checked up front with DryRun.
+CREATE_OPERATIONS = {
+    "Internet Gateway": ("create_internet_gateway", "attach_internet_gateway", "create_tags"),
+    "Subnet": ("create_subnet", "create_tags"),
+    "Route Table": ("create_route_table", "create_tags"),
+    "NAT Gateway": ("allocate_address", "create_nat_gateway", "create_tags"),
+    "Security Group": ("create_security_group", "create_tags"),
+}
+
+def select_vpc(ec2, vpcs, operations=()):
+    choices = [(vpc_id, choice_label(vpc_id, name)) for vpc_id, name in vpcs]
+    vpc_id = pick(vpc_picker_message(ec2, "Select the VPC:"), choices, vpc_search_values(ec2))
+    if not vpc_id:
         show_info("No VPC selected, exiting.")
         return None
-    vpc_id = vpc_choice.split()[0]
 
-    if not verify_vpc_access(ec2, vpc_id):
+    if not verify_vpc_access(ec2, vpc_id, operations):
         show_failure(f"No access to VPC {vpc_id}")
         return None
 
@@ -117,25 +116,23 @@ def create_vpc_flow(ec2):
     show_info("Starting VPC creation...")
 
     vpc_name = questionary.text("Enter a name for your VPC (optional):").ask()
+    cidr_index = load_cidr_index(ec2)
 
     while True:
         cidr_block = questionary.text("Enter CIDR block for VPC (e.g., 10.0.0.0/16):").ask()
-        if validate_cidr(cidr_block):
-            break
-        else:
+        if not validate_cidr(cidr_block):
             show_failure("Invalid CIDR block format. Try again.")
+        elif not validate_cidr(cidr_block, cidr_index):
+            show_failure(f"CIDR {cidr_block} {'; '.join(cidr_index.problems(cidr_block))}. Try again.")
+        else:
+            break
 
     if not confirm_action(f"Create VPC '{vpc_name}' with CIDR {cidr_block}?"):
         show_info("VPC creation cancelled.")
         return
 
     try:
-        vpc_resp = ec2.create_vpc(CidrBlock=cidr_block)
-        vpc_id = vpc_resp['Vpc']['VpcId']
-
-        if vpc_name:
-            ec2.create_tags(Resources=[vpc_id], Tags=[{"Key": "Name", "Value": vpc_name}])
-
+        vpc_id = create_vpc(ec2, cidr_block, vpc_name)
         show_success(f"VPC created successfully! VPC ID: {vpc_id}")
 
     except ClientError as e:
@@ -149,17 +146,7 @@ def create_internet_gateway_flow(ec2, vpc_id):
     igw_name = questionary.text("📝 Enter a name for the Internet Gateway (optional):").ask()
 
     try:
-        igw_resp = ec2.create_internet_gateway()
-        igw_id = igw_resp['InternetGateway']['InternetGatewayId']
-
-        # Tag with Name if provided
-        tags = []
-        if igw_name:
-            tags.append({"Key": "Name", "Value": igw_name})
-        if tags:
-            ec2.create_tags(Resources=[igw_id], Tags=tags)
-
-        ec2.attach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
+        igw_id = create_internet_gateway(ec2, vpc_id, igw_name)
         show_success(f"✅ Internet Gateway '{igw_name or igw_id}' created and attached to VPC {vpc_id}!")
 
 
@@ -170,6 +157,14 @@ def create_internet_gateway_flow(ec2, vpc_id):
 def create_subnet_flow(ec2, vpc_id):
     show_info(f"📦 Creating Subnet(s) inside VPC {vpc_id}")
 
+    layout = questionary.select(
+        "How do you want to lay out the subnets?",
+        choices=["Automatic (plan CIDRs across AZs)", "Manual (enter each CIDR)"]
+    ).ask()
+    if layout and layout.startswith("Automatic"):
+        auto_subnet_layout_flow(ec2, vpc_id)
+        return
+
     num_subnets = questionary.text("🧮 How many subnets do you want to create?").ask()
     if not num_subnets.isdigit() or int(num_subnets) <= 0:
         show_failure("❌ Please enter a valid number greater than 0.")
@@ -193,15 +188,19 @@ def create_subnet_flow(ec2, vpc_id):
             show_failure("❗ Total count mismatch. Check your numbers again.")
             return
 
+    cidr_index = load_cidr_index(ec2)
+
     for idx, s_type in enumerate(subnet_types, start=1):
         show_info(f"⚙️ Configuring {s_type.upper()} Subnet #{idx}")
 
         while True:
             cidr_block = questionary.text(f"📍 Enter CIDR block for {s_type} Subnet #{idx} (e.g., 10.0.{idx}.0/24):").ask()
-            if validate_cidr(cidr_block):
-                break
-            else:
+            if not validate_cidr(cidr_block):
                 show_failure("❌ Invalid CIDR block format. Try again.")
+            elif not validate_cidr(cidr_block, cidr_index, vpc_id):
+                show_failure(f"❌ CIDR {cidr_block} {'; '.join(cidr_index.problems(cidr_block, vpc_id))}. Try again.")
+            else:
+                break
 
         subnet_name = questionary.text(f"📝 Enter a name for the {s_type} Subnet #{idx}:").ask()
 
@@ -210,14 +209,80 @@ def create_subnet_flow(ec2, vpc_id):
             continue
 
         try:
-            resp = ec2.create_subnet(VpcId=vpc_id, CidrBlock=cidr_block)
-            subnet_id = resp['Subnet']['SubnetId']
-            if subnet_name:
-                ec2.create_tags(Resources=[subnet_id], Tags=[{"Key": "Name", "Value": subnet_name}, {"Key": "Type", "Value": s_type}])
+            subnet_id = create_subnet(ec2, vpc_id, cidr_block, subnet_name, s_type)
             show_success(f"✅ {s_type.capitalize()} Subnet created! Subnet ID: {subnet_id}")
         except ClientError as e:
             show_failure(f"⚠️ Error creating {s_type} Subnet: {e.response['Error']['Message']}")
 
+def auto_subnet_layout_flow(ec2, vpc_id):
+    vpc = AWSClient.get_vpc_inventory(ec2).get(vpc_id)
+    if not vpc:
+        show_failure(f"❌ VPC {vpc_id} not found.")
+        return
+
+    pub_count = questionary.text("🌐 How many **public** subnets?", default="0").ask()
+    pri_count = questionary.text("🔒 How many **private** subnets?", default="0").ask()
+    if not pub_count.isdigit() or not pri_count.isdigit():
+        show_failure("❌ Invalid numbers. Please enter digits only.")
+        return
+
+    try:
+        zones = [
+            az["ZoneName"] for az in ec2.describe_availability_zones(
+                Filters=[{"Name": "state", "Values": ["available"]}]
+            )["AvailabilityZones"]
+        ]
+        existing = [s["CidrBlock"] for s in paginate(
+            ec2, "describe_subnets", "Subnets", Filters=[{"Name": "vpc-id", "Values": [vpc_id]}]
+        )]
+    except ClientError as e:
+        show_failure(f"⚠️ Error reading VPC layout: {e.response['Error']['Message']}")
+        return
+
+    azs = questionary.checkbox("🗺️ Spread subnets across which AZs?", choices=zones).ask()
+    if not azs:
+        show_info("⏹️ No AZs selected, subnet creation cancelled.")
+        return
+
+    pub_prefix = questionary.text("📏 Public subnet prefix length, e.g. 24 (blank = auto):").ask()
+    pri_prefix = questionary.text("📏 Private subnet prefix length, e.g. 20 (blank = auto):").ask()
+    if not all(p.strip().lstrip("/").isdigit() for p in (pub_prefix, pri_prefix) if p.strip()):
+        show_failure("❌ Prefix lengths must be numbers like 24.")
+        return
+
+    try:
+        layout = plan_subnet_layout(
+            vpc["CidrBlock"], int(pub_count), int(pri_count), azs,
+            public_prefix=int(pub_prefix.strip().lstrip("/")) if pub_prefix.strip() else None,
+            private_prefix=int(pri_prefix.strip().lstrip("/")) if pri_prefix.strip() else None,
+            reserved=existing,
+            name_prefix=f"{vpc['Name']}-" if vpc.get("Name") else "",
+        )
+    except ValueError as e:
+        show_failure(f"❌ {e}")
+        return
+
+    show_table(
+        f"Subnet layout for {vpc_id} ({vpc['CidrBlock']})",
+        ["Name", "Type", "CIDR", "AZ"],
+        [(s["name"], s["type"], s["cidr"], s["az"]) for s in layout],
+    )
+    if not confirm_action(f"✅ Confirm: Create these {len(layout)} subnets?"):
+        show_info("⏹️ Subnet creation cancelled.")
+        return
+
+    graph = TaskGraph()
+    for subnet in layout:
+        graph.add(subnet["name"], lambda s=subnet: create_subnet(ec2, vpc_id, s["cidr"], s["name"], s["type"], s["az"]))
+    results = graph.run()
+
+    created = [key for key, result in results.items() if result.status == OK]
+    for key, result in results.items():
+        if result.status != OK:
+            show_failure(f"⚠️ Error creating subnet {key}: {error_message(result.error)}")
+    if created:
+        show_success(f"✅ Created {len(created)} of {len(layout)} subnets.")
+
 def create_route_table_flow(ec2, vpc_id):
     show_info(f"🛣️ Creating Route Table(s) inside VPC {vpc_id}")
 
@@ -241,12 +306,7 @@ def create_route_table_flow(ec2, vpc_id):
             continue
 
         try:
-            resp = ec2.create_route_table(VpcId=vpc_id)
-            rt_id = resp['RouteTable']['RouteTableId']
-            tags = [{"Key": "Type", "Value": rt_type}]
-            if rt_name:
-                tags.append({"Key": "Name", "Value": rt_name})
-            ec2.create_tags(Resources=[rt_id], Tags=tags)
+            rt_id = create_route_table(ec2, vpc_id, rt_name, rt_type)
             show_success(f"✅ {rt_type.capitalize()} Route Table created! ID: {rt_id}")
         except ClientError as e:
             show_failure(f"⚠️ Error during Route Table creation: {e.response['Error']['Message']}")
@@ -263,18 +323,13 @@ def create_nat_gateway_flow(ec2, vpc_id):
         return
 
     try:
-        # Allocate Elastic IP for NAT Gateway
-        ec2_client = boto3.client('ec2', region_name=AWSClient._region)
-        eip = ec2_client.allocate_address(Domain='vpc')
-        allocation_id = eip['AllocationId']
-
-        # Create NAT Gateway
-        resp = ec2.create_nat_gateway(SubnetId=subnet_id, AllocationId=allocation_id)
-        nat_gw_id = resp['NatGateway']['NatGatewayId']
-
+        show_info("Creating the NAT Gateway and waiting for it to become available (this can take a few minutes)...")
+        nat_gw_id = create_nat_gateway(ec2, subnet_id, wait=True)
         show_success(f"NAT Gateway created successfully! ID: {nat_gw_id}")
     except ClientError as e:
         show_failure(f"Error during NAT Gateway creation: {e.response['Error']['Message']}")
+    except (WaiterError, TimeoutError) as e:
+        show_failure(f"NAT Gateway did not become available: {e}")
 
 def create_security_group_flow(ec2, vpc_id):
     show_info(f"Creating Security Group inside VPC {vpc_id}")
@@ -287,19 +342,97 @@ def create_security_group_flow(ec2, vpc_id):
         return
 
     try:
-        resp = ec2.create_security_group(
-            GroupName=sg_name,
-            Description=sg_desc,
-            VpcId=vpc_id
-        )
-        sg_id = resp['GroupId']
+        sg_id = create_security_group(ec2, vpc_id, sg_name, sg_desc)
         show_success(f"Security Group created successfully! ID: {sg_id}")
     except ClientError as e:
         show_failure(f"Error during Security Group creation: {e.response['Error']['Message']}")
 
-def validate_cidr(cidr):
+# ---------- AWS CALLS ----------
+# Prompt-free building blocks shared by the interactive flows and spec apply.
+@records_result("create", "vpc")
+def create_vpc(ec2, cidr_block, name=None):
+    resp = ec2.create_vpc(CidrBlock=cidr_block, TagSpecifications=tag_specifications("vpc", name))
+    vpc_id = resp['Vpc']['VpcId']
+    AWSClient.get_vpc_inventory(ec2).invalidate()
+    remember_cidr(cidr_block, "vpc", vpc_id, vpc_id, ec2.meta.region_name)
+    return vpc_id
+
+
+@records_result("create", "internet-gateway")
+def create_internet_gateway(ec2, vpc_id, name=None):
+    resp = ec2.create_internet_gateway(TagSpecifications=tag_specifications("internet-gateway", name))
+    igw_id = resp['InternetGateway']['InternetGatewayId']
+    ec2.attach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
+    return igw_id
+
+
+@records_result("create", "subnet")
+def create_subnet(ec2, vpc_id, cidr_block, name=None, subnet_type="private", availability_zone=None):
+    kwargs = {}
+    if availability_zone:
+        kwargs["AvailabilityZone"] = availability_zone
+    resp = ec2.create_subnet(
+        VpcId=vpc_id,
+        CidrBlock=cidr_block,
+        TagSpecifications=tag_specifications("subnet", name, {"Type": subnet_type}),
+        **kwargs
+    )
+    subnet_id = resp['Subnet']['SubnetId']
+    remember_cidr(cidr_block, "subnet", subnet_id, vpc_id, ec2.meta.region_name)
+    return subnet_id
+
+
+@records_result("create", "route-table")
+def create_route_table(ec2, vpc_id, name=None, rt_type="private"):
+    resp = ec2.create_route_table(
+        VpcId=vpc_id,
+        TagSpecifications=tag_specifications("route-table", name, {"Type": rt_type})
+    )
+    return resp['RouteTable']['RouteTableId']
+
+
+@records_result("create", "nat-gateway")
+def create_nat_gateway(ec2, subnet_id, name=None, wait=False):
+    # Allocate Elastic IP for NAT Gateway
+    eip = ec2.allocate_address(Domain='vpc', TagSpecifications=tag_specifications("elastic-ip", name))
+    try:
+        resp = ec2.create_nat_gateway(
+            SubnetId=subnet_id,
+            AllocationId=eip['AllocationId'],
+            TagSpecifications=tag_specifications("natgateway", name)
+        )
+    except Exception:
+        # Don't leave a billed, unattached Elastic IP behind; report the original error.
+        try:
+            ec2.release_address(AllocationId=eip['AllocationId'])
+        except ClientError:
+            pass
+        raise
+    nat_gw_id = resp['NatGateway']['NatGatewayId']
+    if wait:
+        get_waiter_service(ec2).wait_for("nat_gateway", nat_gw_id, "available").result()
+    return nat_gw_id
+
+
+@records_result("create", "security-group")
+def create_security_group(ec2, vpc_id, name, description):
+    resp = ec2.create_security_group(
+        GroupName=name,
+        Description=description,
+        VpcId=vpc_id,
+        TagSpecifications=tag_specifications("security-group", name)
+    )
+    return resp['GroupId']
+
+
+def validate_cidr(cidr, cidr_index=None, vpc_id=None):
+    """
+    True if cidr is a valid IPv4 network. With a CidrIndex it must also be
+    free: no overlap with another VPC, or for a subnet (vpc_id given) inside
+    that VPC and clear of its other subnets.
+    """
     try:
         ipaddress.IPv4Network(cidr)
-        return True
     except ValueError:
         return False
+    return cidr_index is None or not cidr_index.problems(cidr, vpc_id)
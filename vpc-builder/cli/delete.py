@@ -1,8 +1,19 @@
+import functools
+
 import questionary
 from botocore.exceptions import ClientError
-from cli.display import show_info, show_success, show_failure
-from cli.access import list_accessible_vpcs
+from cli.display import BulkProgress, show_info, show_success, show_failure, show_table, show_warning
+from cli.access import list_accessible_vpcs, vpc_picker_message, vpc_search_values
+from cli.async_core import get_core, prefetch
 from cli.aws_client import AWSClient
+from cli.cidr_index import forget_cidr
+from cli.executor import OK, SKIPPED
+from cli.helpers import error_message, iter_vpc_resources
+from cli.picker import pick
+from cli.preflight import MissingPermissions
+from cli.prompts import confirm_action
+from cli.security_groups import SecurityGroupAnalyzer, format_ports, reference_permissions
+from cli.teardown import delete_internet_gateway, teardown_vpc
 
 
 def run_delete_flow(ec2):
@@ -10,11 +21,13 @@ def run_delete_flow(ec2):
 
     choice = questionary.select(
         "What would you like to delete?",
-        choices=["Entire VPC", "Specific Resources"]
+        choices=["Entire VPC", "Specific Resources", "Multiple VPCs (by tag, age or name)"]
     ).ask()
 
     if choice == "Entire VPC":
         delete_entire_vpc(ec2)
+    elif choice == "Multiple VPCs (by tag, age or name)":
+        delete_multiple_vpcs(ec2)
     else:
         delete_specific_resources(ec2)
 
@@ -26,15 +39,13 @@ def choose_vpc(ec2):
         show_info("No accessible VPCs found.")
         return None
 
-    choices = [
-        questionary.Choice(title=f"{vpc_id} — {vpc_name}", value=vpc_id)
-        for vpc_id, vpc_name in accessible_vpcs
-    ]
+    choices = [(vpc_id, f"{vpc_id} — {vpc_name}") for vpc_id, vpc_name in accessible_vpcs]
 
-    vpc_id = questionary.select(
-        "Select a VPC:",
-        choices=choices
-    ).ask()
+    vpc_id = pick(
+        vpc_picker_message(ec2, "Select a VPC:"),
+        choices,
+        vpc_search_values(ec2)
+    )
 
     return vpc_id
 
@@ -52,22 +63,80 @@ def delete_entire_vpc(ec2):
         show_info("Deletion cancelled.")
         return
 
+    show_info(f"Discovering resources in VPC {vpc_id}...")
+    with BulkProgress(f"Deleting VPC {vpc_id}", action="delete", context=record_context(ec2, vpc_id)) as progress:
+        try:
+            results = teardown_vpc(ec2, vpc_id, preflight=True, on_done=record_task(progress, vpc_id))
+        except MissingPermissions as e:
+            show_failure(f"Nothing was deleted. {e}")
+            return
+        except ClientError as e:
+            show_failure(f"Failed to discover resources in VPC: {e.response['Error']['Message']}")
+            return
+    AWSClient.get_vpc_inventory(ec2).invalidate()
+
+    failed = {key: result for key, result in results.items() if result.status != OK}
+    if not failed:
+        show_success(f"VPC {vpc_id} and all related resources deleted successfully ({len(results)} steps).")
+        return
+    show_failure(f"VPC {vpc_id} was not fully deleted ({len(failed)} of {len(results)} steps did not complete).")
+
+
+def record_task(progress, vpc_id):
+    """TaskGraph on_done callback that reports each finished step to a BulkProgress."""
+    def on_done(key, result):
+        if key == "vpc":
+            key = f"vpc:{vpc_id}"
+        if result.status == OK:
+            progress.done(key)
+        elif result.status == SKIPPED:
+            progress.skipped(key, str(result.error))
+        else:
+            progress.failed(key, error_message(result.error))
+    return on_done
+
+
+def record_context(ec2, vpc_id):
+    """Fields added to every --output result record of a delete in vpc_id."""
+    return {"vpc_id": vpc_id, "region": ec2.meta.region_name}
+
+
+def delete_multiple_vpcs(ec2):
+    from cli.aws_client import region_codes
+    from cli.bulk_delete import parse_age, parse_tag_filters, run_bulk_delete
+    from cli.scan import enabled_regions
+
+    current = ec2.meta.region_name
+    scope = questionary.select(
+        "Which regions?",
+        choices=[f"Current region ({current})", "Regions in AWS_REGIONS", "Every enabled region"]
+    ).ask()
+    if not scope:
+        return
+    if scope == "Regions in AWS_REGIONS":
+        regions = region_codes()
+    elif scope == "Every enabled region":
+        regions = enabled_regions()
+    else:
+        regions = [current]
+
+    tags = parse_tag_filters([questionary.text("Tag filter (e.g. env=test,ephemeral; blank for none):").ask() or ""])
+    older_than = questionary.text("Older than (e.g. 12h, 7d; blank for any age):").ask() or ""
+    name_pattern = questionary.text("Name pattern (e.g. ci-*; blank for any):").ask() or None
     try:
-        delete_subnets_in_vpc(ec2, vpc_id)
-        delete_route_tables_in_vpc(ec2, vpc_id)
-        delete_internet_gateways_in_vpc(ec2, vpc_id)
-        delete_security_groups_in_vpc(ec2, vpc_id)
+        older_than = parse_age(older_than) if older_than.strip() else None
+    except ValueError as e:
+        show_failure(str(e))
+        return
 
-        ec2.delete_vpc(VpcId=vpc_id)
-        show_success(f"VPC {vpc_id} and all related resources deleted successfully.")
-    except Exception as e:
-        show_failure(f"Failed to delete VPC: {str(e)}")
+    run_bulk_delete(regions, tags, older_than, name_pattern, confirm=confirm_action)
 
 
 def delete_specific_resources(ec2):
     vpc_id = choose_vpc(ec2)
     if not vpc_id:
         return
+    prefetch_vpc_resources(ec2, vpc_id)
 
     resource_choice = questionary.select(
         "Select the resource type to delete:",
@@ -89,61 +158,73 @@ def delete_specific_resources(ec2):
         show_failure(f"Failed to delete {resource_choice}: {str(e)}")
 
 
-# Generic function to list resources from a describe call with filters and key path
-def list_resources(ec2, describe_func_name, filter_key, filter_values, response_key):
-    """
-    Calls the specified describe function on ec2 client, filters by filter_key and filter_values,
-    and returns the list of resources under response_key.
-    """
-    describe_func = getattr(ec2, describe_func_name)
-    filters = [{"Name": filter_key, "Values": filter_values}]
-    response = describe_func(Filters=filters)
-    return response.get(response_key, [])
+def prefetch_vpc_resources(ec2, vpc_id):
+    """Warm the describe cache for every resource type offered below while the user picks one."""
+    return prefetch(
+        functools.partial(list, iter_vpc_resources(ec2, "describe_subnets", "Subnets", vpc_id)),
+        functools.partial(list, iter_vpc_resources(ec2, "describe_route_tables", "RouteTables", vpc_id)),
+        functools.partial(list, iter_vpc_resources(ec2, "describe_internet_gateways", "InternetGateways", vpc_id, "attachment.vpc-id")),
+        functools.partial(list, iter_vpc_resources(ec2, "describe_security_groups", "SecurityGroups", vpc_id)),
+    )
 
 
 # Generic deletion helper for resources with a delete function and ID key
-def delete_resources(resources, id_key, delete_func, skip_condition=None, disassociate_func=None, disassociate_key=None):
+def delete_resources(resources, id_key, delete_func, skip_condition=None, disassociate_func=None, disassociate_key=None,
+                     title="Deleting resources", resource_type=None, context=None):
     """
-    resources: list of resource dicts
+    resources: iterable of resource dicts, consumed lazily: deleting starts
+               with the first one, e.g. while later pages are still being listed
     id_key: key to get resource ID
     delete_func: callable to delete resource, must accept resource ID as keyword argument
     skip_condition: callable(resource) -> bool, if True, skip deletion
     disassociate_func: callable to disassociate resource (optional)
     disassociate_key: key for disassociate identifier (optional)
+    title: heading of the live progress table
+    resource_type, context: type and extra fields of the --output result records
     """
-    if not resources:
+    total = len(resources) if isinstance(resources, (list, tuple)) else None
+    seen = 0
+
+    with BulkProgress(title, total=total, action="delete", resource_type=resource_type, context=context) as progress:
+        def delete_one(resource):
+            resource_id = resource[id_key]
+            progress.start(resource_id)
+            try:
+                if disassociate_func and disassociate_key:
+                    # Disassociate all associations except main, if any
+                    for assoc in resource.get("Associations", []):
+                        if not assoc.get("Main", False):
+                            disassociate_func(AssociationId=assoc[disassociate_key])
+                delete_func(**{id_key: resource[id_key]})
+            except Exception as e:
+                progress.failed(resource_id, error_message(e))
+                raise
+            progress.done(resource_id)
+
+        def deletions():
+            nonlocal seen
+            for resource in resources:
+                seen += 1
+                if skip_condition and skip_condition(resource):
+                    progress.skipped(resource[id_key], "skip condition")
+                    continue
+                yield functools.partial(delete_one, resource)
+
+        results = get_core().run_stream(deletions())
+
+    if not seen:
         show_info("No resources found.")
-        return
-
-    for resource in resources:
-        resource_id = resource[id_key]
-
-        if skip_condition and skip_condition(resource):
-            show_info(f"Skipping {resource_id} due to skip condition.")
-            continue
-
-        try:
-            if disassociate_func and disassociate_key:
-                # Disassociate all associations except main, if any
-                for assoc in resource.get("Associations", []):
-                    if not assoc.get("Main", False):
-                        disassociate_func(AssociationId=assoc[disassociate_key])
-            delete_func(**{id_key: resource_id})
-            show_success(f"Deleted {resource_id}")
-        except ClientError as e:
-            show_failure(f"Failed to delete {resource_id}: {e.response['Error']['Message']}")
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, ClientError):
+            raise result
 
 def delete_subnets_in_vpc(ec2, vpc_id):
     show_info("Fetching subnets...")
 
-    subnets = list_resources(ec2, "describe_subnets", "vpc-id", [vpc_id], "Subnets")
-    if not subnets:
-        show_info("No subnets found in the VPC.")
-        return
-
+    # The checkbox needs every subnet as a choice, so this listing finishes before anything is deleted.
     choices = []
     subnet_map = {}
-    for subnet in subnets:
+    for subnet in iter_vpc_resources(ec2, "describe_subnets", "Subnets", vpc_id):
         subnet_id = subnet.get("SubnetId")
         subnet_map[subnet_id] = subnet
         name = None
@@ -153,10 +234,9 @@ def delete_subnets_in_vpc(ec2, vpc_id):
                 break
         label = f"{subnet_id} ({name})" if name else subnet_id
         choices.append(questionary.Choice(title=label, value=subnet_id))
-
-    print("DEBUG: Choices passed to checkbox prompt:")
-    for c in choices:
-        print(f" - {c.title} (value={c.value})")
+    if not choices:
+        show_info("No subnets found in the VPC.")
+        return
 
     selected_ids = questionary.checkbox(
         "Select subnets to delete:",
@@ -167,27 +247,30 @@ def delete_subnets_in_vpc(ec2, vpc_id):
     # Handle None (user cancelled or prompt failed)
     if selected_ids is None or not selected_ids:
         show_info("No subnets selected for deletion.")
-        print("DEBUG: No selection or user cancelled the prompt.")
         return
 
-    show_info(f"User selected {len(selected_ids)} subnet(s) for deletion: {selected_ids}")
+    show_info(f"User selected {len(selected_ids)} subnet(s) for deletion.")
 
-    for subnet_id in selected_ids:
-        try:
-            ec2.delete_subnet(SubnetId=subnet_id)
-            show_success(f"Deleted subnet: {subnet_id}")
-        except Exception as e:
-            show_failure(f"Failed to delete subnet {subnet_id}: {str(e)}")
+    def delete_subnet(SubnetId):
+        ec2.delete_subnet(SubnetId=SubnetId)
+        forget_cidr(SubnetId)
+
+    delete_resources(
+        resources=[subnet_map[subnet_id] for subnet_id in selected_ids],
+        id_key="SubnetId",
+        delete_func=delete_subnet,
+        title="Deleting subnets",
+        resource_type="subnet",
+        context=record_context(ec2, vpc_id),
+    )
 
 
 def delete_route_tables_in_vpc(ec2, vpc_id):
     show_info("Fetching route tables...")
 
-    rtables = list_resources(ec2, "describe_route_tables", "vpc-id", [vpc_id], "RouteTables")
-
     # Filter out main route tables
     non_main_rtables = []
-    for rt in rtables:
+    for rt in iter_vpc_resources(ec2, "describe_route_tables", "RouteTables", vpc_id):
         is_main = any(assoc.get("Main", False) for assoc in rt.get("Associations", []))
         if not is_main:
             non_main_rtables.append(rt)
@@ -217,59 +300,82 @@ def delete_route_tables_in_vpc(ec2, vpc_id):
         show_info("No route tables selected.")
         return
 
-    # Disassociate and delete
-    for rt in selected:
-        # Disassociate associated subnets
-        for assoc in rt.get("Associations", []):
-            assoc_id = assoc.get("RouteTableAssociationId")
-            if assoc_id:
-                try:
-                    ec2.disassociate_route_table(AssociationId=assoc_id)
-                    show_info(f"Disassociated: {assoc_id}")
-                except Exception as e:
-                    show_info(f"Failed to disassociate {assoc_id}: {str(e)}")
-
-        try:
-            ec2.delete_route_table(RouteTableId=rt["RouteTableId"])
-            show_info(f"Deleted: {rt['RouteTableId']}")
-        except Exception as e:
-            show_info(f"Failed to delete {rt['RouteTableId']}: {str(e)}")
+    # Disassociate and delete; each table is independent, so they run concurrently
+    delete_resources(
+        resources=selected,
+        id_key="RouteTableId",
+        delete_func=ec2.delete_route_table,
+        disassociate_func=ec2.disassociate_route_table,
+        disassociate_key="RouteTableAssociationId",
+        title="Deleting route tables",
+        resource_type="route-table",
+        context=record_context(ec2, vpc_id),
+    )
 
 def delete_internet_gateways_in_vpc(ec2, vpc_id):
     show_info("Deleting Internet Gateways...")
-    igws = list_resources(ec2, "describe_internet_gateways", "attachment.vpc-id", [vpc_id], "InternetGateways")
-
-    if not igws:
-        show_info("No internet gateways found.")
-        return
-
-    for igw in igws:
-        igw_id = igw["InternetGatewayId"]
-        try:
-            ec2.detach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
-        except ClientError as e:
-            # Ignore error if not attached
-            if "not attached" not in e.response["Error"]["Message"]:
-                show_failure(f"Failed to detach IGW {igw_id}: {e.response['Error']['Message']}")
-                continue
-
-        try:
-            ec2.delete_internet_gateway(InternetGatewayId=igw_id)
-            show_success(f"Deleted Internet Gateway: {igw_id}")
-        except ClientError as e:
-            show_failure(f"Failed to delete IGW {igw_id}: {e.response['Error']['Message']}")
+    # Each gateway is detached and deleted as soon as its page arrives.
+    delete_resources(
+        resources=iter_vpc_resources(ec2, "describe_internet_gateways", "InternetGateways", vpc_id, "attachment.vpc-id"),
+        id_key="InternetGatewayId",
+        delete_func=lambda InternetGatewayId: delete_internet_gateway(ec2, InternetGatewayId, vpc_id),
+        title="Deleting internet gateways",
+        resource_type="internet-gateway",
+        context=record_context(ec2, vpc_id),
+    )
 
 
 def delete_security_groups_in_vpc(ec2, vpc_id):
     show_info("Deleting Security Groups...")
-    sgs = list_resources(ec2, "describe_security_groups", "vpc-id", [vpc_id], "SecurityGroups")
+    # Listed in full: a group can only be deleted once every rule referring to it is known.
+    sgs = list(iter_vpc_resources(ec2, "describe_security_groups", "SecurityGroups", vpc_id))
 
     def skip_default_sg(sg):
         return sg.get("GroupName") == "default"
 
+    # A group another group's rule refers to can't be deleted until that rule is gone.
+    analyzer = SecurityGroupAnalyzer(sgs)
+    blockers = [
+        rule for sg in sgs if not skip_default_sg(sg)
+        for rule in analyzer.references_to(sg["GroupId"])
+    ]
+    if blockers:
+        show_table(
+            "Security group references blocking deletion",
+            ["Group", "Referenced By", "Direction", "Ports"],
+            [
+                (rule.source, f"{rule.group_id} ({analyzer.name(rule.group_id)})", rule.direction, format_ports(rule))
+                for rule in blockers
+            ],
+        )
+        if confirm_action(f"Revoke these {len(blockers)} referencing rule(s) first?"):
+            revoke_rules(ec2, blockers)
+        else:
+            blocked = sorted({rule.source for rule in blockers})
+            show_warning(f"Skipping referenced group(s): {', '.join(blocked)}")
+            sgs = [sg for sg in sgs if sg["GroupId"] not in blocked]
+
     delete_resources(
         resources=sgs,
         id_key="GroupId",
         delete_func=ec2.delete_security_group,
-        skip_condition=skip_default_sg
+        skip_condition=skip_default_sg,
+        title="Deleting security groups",
+        resource_type="security-group",
+        context=record_context(ec2, vpc_id),
     )
+
+
+def revoke_rules(ec2, rules):
+    """Revoke the given group-reference rules, one call per group and direction, concurrently."""
+    revoke = {"ingress": ec2.revoke_security_group_ingress, "egress": ec2.revoke_security_group_egress}
+    permissions = reference_permissions(rules)
+    calls = [
+        functools.partial(revoke[direction], GroupId=group_id, IpPermissions=perms)
+        for (group_id, direction), perms in permissions.items()
+    ]
+    for (group_id, direction), result in zip(permissions, get_core().run_all(calls)):
+        if isinstance(result, Exception):
+            show_failure(f"Failed to revoke {direction} references in {group_id}: {error_message(result)}")
+        else:
+            show_success(f"Revoked {direction} references in {group_id}")
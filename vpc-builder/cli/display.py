@@ -1,12 +1,42 @@
 # File: cli/display.py
 
-from rich.console import Console
+import threading
+from collections import Counter, OrderedDict
+
+from rich.console import Console, Group
+from rich.live import Live
 from rich.panel import Panel
+from rich.progress_bar import ProgressBar
+from rich.table import Table
 from rich.text import Text
 from rich import box
 
+from cli.output import emit_result
+
 console = Console()
 
+# Redraws per second of a live progress table, however often it is updated.
+REFRESH_PER_SECOND = 8
+# Rows a live progress table shows; older ones scroll off (failures are repeated in the summary).
+MAX_LIVE_ROWS = 15
+
+_quiet = False
+
+
+def enable_quiet():
+    """Suppress info/success panels and live progress; warnings, errors and final summaries still print."""
+    global _quiet
+    _quiet = True
+
+
+def is_quiet():
+    return _quiet
+
+
+def use_stderr():
+    """Send all rich output to stderr, leaving stdout to the --output records."""
+    console.stderr = True
+
 def show_title(title: str):
     banner = Panel.fit(
         f"[bold cyan]{title}[/bold cyan]",
@@ -17,6 +47,8 @@ def show_title(title: str):
     console.print(banner)
 
 def show_success(message: str):
+    if _quiet:
+        return
     panel = Panel(
         Text(f"✅ {message}", style="bold green"),
         title="SUCCESS",
@@ -44,6 +76,8 @@ def show_warning(message: str):
     console.print(panel)
 
 def show_info(message: str):
+    if _quiet:
+        return
     panel = Panel(
         Text(f"ℹ️ {message}", style="bold blue"),
         title="INFO",
@@ -51,3 +85,143 @@ def show_info(message: str):
         box=box.ROUNDED
     )
     console.print(panel)
+
+def show_table(title: str, columns, rows):
+    table = Table(title=title, box=box.ROUNDED, header_style="bold cyan")
+    for column in columns:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*[str(value) for value in row])
+    console.print(table)
+
+def show_tree(tree):
+    console.print(tree)
+
+RUNNING = "running"
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+STATUS_STYLES = {RUNNING: "cyan", OK: "green", FAILED: "bold red", SKIPPED: "yellow"}
+
+
+class BulkProgress:
+    """
+    One live table for an operation over many resources, instead of a panel per message.
+
+    Workers call start() / done() / failed() / skipped() from any thread;
+    those only update counters and rows. The table is redrawn at
+    REFRESH_PER_SECOND from the most recent MAX_LIVE_ROWS rows, so the
+    rendering cost stays the same for 10 or 10,000 resources. On exit a
+    summary with the totals and every failure is printed, which is all that
+    --quiet shows.
+
+    With an action, every finished resource is also emitted as a result
+    record for --output. Resources are IDs of resource_type, or teardown
+    keys like "subnet:subnet-0abc" when resource_type is None; context is
+    added to each record (VPC ID, region...).
+    """
+
+    def __init__(self, title, total=None, summary=True, action=None, resource_type=None, context=None):
+        self.title = title
+        self.total = total
+        self.summary = summary
+        self.action = action
+        self.resource_type = resource_type
+        self.context = context or {}
+        self.counts = Counter()
+        self.failures = OrderedDict()
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self._live = None
+
+    def __enter__(self):
+        if not _quiet:
+            self._live = Live(self, console=console, refresh_per_second=REFRESH_PER_SECOND, transient=True)
+            self._live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._live is not None:
+            self._live.stop()
+        if self.summary:
+            self.print_summary()
+        return False
+
+    def _set(self, resource, status, detail):
+        with self._lock:
+            previous = self._rows.pop(resource, (None, ""))[0]
+            if previous is not None:
+                self.counts[previous] -= 1
+            self._rows[resource] = (status, detail)
+            self.counts[status] += 1
+            if status == FAILED:
+                self.failures[resource] = detail
+            # Finished rows beyond the visible window are only kept as counts (and failures).
+            while len(self._rows) > MAX_LIVE_ROWS:
+                oldest = next((key for key, (st, _) in self._rows.items() if st != RUNNING), None)
+                if oldest is None:
+                    break
+                del self._rows[oldest]
+        if self.action and status != RUNNING:
+            self._emit(resource, status, detail)
+
+    def _emit(self, resource, status, detail):
+        if self.resource_type:
+            resource_type, resource_id = self.resource_type, resource
+        else:
+            resource_type, _, resource_id = resource.partition(":")
+        fields = dict(self.context)
+        if detail and status != FAILED:
+            fields["detail"] = detail
+        emit_result(self.action, resource_type, resource_id or None, status,
+                    detail if status == FAILED else None, **fields)
+
+    def start(self, resource, detail=""):
+        self._set(resource, RUNNING, detail)
+
+    def done(self, resource, detail=""):
+        self._set(resource, OK, detail)
+
+    def failed(self, resource, detail=""):
+        self._set(resource, FAILED, detail)
+
+    def skipped(self, resource, detail=""):
+        self._set(resource, SKIPPED, detail)
+
+    def _counters(self):
+        finished = self.counts[OK] + self.counts[FAILED] + self.counts[SKIPPED]
+        total = f"/{self.total}" if self.total else ""
+        return (
+            f"{finished}{total} done · [green]{self.counts[OK]} ok[/green] · [red]{self.counts[FAILED]} failed[/red]"
+            f" · [yellow]{self.counts[SKIPPED]} skipped[/yellow] · [cyan]{self.counts[RUNNING]} running[/cyan]"
+        ), finished
+
+    def __rich__(self):
+        with self._lock:
+            rows = list(self._rows.items())[-MAX_LIVE_ROWS:]
+            counters, finished = self._counters()
+        table = Table(title=self.title, box=box.SIMPLE, header_style="bold cyan", caption=counters)
+        table.add_column("Resource")
+        table.add_column("Status")
+        table.add_column("Detail")
+        for resource, (status, detail) in rows:
+            table.add_row(resource, Text(status, style=STATUS_STYLES[status]), detail)
+        if not self.total:
+            return table
+        return Group(ProgressBar(total=self.total, completed=finished), table)
+
+    def print_summary(self):
+        if not self.counts:
+            return
+        with self._lock:
+            counters, _ = self._counters()
+            failures = list(self.failures.items())
+        console.print(f"[bold]{self.title}:[/bold] {counters}")
+        if failures:
+            table = Table(title="Failures", box=box.ROUNDED, header_style="bold red")
+            table.add_column("Resource")
+            table.add_column("Error")
+            for resource, detail in failures:
+                table.add_row(resource, detail)
+            console.print(table)
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Upper bound on concurrent AWS calls made by the parallel flows.
+MAX_WORKERS = int(os.environ.get("VPC_BUILDER_MAX_WORKERS", "10"))
+
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class TaskResult:
+    def __init__(self, status, value=None, error=None):
+        self.status = status
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        return f"TaskResult({self.status!r}, value={self.value!r}, error={self.error!r})"
+
+
+class TaskGraph:
+    """
+    A DAG of callables run on a bounded thread pool.
+
+    Each task starts as soon as all of its dependencies have succeeded, so
+    independent work runs concurrently and slow tasks only hold up the tasks
+    that depend on them. When a task fails, everything downstream of it is
+    skipped instead of being attempted against a half-torn-down state.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._deps = {}
+
+    def __contains__(self, key):
+        return key in self._tasks
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add(self, key, func, deps=()):
+        if key in self._tasks:
+            raise ValueError(f"Duplicate task: {key}")
+        self._tasks[key] = func
+        self._deps[key] = set(deps)
+        return key
+
+    def dependencies(self, key):
+        return set(self._deps[key])
+
+    def keys(self):
+        return list(self._tasks)
+
+    def run(self, max_workers=MAX_WORKERS, on_done=None):
+        """Run every task and return a dict of key -> TaskResult. on_done(key, result) is called as tasks finish."""
+        for key, deps in self._deps.items():
+            missing = deps - self._tasks.keys()
+            if missing:
+                raise ValueError(f"Task {key} depends on unknown tasks: {sorted(missing)}")
+
+        dependents = {key: [] for key in self._tasks}
+        waiting_on = {}
+        for key, deps in self._deps.items():
+            waiting_on[key] = len(deps)
+            for dep in deps:
+                dependents[dep].append(key)
+
+        results = {}
+
+        def finish(key, result):
+            results[key] = result
+            if on_done:
+                on_done(key, result)
+
+        def skip_downstream(key):
+            stack = list(dependents[key])
+            while stack:
+                child = stack.pop()
+                if child in results:
+                    continue
+                finish(child, TaskResult(SKIPPED, error=f"dependency {key} did not complete"))
+                stack.extend(dependents[child])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+
+            def submit_ready(keys):
+                for key in keys:
+                    if waiting_on[key] == 0 and key not in results:
+                        running[pool.submit(self._tasks[key])] = key
+
+            submit_ready(self._tasks)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    try:
+                        finish(key, TaskResult(OK, value=future.result()))
+                    except Exception as e:
+                        finish(key, TaskResult(FAILED, error=e))
+                        skip_downstream(key)
+                        continue
+                    for child in dependents[key]:
+                        waiting_on[child] -= 1
+                    submit_ready(dependents[key])
+
+        for key in self._tasks:
+            if key not in results:
+                finish(key, TaskResult(SKIPPED, error="dependency cycle"))
+        return results
@@ -0,0 +1,102 @@
+import getpass
+import json
+import os
+from datetime import datetime, timezone
+
+
+def _default_owner():
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "unknown"
+
+
+# Where the tool keeps state between runs (CIDR index, inventory snapshots, ...).
+STATE_DIR = os.environ.get("VPC_BUILDER_HOME") or os.path.join(os.path.expanduser("~"), ".vpc-builder")
+
+
+# Tags applied to every resource the tool creates, on top of Name and any per-resource tags.
+DEFAULT_TAGS = {
+    "owner": os.environ.get("VPC_BUILDER_OWNER") or _default_owner(),
+    "environment": os.environ.get("VPC_BUILDER_ENVIRONMENT", "dev"),
+    "created-by": "vpc-builder",
+}
+
+# Set on every resource the tool creates, so cleanups can select by age (describe_vpcs has no creation time).
+CREATED_AT_TAG = "created-at"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Resources requested per describe page (MaxResults) by iter_resources; EC2 accepts 5 to 1000.
+PAGE_SIZE = int(os.environ.get("VPC_BUILDER_PAGE_SIZE", "100"))
+
+
+def get_name_tag(resource, default=""):
+    """Return the value of the resource's Name tag, or default if it has none."""
+    return next((t["Value"] for t in resource.get("Tags", []) if t["Key"] == "Name"), default)
+
+
+def format_age(seconds):
+    """42 -> '42s', 300 -> '5m', 7200 -> '2h', 172800 -> '2d'."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def error_message(error):
+    """Human-readable message for a ClientError or any other exception."""
+    if hasattr(error, "response"):
+        return error.response.get("Error", {}).get("Message", str(error))
+    return str(error)
+
+
+def paginate(ec2, operation, result_key, page_size=None, **kwargs):
+    """
+    Yield every item under result_key, following pagination when the
+    operation supports it. page_size sets MaxResults for each request.
+    """
+    if ec2.can_paginate(operation):
+        if page_size:
+            kwargs["PaginationConfig"] = {"PageSize": page_size}
+        for page in ec2.get_paginator(operation).paginate(**kwargs):
+            yield from page.get(result_key, [])
+    else:
+        yield from getattr(ec2, operation)(**kwargs).get(result_key, [])
+
+
+def iter_resources(ec2, operation, result_key, filters=None, page_size=PAGE_SIZE):
+    """
+    Lazily yield the resources matching filters ({filter name: values}),
+    which are applied by the describe call itself. Pages of page_size are
+    fetched only as the consumer gets to them, so it can act on the first
+    page while the rest are still to come. Callers that prefetch must use
+    the same arguments to share the cached pages.
+    """
+    kwargs = {}
+    if filters:
+        kwargs["Filters"] = [{"Name": name, "Values": list(values)} for name, values in filters.items()]
+    return paginate(ec2, operation, result_key, page_size=page_size, **kwargs)
+
+
+def iter_vpc_resources(ec2, operation, result_key, vpc_id, filter_name="vpc-id"):
+    """iter_resources for one VPC's resources of a type."""
+    return iter_resources(ec2, operation, result_key, {filter_name: [vpc_id]})
+
+
+def tag_specifications(resource_type, name=None, extra=None):
+    """Build the TagSpecifications argument so a resource is tagged atomically when it is created."""
+    tags = dict(DEFAULT_TAGS)
+    tags[CREATED_AT_TAG] = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    if name:
+        tags["Name"] = name
+    tags.update(extra or {})
+    return [{"ResourceType": resource_type, "Tags": [{"Key": k, "Value": v} for k, v in tags.items()]}]
+
+
+def save_json(path, data):
+    """Write JSON atomically, creating the parent directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,206 @@
+import ipaddress
+import re
+import threading
+import time
+
+from cli.cache import CachingEC2Client
+from cli.helpers import get_name_tag
+
+# Seconds before a loaded inventory is considered stale and re-fetched.
+INVENTORY_TTL = 300
+
+VPC_ID_PATTERN = re.compile(r"^vpc-(?:[0-9a-f]{8}|[0-9a-f]{17})$")
+
+
+def looks_like_vpc_id(vpc_input):
+    """Classify user input locally: 'vpc-' plus 8 or 17 hex digits is an ID, anything else a Name tag."""
+    return bool(VPC_ID_PATTERN.match(vpc_input.strip()))
+
+
+def looks_like_cidr(vpc_input):
+    try:
+        ipaddress.ip_network(vpc_input.strip(), strict=False)
+    except ValueError:
+        return False
+    return "/" in vpc_input
+
+
+class VpcInventory:
+    """
+    Paginated, in-memory index of the VPCs visible to one EC2 client.
+
+    Every VPC picker reads from here instead of calling describe_vpcs itself.
+    The index is loaded on first use and only re-fetched once it is older than
+    the TTL or refresh() / invalidate() is called explicitly.
+
+    With an InventorySnapshot, the first load is served from disk at once
+    (snapshot_age says how old it is) while a background thread refreshes
+    the whole region's snapshot and swaps the fresh VPCs in.
+    """
+
+    def __init__(self, ec2, ttl=INVENTORY_TTL, snapshot=None):
+        self.ec2 = ec2
+        self.ttl = ttl
+        self.snapshot = snapshot
+        # Seconds old the snapshot was when it was loaded; None once live data is in.
+        self.snapshot_age = None
+        self._by_id = {}
+        self._by_name = {}
+        self._loaded_at = None
+        self._generation = 0
+        self._account = None
+        self._snapshot_tried = False
+        self._sync_thread = None
+        self._lock = threading.Lock()
+
+    def refresh(self, on_vpc=None):
+        """Re-list every VPC; on_vpc, if given, is called with each one as soon as its page arrives."""
+        if isinstance(self.ec2, CachingEC2Client):
+            self.ec2.invalidate("describe_vpcs")
+
+        vpcs = []
+        paginator = self.ec2.get_paginator("describe_vpcs")
+        for page in paginator.paginate():
+            for vpc in page.get("Vpcs", []):
+                vpcs.append(vpc)
+                if on_vpc:
+                    on_vpc(vpc)
+        self._load(vpcs)
+
+        key = self._snapshot_region()
+        if key:
+            self.snapshot.reconcile(*key, "vpc", vpcs)
+
+    def _load(self, vpcs, generation=None):
+        by_id = {}
+        by_name = {}
+        for vpc in vpcs:
+            record = {
+                "VpcId": vpc["VpcId"],
+                "Name": get_name_tag(vpc),
+                "CidrBlock": vpc.get("CidrBlock"),
+                "IsDefault": vpc.get("IsDefault", False),
+            }
+            by_id[record["VpcId"]] = record
+            if record["Name"]:
+                by_name.setdefault(record["Name"], []).append(record["VpcId"])
+
+        with self._lock:
+            # A mutation invalidated the inventory while these rows were being fetched.
+            if generation is not None and generation != self._generation:
+                return False
+            self._by_id = by_id
+            self._by_name = by_name
+            self._loaded_at = time.monotonic()
+            self.snapshot_age = None
+            return True
+
+    def _snapshot_region(self):
+        """(account, region) the snapshot is keyed by, or None when there is no usable snapshot."""
+        if self.snapshot is None:
+            return None
+        if self._account is None:
+            from cli.preflight import current_account
+
+            self._account = current_account(self.ec2.meta.region_name)
+        if not self._account:
+            return None
+        return self._account, self.ec2.meta.region_name
+
+    def _load_snapshot(self):
+        """Serve the first load from disk if the snapshot has this account and region. Tried once."""
+        if self._snapshot_tried or not self._snapshot_region():
+            return False
+        self._snapshot_tried = True
+        account, region = self._snapshot_region()
+        age = self.snapshot.age(account, region, "vpc")
+        if age is None:
+            return False
+        self._load(self.snapshot.resources(account, region, "vpc"))
+        self.snapshot_age = age
+        self._start_sync()
+        return True
+
+    def _start_sync(self):
+        with self._lock:
+            if self._sync_thread is not None:
+                return
+            self._sync_thread = threading.Thread(target=self._sync, name="vpc-builder-snapshot", daemon=True)
+            thread = self._sync_thread
+        thread.start()
+
+    def _sync(self):
+        from cli.snapshot import sync_snapshot
+
+        try:
+            account, region = self._snapshot_region()
+            with self._lock:
+                generation = self._generation
+            results = sync_snapshot(self.ec2, self.snapshot, account, region)
+            if not isinstance(results["vpc"], Exception):
+                self._load(self.snapshot.resources(account, region, "vpc"), generation)
+        finally:
+            # Later refreshes (e.g. once the TTL has passed) may run again.
+            with self._lock:
+                self._sync_thread = None
+
+    def wait_for_sync(self, timeout=None):
+        """Block until the background snapshot refresh (if any) has finished."""
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None and self._load_snapshot():
+            return
+        if not self.is_stale():
+            return
+        if self._loaded_at is not None and self._snapshot_region():
+            # Past the TTL (not invalidated): keep serving these VPCs while the snapshot refreshes.
+            self._start_sync()
+        else:
+            self.refresh()
+
+    def vpcs(self):
+        """Return (vpc_id, name) tuples for every VPC in the inventory."""
+        self._ensure_loaded()
+        return [(vpc_id, record["Name"]) for vpc_id, record in self._by_id.items()]
+
+    def get(self, vpc_id):
+        self._ensure_loaded()
+        return self._by_id.get(vpc_id)
+
+    def ids_for_name(self, name):
+        self._ensure_loaded()
+        return list(self._by_name.get(name, []))
+
+    def ids_for_cidr(self, cidr):
+        """VPC IDs whose primary CIDR is cidr, from the snapshot's CIDR index when there is one."""
+        self._ensure_loaded()
+        key = self._snapshot_region()
+        if key:
+            return [vpc["VpcId"] for vpc in self.snapshot.find_by_cidr(*key, cidr) if vpc["VpcId"] in self._by_id]
+        cidr = str(ipaddress.ip_network(cidr, strict=False))
+        return [vpc_id for vpc_id, record in self._by_id.items() if record["CidrBlock"] == cidr]
+
+    def find(self, vpc_input):
+        """Look a VPC up by ID when the input is shaped like one, by CIDR when it is a CIDR, otherwise by Name tag."""
+        vpc_input = vpc_input.strip()
+        if looks_like_vpc_id(vpc_input):
+            record = self.get(vpc_input)
+            if record:
+                return record
+        if looks_like_cidr(vpc_input):
+            ids = self.ids_for_cidr(vpc_input)
+            if ids:
+                return self._by_id.get(ids[0])
+        ids = self.ids_for_name(vpc_input)
+        return self._by_id.get(ids[0]) if ids else None
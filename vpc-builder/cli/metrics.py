@@ -0,0 +1,239 @@
+import contextlib
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from cli.helpers import save_json
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+THROTTLE_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "RequestLimitExceeded", "TooManyRequestsException", "SlowDown", "RequestThrottled",
+}
+
+DEFAULT_TRACE_PATH = "vpc-builder-trace.json"
+
+NO_FLOW = "-"
+
+
+class OperationStats:
+    def __init__(self):
+        self.durations_ms = []
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.wait_ms = 0.0
+
+    def record(self, duration_ms, error=False, retries=0, wait_ms=0.0):
+        self.durations_ms.append(duration_ms)
+        self.histogram[_bucket(duration_ms)] += 1
+        self.errors += bool(error)
+        self.retries += retries
+        self.wait_ms += wait_ms
+
+    def to_dict(self):
+        durations = sorted(self.durations_ms)
+        return {
+            "calls": len(durations),
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": _percentile(durations, 95),
+            "max_ms": round(durations[-1], 2) if durations else 0.0,
+            "total_ms": round(sum(durations), 2),
+            "wait_ms": round(self.wait_ms, 2),
+            "histogram": dict(zip([f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["inf"], self.histogram)),
+        }
+
+
+def _bucket(duration_ms):
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return round(sorted_values[0], 2)
+    return round(statistics.quantiles(sorted_values, n=100, method="inclusive")[pct - 1], 2)
+
+
+class ApiMetrics:
+    """
+    Per-operation API metrics collected through botocore event hooks.
+
+    attach() registers before-call / after-call / needs-retry handlers on a
+    client; every call becomes a span tagged with the flow that was running
+    (see flow()), and is aggregated per (flow, operation) into a count,
+    latency histogram, retries and throttles. Time spent in before-send
+    handlers (the rate limiter's token wait) is reported as wait_ms and left
+    out of the latency. The CLI runs one flow at a time, but its calls fan
+    out to worker threads, so the current flow is process-wide rather than
+    thread-local.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(OperationStats)
+        self.spans = []
+        self.current_flow = NO_FLOW
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        # A call's attempts are sent from the thread that made it, so its wait is tracked per thread.
+        self._local = threading.local()
+
+    def attach(self, client):
+        events = client.meta.events
+        # First, so the start time is taken even when a later handler short-circuits the call.
+        events.register_first("before-call", self._before_call)
+        events.register("after-call", self._after_call)
+        events.register("after-call-error", self._after_call_error)
+        events.register("needs-retry", self._needs_retry)
+        # First and last among the service's before-send handlers, so the rate limiter's wait
+        # before each attempt is measured.
+        before_send = f"before-send.{client.meta.service_model.service_id.hyphenize()}"
+        events.register_first(before_send, self._before_send)
+        events.register_last(before_send, self._after_before_send)
+        return client
+
+    @contextlib.contextmanager
+    def flow(self, name):
+        previous, self.current_flow = self.current_flow, name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._span(name, "flow", start, time.perf_counter(), {})
+            self.current_flow = previous
+
+    def _before_call(self, context=None, **kwargs):
+        if context is not None:
+            context["metrics_start"] = time.perf_counter()
+            context["metrics_flow"] = self.current_flow
+        self._local.wait = 0.0
+
+    def _before_send(self, **kwargs):
+        self._local.send_start = time.perf_counter()
+
+    def _after_before_send(self, **kwargs):
+        start = getattr(self._local, "send_start", None)
+        if start is not None:
+            self._local.wait = getattr(self._local, "wait", 0.0) + time.perf_counter() - start
+            self._local.send_start = None
+
+    def _after_call(self, model, parsed=None, context=None, **kwargs):
+        parsed = parsed or {}
+        self._record(
+            model.name, context,
+            parsed.get("Error", {}).get("Code"),
+            parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0),
+        )
+
+    def _after_call_error(self, event_name, exception=None, context=None, **kwargs):
+        # Raised before a response was parsed (e.g. connection errors); after-call never fires for these.
+        self._record(event_name.rsplit(".", 1)[-1], context, type(exception).__name__, 0)
+
+    def _record(self, operation, context, error, retries):
+        end = time.perf_counter()
+        context = context or {}
+        start = context.get("metrics_start", end)
+        flow = context.get("metrics_flow", self.current_flow)
+        wait, self._local.wait = getattr(self._local, "wait", 0.0), 0.0
+        with self._lock:
+            self.stats[(flow, operation)].record((end - start - wait) * 1000, bool(error), retries, wait * 1000)
+        args = {"flow": flow, "retries": retries, "wait_ms": round(wait * 1000, 2)}
+        if error:
+            args["error"] = error
+        self._span(operation, flow, start, end, args)
+
+    def _needs_retry(self, response=None, operation=None, **kwargs):
+        # Observe only: returning None leaves the retry decision to botocore.
+        if response is None or operation is None:
+            return None
+        code = (response[1] or {}).get("Error", {}).get("Code")
+        if code in THROTTLE_CODES:
+            with self._lock:
+                self.stats[(self.current_flow, operation.name)].throttles += 1
+        return None
+
+    def _span(self, name, category, start, end, args):
+        span = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """Aggregated stats as {flow: {operation: stats}}, slowest operations first."""
+        with self._lock:
+            items = [(flow, op, stats.to_dict()) for (flow, op), stats in self.stats.items()]
+        result = {}
+        for flow, op, stats in sorted(items, key=lambda item: (item[0], -item[2]["total_ms"])):
+            result.setdefault(flow, {})[op] = stats
+        return result
+
+    def chrome_trace(self):
+        with self._lock:
+            return {"traceEvents": list(self.spans), "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path=DEFAULT_TRACE_PATH):
+        """Write the spans in Chrome trace format (open in chrome://tracing or ui.perfetto.dev)."""
+        save_json(os.path.abspath(path), self.chrome_trace())
+        return path
+
+    def render(self):
+        from cli.display import show_table
+
+        rows = [
+            (flow, op, s["calls"], s["errors"], s["retries"], s["throttles"], s["p50_ms"], s["p95_ms"], s["max_ms"], s["total_ms"], s["wait_ms"])
+            for flow, ops in self.summary().items()
+            for op, s in ops.items()
+        ]
+        show_table(
+            "AWS API calls",
+            ["Flow", "Operation", "Calls", "Errors", "Retries", "Throttles", "p50 ms", "p95 ms", "Max ms", "Total ms", "Wait ms"],
+            rows,
+        )
+
+
+_metrics = None
+
+
+def enable_metrics():
+    """Start collecting metrics; clients built after this are instrumented."""
+    global _metrics
+    if _metrics is None:
+        _metrics = ApiMetrics()
+    return _metrics
+
+
+def get_metrics():
+    """The active ApiMetrics, or None when --profile is off."""
+    return _metrics
+
+
+def instrument(client):
+    """Attach the active metrics to a freshly built client; clients are left alone when metrics are off."""
+    if _metrics is not None:
+        _metrics.attach(client)
+    return client
+
+
+def track_flow(name):
+    """Tag API calls made inside the block with a flow name; a no-op when metrics are off."""
+    return _metrics.flow(name) if _metrics is not None else contextlib.nullcontext()
@@ -1,10 +1,20 @@
+import functools
+import ipaddress
+
 import questionary
 from botocore.exceptions import ClientError
-from cli.display import show_info, show_success, show_failure
+from cli.display import show_info, show_success, show_failure, show_table, show_warning
 from cli.prompts import confirm_action
-from cli.access import list_accessible_vpcs
+from cli.access import list_accessible_vpcs, vpc_picker_message, vpc_search_values
+from cli.async_core import prefetch
+from cli.output import stream_resources
+from cli.picker import choice_label, pick, resource_values
 from cli.aws_client import AWSClient
+from cli.helpers import get_name_tag, iter_vpc_resources
 from cli.create import create_subnet_flow
+from cli.routes import RouteResolver
+from cli.security_groups import SecurityGroupAnalyzer, format_ports
+from cli.topology import route_target
 
 
 def run_modify_flow():
@@ -13,7 +23,7 @@ def run_modify_flow():
 
     resource = questionary.select(
         "Select a resource to modify:",
-        choices=["Subnet", "Route Table", "Attach IGW to Route Table"]
+        choices=["Subnet", "Route Table", "Attach IGW to Route Table", "Trace Routes from Subnet", "Audit Security Groups"]
     ).ask()
 
     if resource == "Subnet":
@@ -22,6 +32,10 @@ def run_modify_flow():
         modify_route_table(ec2)
     elif resource == "Attach IGW to Route Table":
         attach_igw_to_route_table(ec2)
+    elif resource == "Trace Routes from Subnet":
+        trace_routes(ec2)
+    elif resource == "Audit Security Groups":
+        audit_security_groups(ec2)
     else:
         show_failure("Invalid selection.")
 
@@ -115,6 +129,8 @@ def modify_route_table(ec2):
         if choice == "Add Route":
             cidr = questionary.text("Destination CIDR:").ask()
             target = questionary.text("Target (e.g. igw-xxx):").ask()
+            if not check_route(ec2, vpc_id, rt_id, cidr, target):
+                return
             ec2.create_route(RouteTableId=rt_id, DestinationCidrBlock=cidr, GatewayId=target)
             show_success("Route added.")
         elif choice == "Delete Route":
@@ -143,6 +159,9 @@ def attach_igw_to_route_table(ec2):
     if not rt_id or not igw_id:
         return
 
+    if not check_route(ec2, vpc_id, rt_id, "0.0.0.0/0", igw_id):
+        return
+
     try:
         ec2.create_route(RouteTableId=rt_id, DestinationCidrBlock="0.0.0.0/0", GatewayId=igw_id)
         show_success("IGW attached successfully.")
@@ -150,86 +169,183 @@ def attach_igw_to_route_table(ec2):
         show_failure(f"Attach IGW failed: {e.response['Error']['Message']}")
 
 
+# ---------- ROUTE RESOLUTION ----------
+def check_route(ec2, vpc_id, rt_id, cidr, target):
+    """Warn about duplicate, shadowed or blackholed routes before create_route. Returns whether to go ahead."""
+    try:
+        ipaddress.ip_network(cidr, strict=False)
+    except (TypeError, ValueError):
+        show_failure(f"Invalid destination CIDR: {cidr}")
+        return False
+    try:
+        problems = RouteResolver.for_vpc(ec2, vpc_id).check_new_route(rt_id, cidr, target)
+    except ClientError as e:
+        show_warning(f"Could not check existing routes: {e.response['Error']['Message']}")
+        return True
+    if not problems:
+        return True
+    for problem in problems:
+        show_warning(problem)
+    return confirm_action("Create the route anyway?")
+
+
+def trace_routes(ec2):
+    show_info("Trace Routes from Subnet")
+    vpc_id = select_vpc(ec2)
+    if not vpc_id:
+        return
+    subnet_id = choose_subnet(ec2, vpc_id)
+    if not subnet_id:
+        return
+
+    answer = questionary.text("Destination IPs (space or comma separated):").ask() or ""
+    destinations = answer.replace(",", " ").split()
+    try:
+        resolver = RouteResolver.for_vpc(ec2, vpc_id)
+        matches = resolver.resolve_many(subnet_id, destinations)
+    except ValueError as e:
+        show_failure(str(e))
+        return
+    except KeyError:
+        show_failure(f"No route table applies to {subnet_id}.")
+        return
+    except ClientError as e:
+        show_failure(f"Route lookup failed: {e.response['Error']['Message']}")
+        return
+
+    rows = []
+    for destination in destinations:
+        route = matches[destination]
+        if route is None:
+            rows.append((destination, "-", "no route (dropped)", "-"))
+        else:
+            dest = route.get("DestinationCidrBlock") or route.get("DestinationIpv6CidrBlock")
+            rows.append((destination, dest, route_target(route), route.get("State", "active")))
+    show_table(
+        f"Routes from {subnet_id} via {resolver.table_for_subnet(subnet_id)}",
+        ["Destination", "Matched Route", "Target", "State"],
+        rows,
+    )
+
+
+# ---------- SECURITY GROUP AUDIT ----------
+def audit_security_groups(ec2):
+    show_info("Audit Security Groups")
+    vpc_id = select_vpc(ec2)
+    if not vpc_id:
+        return
+
+    try:
+        analyzer = SecurityGroupAnalyzer.for_vpc(ec2, vpc_id)
+    except ClientError as e:
+        show_failure(f"List security groups failed: {e.response['Error']['Message']}")
+        return
+    show_info(f"Loaded {len(analyzer.rules)} rule(s) in {len(analyzer.groups)} group(s).")
+
+    choice = questionary.select(
+        "Select audit:",
+        choices=["Exposure Report", "Who Allows a Port", "Redundant Rules", "Unreferenced Groups"]
+    ).ask()
+
+    def group(group_id):
+        name = analyzer.name(group_id)
+        return f"{group_id} ({name})" if name else group_id
+
+    if choice == "Exposure Report":
+        show_table(
+            "Ingress open to the internet",
+            ["Group", "Ports", "Source", "Sensitive"],
+            [(group(r.group_id), format_ports(r), r.source, ", ".join(services) or "-")
+             for r, services in analyzer.exposure_report()],
+        )
+    elif choice == "Who Allows a Port":
+        port = questionary.text("Port:").ask() or ""
+        protocol = questionary.select("Protocol:", choices=["tcp", "udp"]).ask()
+        source = questionary.text("Source IP or CIDR (blank for any):").ask() or None
+        try:
+            rules = analyzer.allowing(int(port), protocol, source)
+        except ValueError:
+            show_failure("Invalid port or source.")
+            return
+        show_table(
+            f"Ingress allowing {protocol} {port}",
+            ["Group", "Ports", "Source", "Description"],
+            [(group(r.group_id), format_ports(r), r.source, r.description) for r in rules],
+        )
+    elif choice == "Redundant Rules":
+        show_table(
+            "Rules already covered by another rule",
+            ["Group", "Direction", "Rule", "Covered By"],
+            [(group(r.group_id), r.direction, f"{format_ports(r)} {r.source}", f"{format_ports(c)} {c.source}")
+             for r, c in analyzer.redundant_rules()],
+        )
+    elif choice == "Unreferenced Groups":
+        show_table(
+            "Groups no other group references",
+            ["Group"],
+            [(group(group_id),) for group_id in analyzer.unreferenced_groups()],
+        )
+
+
 # ---------- HELPERS ----------
 def select_vpc(ec2):
     vpcs = list_accessible_vpcs(ec2)
     if not vpcs:
         show_failure("No VPCs found.")
         return None
-    choices = [
-        questionary.Choice(title=f"{vpc_id} ({name})" if name else vpc_id, value=vpc_id)
-        for vpc_id, name in vpcs
-    ]
-    return questionary.select("Select VPC:", choices=choices).ask()
-
-
-def choose_subnet(ec2, vpc_id):
-    subnets = list_subnets(ec2, vpc_id)
-    if not subnets:
-        show_failure("No subnets found.")
-        return None
-    choices = [
-        questionary.Choice(title=f"{subnet_id} ({name})" if name else subnet_id, value=subnet_id)
-        for subnet_id, name in subnets
-    ]
-    return questionary.select("Select Subnet:", choices=choices).ask()
+    choices = [(vpc_id, choice_label(vpc_id, name)) for vpc_id, name in vpcs]
+    vpc_id = pick(vpc_picker_message(ec2, "Select VPC:"), choices, vpc_search_values(ec2))
+    if vpc_id:
+        prefetch_vpc_resources(ec2, vpc_id)
+    return vpc_id
 
 
-def choose_route_table(ec2, vpc_id):
-    rtables = list_route_tables(ec2, vpc_id)
-    if not rtables:
-        show_failure("No route tables found.")
-        return None
-    choices = [
-        questionary.Choice(title=f"{rt_id} ({name})" if name else rt_id, value=rt_id)
-        for rt_id, name in rtables
-    ]
-    return questionary.select("Select Route Table:", choices=choices).ask()
+def prefetch_vpc_resources(ec2, vpc_id):
+    """Load the VPC's subnets, route tables and IGWs into the describe cache while the next prompt is open."""
+    return prefetch(*(
+        # Same arguments as list_vpc_resources, so both hit the same cached pages.
+        functools.partial(list, iter_vpc_resources(ec2, operation, result_key, vpc_id, filter_name))
+        for operation, result_key, _, filter_name, _ in VPC_RESOURCE_KINDS.values()
+    ))
 
 
-def choose_igw(ec2, vpc_id):
-    igws = list_internet_gateways(ec2, vpc_id)
-    if not igws:
-        show_failure("No IGWs found.")
-        return None
-    choices = [
-        questionary.Choice(title=f"{igw_id} ({name})" if name else igw_id, value=igw_id)
-        for igw_id, name in igws
-    ]
-    return questionary.select("Select IGW:", choices=choices).ask()
+# kind -> (describe operation, result key, ID key, VPC filter, --output resource type)
+VPC_RESOURCE_KINDS = {
+    "subnets": ("describe_subnets", "Subnets", "SubnetId", "vpc-id", "subnet"),
+    "route tables": ("describe_route_tables", "RouteTables", "RouteTableId", "vpc-id", "route-table"),
+    "IGWs": ("describe_internet_gateways", "InternetGateways", "InternetGatewayId", "attachment.vpc-id", "internet-gateway"),
+}
 
 
-def list_subnets(ec2, vpc_id):
+def list_vpc_resources(ec2, vpc_id, kind):
+    """Every resource of a kind in the VPC, each emitted for --output as its page arrives. [] on error."""
+    operation, result_key, id_key, filter_name, resource_type = VPC_RESOURCE_KINDS[kind]
     try:
-        subnets = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])['Subnets']
-        return [
-            (s['SubnetId'], next((t['Value'] for t in s.get('Tags', []) if t['Key'] == 'Name'), ''))
-            for s in subnets
-        ]
+        resources = iter_vpc_resources(ec2, operation, result_key, vpc_id, filter_name)
+        return list(stream_resources(resource_type, resources, id_key, ec2.meta.region_name))
     except ClientError as e:
-        show_failure(f"List subnets failed: {e.response['Error']['Message']}")
+        show_failure(f"List {kind} failed: {e.response['Error']['Message']}")
         return []
 
 
-def list_route_tables(ec2, vpc_id):
-    try:
-        rtables = ec2.describe_route_tables(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])['RouteTables']
-        return [
-            (rt['RouteTableId'], next((t['Value'] for t in rt.get('Tags', []) if t['Key'] == 'Name'), ''))
-            for rt in rtables
-        ]
-    except ClientError as e:
-        show_failure(f"List route tables failed: {e.response['Error']['Message']}")
-        return []
+def choose_vpc_resource(ec2, vpc_id, kind, message):
+    """Pick one resource of a kind in the VPC, searchable by ID, name, CIDR and tags; returns its ID."""
+    id_key = VPC_RESOURCE_KINDS[kind][2]
+    resources = {r[id_key]: r for r in list_vpc_resources(ec2, vpc_id, kind)}
+    if not resources:
+        show_failure(f"No {kind} found.")
+        return None
+    choices = [(resource_id, choice_label(resource_id, get_name_tag(r))) for resource_id, r in resources.items()]
+    return pick(message, choices, lambda resource_id: resource_values(resources[resource_id]))
 
 
-def list_internet_gateways(ec2, vpc_id):
-    try:
-        igws = ec2.describe_internet_gateways(Filters=[{"Name": "attachment.vpc-id", "Values": [vpc_id]}])['InternetGateways']
-        return [
-            (igw['InternetGatewayId'], next((t['Value'] for t in igw.get('Tags', []) if t['Key'] == 'Name'), ''))
-            for igw in igws
-        ]
-    except ClientError as e:
-        show_failure(f"List IGWs failed: {e.response['Error']['Message']}")
-        return []
+def choose_subnet(ec2, vpc_id):
+    return choose_vpc_resource(ec2, vpc_id, "subnets", "Select Subnet:")
+
+
+def choose_route_table(ec2, vpc_id):
+    return choose_vpc_resource(ec2, vpc_id, "route tables", "Select Route Table:")
+
+
+def choose_igw(ec2, vpc_id):
+    return choose_vpc_resource(ec2, vpc_id, "IGWs", "Select IGW:")
@@ -0,0 +1,115 @@
+import functools
+import json
+import sys
+import threading
+
+from cli.helpers import error_message, get_name_tag
+
+OUTPUT_FORMATS = ("text", "ndjson", "json")
+
+OK = "ok"
+FAILED = "failed"
+
+
+class RecordWriter:
+    """
+    Writes records to stdout as they are produced: one JSON object per line
+    (ndjson), or the elements of a single JSON array (json). Nothing is
+    buffered, so a consumer can act on the first record while later pages
+    are still being fetched.
+    """
+
+    def __init__(self, fmt, stream=None):
+        self.fmt = fmt
+        self._stream = stream
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stream(self):
+        return self._stream or sys.stdout
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if self.fmt == "json":
+                line = ("[\n" if self._count == 0 else ",\n") + line
+            else:
+                line += "\n"
+            self._count += 1
+            self.stream.write(line)
+            self.stream.flush()
+
+    def close(self):
+        with self._lock:
+            if self.fmt == "json":
+                self.stream.write("\n]\n" if self._count else "[]\n")
+                self.stream.flush()
+
+
+_writer = None
+
+
+def enable_output(fmt, stream=None):
+    """Stream records in fmt ('ndjson' or 'json'); 'text' leaves the rich output alone."""
+    global _writer
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    _writer = RecordWriter(fmt, stream) if fmt != "text" else None
+
+
+def machine_output():
+    return _writer is not None
+
+
+def close_output():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def emit(record_type, **fields):
+    if _writer is not None:
+        _writer.write({"type": record_type, **fields})
+
+
+def emit_resource(resource_type, resource, id_key, region=None, name=None):
+    """One record per listed resource, carrying the full describe output."""
+    if _writer is not None:
+        emit("resource", resource_type=resource_type, id=resource.get(id_key),
+             name=get_name_tag(resource) if name is None else name, region=region, data=resource)
+
+
+def emit_result(action, resource_type, resource_id, status, error=None, **fields):
+    """One record per create/delete outcome."""
+    if _writer is not None:
+        emit("result", action=action, resource_type=resource_type, id=resource_id, status=status, error=error, **fields)
+
+
+def stream_resources(resource_type, items, id_key, region=None):
+    """Pass items through unchanged, emitting each one as it arrives."""
+    for item in items:
+        emit_resource(resource_type, item, id_key, region)
+        yield item
+
+
+def records_result(action, resource_type):
+    """
+    Decorator for the prompt-free create_* building blocks (first argument
+    the EC2 client, returning the new ID): emits a result record for the
+    ID, or for the error before re-raising it.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(ec2, *args, **kwargs):
+            region = getattr(getattr(ec2, "meta", None), "region_name", None)
+            try:
+                resource_id = func(ec2, *args, **kwargs)
+            except Exception as e:
+                emit_result(action, resource_type, None, FAILED, error_message(e), region=region)
+                raise
+            emit_result(action, resource_type, resource_id, OK, region=region)
+            return resource_id
+        return wrapper
+    return decorate
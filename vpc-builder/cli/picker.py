@@ -0,0 +1,58 @@
+import os
+
+import questionary
+from prompt_toolkit.completion import Completer, Completion
+
+from cli.helpers import get_name_tag
+from utils.search_index import SearchIndex
+
+# Up to this many choices a plain list is quickest; longer ones get a search-as-you-type picker.
+PICKER_LIST_LIMIT = int(os.environ.get("VPC_BUILDER_PICKER_LIST_LIMIT", "30"))
+# Completions offered per keystroke.
+PICKER_MATCHES = 15
+
+
+def choice_label(resource_id, name):
+    return f"{resource_id} ({name})" if name else resource_id
+
+
+def resource_values(resource):
+    """Searchable values of a describe result besides its ID: Name tag, CIDR, AZ and the other tags."""
+    values = [get_name_tag(resource), resource.get("CidrBlock", ""), resource.get("AvailabilityZone", "")]
+    values += [f"{tag['Key']}={tag['Value']}" for tag in resource.get("Tags", []) if tag["Key"] != "Name"]
+    return values
+
+
+class IndexCompleter(Completer):
+    """Completes resource IDs from a SearchIndex, matching IDs, names, CIDRs and tags as the user types."""
+
+    def __init__(self, index, limit=PICKER_MATCHES):
+        self.index = index
+        self.limit = limit
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        for key in self.index.search(text, self.limit):
+            yield Completion(key, start_position=-len(text), display=self.index.label(key))
+
+
+def pick(message, choices, values=None):
+    """
+    Ask for one of choices, (id, label) pairs, and return its ID (None if
+    cancelled). Short lists are a plain select. Longer ones are indexed
+    once, with values(id) giving each choice's searchable values, and
+    searched on every keystroke; the answer must resolve to one ID.
+    """
+    if len(choices) <= PICKER_LIST_LIMIT:
+        return questionary.select(
+            message, choices=[questionary.Choice(title=label, value=key) for key, label in choices]
+        ).ask()
+
+    index = SearchIndex((key, label, values(key) if values else ()) for key, label in choices)
+    answer = questionary.autocomplete(
+        f"{message} (type an ID, name, CIDR or tag)",
+        choices=index.keys(),
+        completer=IndexCompleter(index),
+        validate=lambda text: index.resolve(text) is not None or "No single match; keep typing or pick a suggestion.",
+    ).ask()
+    return index.resolve(answer) if answer else None
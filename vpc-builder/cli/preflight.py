@@ -0,0 +1,234 @@
+import ipaddress
+import os
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from cli.async_core import get_core
+from cli.cache import cache_key, uncached
+from cli.display import show_warning
+
+# Seconds an allow/deny result is trusted before the operation is probed again.
+PREFLIGHT_TTL = int(os.environ.get("VPC_BUILDER_PREFLIGHT_TTL", "900"))
+
+ALLOWED = "allowed"
+DENIED = "denied"
+# The probe neither succeeded nor was refused (e.g. EC2 rejected a placeholder ID as unknown first).
+UNVERIFIED = "unverified"
+
+# Syntactically valid IDs for probes whose real resource isn't known. Some operations report
+# these as NotFound/Malformed before checking permissions, so callers pass real IDs when they can.
+PLACEHOLDER_IDS = {
+    "vpc": "vpc-00000000000000000",
+    "subnet": "subnet-00000000000000000",
+    "route_table": "rtb-00000000000000000",
+    "association": "rtbassoc-00000000000000000",
+    "igw": "igw-00000000000000000",
+    "nat": "nat-00000000000000000",
+    "sg": "sg-00000000000000000",
+    "eni": "eni-00000000000000000",
+    "acl": "acl-00000000000000000",
+    "vpce": "vpce-00000000000000000",
+    "allocation": "eipalloc-00000000000000000",
+    "eip_association": "eipassoc-00000000000000000",
+}
+
+PROBE_CIDR = "10.255.255.0/28"
+
+
+def probe_subnet_cidr(vpc_cidr=None):
+    """The last /28 of the target VPC, so create_subnet isn't rejected as out of range; PROBE_CIDR if unknown."""
+    if not vpc_cidr:
+        return PROBE_CIDR
+    network = ipaddress.IPv4Network(vpc_cidr)
+    return str(ipaddress.IPv4Network(f"{network.broadcast_address - 15}/28"))
+
+
+# Operation -> DryRun arguments, built from the placeholder IDs (overridden with real ones when known).
+PROBES = {
+    "create_vpc": lambda ids: {"CidrBlock": PROBE_CIDR},
+    "create_tags": lambda ids: {"Resources": [ids["vpc"]], "Tags": [{"Key": "preflight", "Value": "dry-run"}]},
+    "create_subnet": lambda ids: {"VpcId": ids["vpc"], "CidrBlock": probe_subnet_cidr(ids.get("vpc_cidr"))},
+    "create_internet_gateway": lambda ids: {},
+    "attach_internet_gateway": lambda ids: {"InternetGatewayId": ids["igw"], "VpcId": ids["vpc"]},
+    "create_route_table": lambda ids: {"VpcId": ids["vpc"]},
+    "create_route": lambda ids: {"RouteTableId": ids["route_table"], "DestinationCidrBlock": "0.0.0.0/0", "GatewayId": ids["igw"]},
+    "associate_route_table": lambda ids: {"RouteTableId": ids["route_table"], "SubnetId": ids["subnet"]},
+    "allocate_address": lambda ids: {"Domain": "vpc"},
+    "create_nat_gateway": lambda ids: {"SubnetId": ids["subnet"], "AllocationId": ids["allocation"]},
+    "create_security_group": lambda ids: {"GroupName": "preflight", "Description": "preflight", "VpcId": ids["vpc"]},
+    "modify_subnet_attribute": lambda ids: {"SubnetId": ids["subnet"], "MapPublicIpOnLaunch": {"Value": True}},
+    "delete_vpc": lambda ids: {"VpcId": ids["vpc"]},
+    "delete_subnet": lambda ids: {"SubnetId": ids["subnet"]},
+    "delete_route_table": lambda ids: {"RouteTableId": ids["route_table"]},
+    "disassociate_route_table": lambda ids: {"AssociationId": ids["association"]},
+    "detach_internet_gateway": lambda ids: {"InternetGatewayId": ids["igw"], "VpcId": ids["vpc"]},
+    "delete_internet_gateway": lambda ids: {"InternetGatewayId": ids["igw"]},
+    "delete_nat_gateway": lambda ids: {"NatGatewayId": ids["nat"]},
+    "delete_vpc_endpoints": lambda ids: {"VpcEndpointIds": [ids["vpce"]]},
+    "delete_network_interface": lambda ids: {"NetworkInterfaceId": ids["eni"]},
+    "delete_network_acl": lambda ids: {"NetworkAclId": ids["acl"]},
+    "delete_security_group": lambda ids: {"GroupId": ids["sg"]},
+    "revoke_security_group_ingress": lambda ids: {"GroupId": ids["sg"], "IpPermissions": [{"IpProtocol": "-1", "IpRanges": [{"CidrIp": PROBE_CIDR}]}]},
+    "revoke_security_group_egress": lambda ids: {"GroupId": ids["sg"], "IpPermissions": [{"IpProtocol": "-1", "IpRanges": [{"CidrIp": PROBE_CIDR}]}]},
+    "release_address": lambda ids: {"AllocationId": ids["allocation"]},
+    "disassociate_address": lambda ids: {"AssociationId": ids["eip_association"]},
+}
+
+DENIED_CODES = {"UnauthorizedOperation", "AccessDenied", "AccessDeniedException"}
+
+
+def iam_action(operation):
+    """create_subnet -> ec2:CreateSubnet"""
+    return "ec2:" + "".join(part.capitalize() for part in operation.split("_"))
+
+
+class MissingPermissions(Exception):
+    def __init__(self, denied, principal, region):
+        self.denied = sorted(denied)
+        self.principal = principal
+        self.region = region
+        super().__init__(
+            f"{principal} is missing {len(self.denied)} permission(s) in {region}: "
+            + ", ".join(iam_action(op) for op in self.denied)
+        )
+
+
+class PermissionCache:
+    """Allow/deny results keyed by (principal, region, operation), each valid for ttl seconds."""
+
+    def __init__(self, ttl=PREFLIGHT_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, principal, region, operation):
+        with self._lock:
+            entry = self._entries.get((principal, region, operation))
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, principal, region, operation, status):
+        with self._lock:
+            self._entries[(principal, region, operation)] = (time.monotonic() + self.ttl, status)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = PermissionCache()
+# (principal, region, operation) already reported as unverified, so the warning is shown once per session.
+_reported_unverified = set()
+_principals = {}
+_principals_lock = threading.Lock()
+
+
+def current_principal(region=None):
+    """ARN of the caller (one STS call per profile and region per session); 'unknown' if STS can't be reached."""
+    from cli.aws_client import AWSClient
+
+    key = (AWSClient._profile, region)
+    with _principals_lock:
+        if key in _principals:
+            return _principals[key]
+    try:
+        principal = AWSClient.get_client("sts", region).get_caller_identity()["Arn"]
+    except Exception:
+        principal = "unknown"
+    with _principals_lock:
+        return _principals.setdefault(key, principal)
+
+
+def current_account(region=None):
+    """
+    Account ID of the caller, or "" if unknown. Reuses a principal already
+    looked up this session for the profile in any region, so it costs at most
+    one STS call per session.
+    """
+    from cli.aws_client import AWSClient
+
+    with _principals_lock:
+        arn = next((arn for (profile, _), arn in _principals.items()
+                    if profile == AWSClient._profile and arn != "unknown"), None)
+    parts = (arn or current_principal(region)).split(":")
+    return parts[4] if len(parts) > 5 else ""
+
+
+def probe(ec2, operation, ids):
+    """Run one operation with DryRun=True and classify the answer."""
+    try:
+        getattr(ec2, operation)(DryRun=True, **PROBES[operation](ids))
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code == "DryRunOperation":
+            return ALLOWED
+        if code in DENIED_CODES:
+            return DENIED
+        return UNVERIFIED
+    # No DryRunOperation error means EC2 ignored DryRun and the call may really have run.
+    show_warning(f"{iam_action(operation)} ignored DryRun during the permission check and may have taken effect.")
+    return UNVERIFIED
+
+
+def check_permissions(ec2, operations, ids=None, principal=None, cache=None):
+    """
+    Probe every operation concurrently with DryRun. Results already cached
+    for this principal and region are reused without any API call.
+    Returns operation -> ALLOWED / DENIED / UNVERIFIED.
+    """
+    cache = cache or _cache
+    client = uncached(ec2)
+    region = client.meta.region_name
+    principal = principal or current_principal(region)
+    ids = {**PLACEHOLDER_IDS, **{k: v for k, v in (ids or {}).items() if v}}
+
+    results, to_probe = {}, []
+    for operation in sorted(set(operations)):
+        # An unverified answer only holds for the arguments probed; a probe with real IDs may settle it.
+        cached = cache.get(principal, region, operation) or cache.get(principal, region, _probe_key(operation, ids))
+        if cached is None:
+            to_probe.append(operation)
+        else:
+            results[operation] = cached
+
+    outcomes = get_core().run_all([lambda op=op: probe(client, op, ids) for op in to_probe])
+    for operation, status in zip(to_probe, outcomes):
+        if isinstance(status, Exception):
+            status = UNVERIFIED
+        elif status == UNVERIFIED:
+            cache.put(principal, region, _probe_key(operation, ids), status)
+        else:
+            cache.put(principal, region, operation, status)
+        results[operation] = status
+    return results
+
+
+def _probe_key(operation, ids):
+    return cache_key(operation, PROBES[operation](ids))
+
+
+def require_permissions(ec2, operations, ids=None, principal=None):
+    """
+    check_permissions, raising MissingPermissions that lists every denied
+    operation at once. Operations the probes could not verify are listed in a
+    warning; they are attempted anyway.
+    """
+    if not operations:
+        return {}
+    client = uncached(ec2)
+    principal = principal or current_principal(client.meta.region_name)
+    results = check_permissions(ec2, operations, ids, principal)
+    denied = [op for op, status in results.items() if status == DENIED]
+    if denied:
+        raise MissingPermissions(denied, principal, client.meta.region_name)
+    region = client.meta.region_name
+    unverified = sorted(op for op, status in results.items()
+                        if status == UNVERIFIED and (principal, region, op) not in _reported_unverified)
+    _reported_unverified.update((principal, region, op) for op in unverified)
+    if unverified:
+        show_warning("Could not verify in advance: " + ", ".join(iam_action(op) for op in unverified)
+                     + ". These steps may still fail with an authorization error.")
+    return results
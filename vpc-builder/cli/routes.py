@@ -0,0 +1,240 @@
+import bisect
+import ipaddress
+
+from cli.helpers import paginate
+from cli.topology import route_target
+
+BLACKHOLE = "blackhole"
+
+
+class _RadixTrie:
+    """
+    Binary trie over address bits; a node holding a value marks a prefix.
+
+    Nodes are [zero child, one child, value]. Insert and single lookups walk
+    at most `bits` levels; lookup_many resolves a whole batch of addresses in
+    one walk, visiting each trie node at most once.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.root = [None, None, None]
+
+    def insert(self, network, value):
+        node = self.root
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            bit = (address >> (self.bits - 1 - depth)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        node[2] = value
+
+    def _node(self, network):
+        node = self.root
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            node = node[(address >> (self.bits - 1 - depth)) & 1]
+            if node is None:
+                return None
+        return node
+
+    def get(self, network):
+        """Value stored for exactly this prefix."""
+        node = self._node(network)
+        return node[2] if node else None
+
+    def lookup(self, address):
+        """Value of the longest prefix containing address."""
+        node, best = self.root, self.root[2]
+        for depth in range(self.bits):
+            node = node[(address >> (self.bits - 1 - depth)) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                best = node[2]
+        return best
+
+    def lookup_many(self, addresses):
+        """{address: value} for every address, walking the trie once for the whole sorted batch."""
+        addresses = sorted(set(addresses))
+        result = {}
+
+        def walk(node, depth, prefix, lo, hi, best):
+            if node[2] is not None:
+                best = node[2]
+            if depth == self.bits:
+                for address in addresses[lo:hi]:
+                    result[address] = best
+                return
+            # Inside this subtree the batch is sorted, so the addresses with a 0 bit come first.
+            half = (prefix << 1 | 1) << (self.bits - depth - 1)
+            mid = bisect.bisect_left(addresses, half, lo, hi)
+            for child, start, end, child_prefix in ((node[0], lo, mid, prefix << 1), (node[1], mid, hi, prefix << 1 | 1)):
+                if start == end:
+                    continue
+                if child is None:
+                    for address in addresses[start:end]:
+                        result[address] = best
+                else:
+                    walk(child, depth + 1, child_prefix, start, end, best)
+
+        if addresses:
+            walk(self.root, 0, 0, 0, len(addresses), None)
+        return result
+
+    def more_specific(self, network):
+        """Values stored strictly below this prefix."""
+        node = self._node(network)
+        found = []
+        stack = [node[0], node[1]] if node else []
+        while stack:
+            child = stack.pop()
+            if child is not None:
+                if child[2] is not None:
+                    found.append(child[2])
+                stack.extend((child[0], child[1]))
+        return found
+
+    def covered_below(self, network):
+        """True when strictly longer prefixes cover every address in network, so it can never match."""
+        node = self._node(network)
+        if node is None:
+            return False
+
+        def covered(child):
+            if child is None:
+                return False
+            return child[2] is not None or (covered(child[0]) and covered(child[1]))
+
+        return covered(node[0]) and covered(node[1])
+
+
+def _destination(route):
+    return route.get("DestinationCidrBlock") or route.get("DestinationIpv6CidrBlock")
+
+
+class RouteTableIndex:
+    """One route table's CIDR routes in a trie per IP version."""
+
+    def __init__(self, route_table):
+        self.route_table_id = route_table["RouteTableId"]
+        self.route_table = route_table
+        self._tries = {4: _RadixTrie(32), 6: _RadixTrie(128)}
+        # Prefix-list destinations would need another describe per list; they are not resolved.
+        self.unresolved = [r for r in route_table.get("Routes", []) if not _destination(r)]
+        for route in route_table.get("Routes", []):
+            if _destination(route):
+                network = ipaddress.ip_network(_destination(route), strict=False)
+                self._tries[network.version].insert(network, route)
+
+    def routes(self):
+        return [r for r in self.route_table.get("Routes", []) if _destination(r)]
+
+    def resolve(self, destination):
+        """The route traffic to destination (an IP address) takes, or None if nothing matches."""
+        address = ipaddress.ip_address(destination)
+        return self._tries[address.version].lookup(int(address))
+
+    def resolve_many(self, destinations):
+        """{destination: route or None} for a batch of IP addresses."""
+        by_version = {4: [], 6: []}
+        parsed = {}
+        for destination in destinations:
+            address = ipaddress.ip_address(destination)
+            parsed[destination] = (address.version, int(address))
+            by_version[address.version].append(int(address))
+        matches = {version: self._tries[version].lookup_many(addresses) for version, addresses in by_version.items()}
+        return {destination: matches[version][address] for destination, (version, address) in parsed.items()}
+
+    def route_for(self, cidr):
+        network = ipaddress.ip_network(cidr, strict=False)
+        return self._tries[network.version].get(network)
+
+    def more_specific(self, cidr):
+        network = ipaddress.ip_network(cidr, strict=False)
+        return self._tries[network.version].more_specific(network)
+
+    def is_shadowed(self, cidr):
+        network = ipaddress.ip_network(cidr, strict=False)
+        return self._tries[network.version].covered_below(network)
+
+
+class RouteResolver:
+    """
+    Effective routing for every subnet of a VPC, from one describe_route_tables.
+
+    Subnets without an explicit association use the VPC's main route table,
+    the same way EC2 does. Destinations are resolved by longest-prefix match.
+    """
+
+    def __init__(self, route_tables):
+        self.tables = {rt["RouteTableId"]: RouteTableIndex(rt) for rt in route_tables}
+        self.main_table_id = None
+        self._table_of = {}
+        for rt in route_tables:
+            for assoc in rt.get("Associations", []):
+                if assoc.get("Main"):
+                    self.main_table_id = rt["RouteTableId"]
+                elif assoc.get("SubnetId"):
+                    self._table_of[assoc["SubnetId"]] = rt["RouteTableId"]
+
+    @classmethod
+    def for_vpc(cls, ec2, vpc_id):
+        return cls(list(paginate(ec2, "describe_route_tables", "RouteTables", Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])))
+
+    def table_for_subnet(self, subnet_id):
+        """ID of the route table the subnet uses: its explicit association, else the main table."""
+        return self._table_of.get(subnet_id, self.main_table_id)
+
+    def _table(self, subnet_id):
+        table_id = self.table_for_subnet(subnet_id)
+        if table_id is None:
+            raise KeyError(f"No route table applies to {subnet_id}")
+        return self.tables[table_id]
+
+    def resolve(self, subnet_id, destination):
+        return self._table(subnet_id).resolve(destination)
+
+    def resolve_many(self, subnet_id, destinations):
+        return self._table(subnet_id).resolve_many(destinations)
+
+    def blackholes(self, route_table_id=None):
+        """(route table ID, route) for every route whose target no longer exists."""
+        tables = [self.tables[route_table_id]] if route_table_id else self.tables.values()
+        return [
+            (table.route_table_id, route)
+            for table in tables
+            for route in table.route_table.get("Routes", [])
+            if route.get("State") == BLACKHOLE
+        ]
+
+    def shadowed(self, route_table_id=None):
+        """(route table ID, route) for every route that more specific routes cover completely."""
+        tables = [self.tables[route_table_id]] if route_table_id else self.tables.values()
+        return [
+            (table.route_table_id, route)
+            for table in tables
+            for route in table.routes()
+            if table.is_shadowed(_destination(route))
+        ]
+
+    def check_new_route(self, route_table_id, cidr, target):
+        """
+        Problems a create_route(route_table_id, cidr -> target) would have,
+        as human-readable strings; an empty list means none were found.
+        """
+        table = self.tables[route_table_id]
+        problems = []
+        existing = table.route_for(cidr)
+        if existing:
+            problems.append(f"{route_table_id} already routes {_destination(existing)} to {route_target(existing)}.")
+        if table.is_shadowed(cidr):
+            problems.append(f"More specific routes in {route_table_id} cover all of {cidr}; the new route would never be used.")
+        dead_targets = {route_target(route) for _, route in self.blackholes()}
+        if target in dead_targets:
+            problems.append(f"{target} is the target of a blackhole route; traffic sent to it would be dropped.")
+        for route in table.more_specific(cidr):
+            if route.get("State") == BLACKHOLE:
+                problems.append(f"{_destination(route)} inside {cidr} is a blackhole route and keeps dropping that traffic.")
+        return problems
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from cli.aws_client import AWSClient, region_codes
+from cli.display import show_failure, show_info, show_table
+from cli.executor import MAX_WORKERS
+from cli.helpers import error_message, get_name_tag, paginate
+from cli.output import stream_resources
+
+# (resource type, describe operation, result key, id key)
+SCANNED_RESOURCES = (
+    ("VPC", "describe_vpcs", "Vpcs", "VpcId"),
+    ("Subnet", "describe_subnets", "Subnets", "SubnetId"),
+    ("Internet Gateway", "describe_internet_gateways", "InternetGateways", "InternetGatewayId"),
+    ("NAT Gateway", "describe_nat_gateways", "NatGateways", "NatGatewayId"),
+)
+
+
+def enabled_regions():
+    """Every region enabled for the account, falling back to AWS_REGIONS if describe_regions is denied."""
+    try:
+        ec2 = AWSClient.get_regional_client("us-east-1")
+        return sorted(r["RegionName"] for r in ec2.describe_regions()["Regions"])
+    except Exception:
+        return region_codes()
+
+
+def _row(region, resource_type, item, id_key):
+    if resource_type == "Internet Gateway":
+        vpc_id = ", ".join(a["VpcId"] for a in item.get("Attachments", []))
+    else:
+        vpc_id = item.get("VpcId", "")
+    return {
+        "region": region,
+        "type": resource_type,
+        "id": item[id_key],
+        "name": get_name_tag(item),
+        "vpc_id": vpc_id,
+        "cidr": item.get("CidrBlock", ""),
+        "state": item.get("State", ""),
+    }
+
+
+def scan_regions(regions, max_workers=MAX_WORKERS):
+    """
+    Fetch VPCs, subnets and gateways from every region concurrently.
+
+    Each (region, resource type) pair is one task on a shared pool, so the
+    wall-clock time is roughly one region's slowest describe rather than the
+    sum over all regions. Returns (rows, errors) where errors maps
+    region -> message for regions that could not be read.
+    """
+    # One pooled client per region, shared by every task for that region.
+    clients = {region: AWSClient.get_regional_client(region) for region in regions}
+
+    def fetch(task):
+        region, (resource_type, operation, result_key, id_key) = task
+        items = paginate(clients[region], operation, result_key)
+        # With --output, each item is written out as its page arrives.
+        items = stream_resources(resource_type.lower().replace(" ", "-"), items, id_key, region)
+        return [_row(region, resource_type, item, id_key) for item in items]
+
+    tasks = [(region, resource) for region in regions for resource in SCANNED_RESOURCES]
+    rows, errors = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(task[0], pool.submit(fetch, task)) for task in tasks]
+        for region, future in futures:
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                errors.setdefault(region, error_message(e))
+    return rows, errors
+
+
+def find_vpc_in_regions(vpc_input, regions, max_workers=MAX_WORKERS):
+    """Search every region's VPC inventory concurrently. Returns the first match with a Region key added."""
+    inventories = {region: AWSClient.get_vpc_inventory(AWSClient.get_regional_client(region)) for region in regions}
+
+    def find(region):
+        try:
+            return inventories[region].find(vpc_input)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for region, record in zip(regions, pool.map(find, regions)):
+            if record:
+                return dict(record, Region=region)
+    return None
+
+
+def run_scan(all_regions=False):
+    regions = enabled_regions() if all_regions else region_codes()
+    show_info(f"Scanning {len(regions)} region(s)...")
+
+    rows, errors = scan_regions(regions)
+    rows.sort(key=lambda r: (r["region"], r["vpc_id"], r["type"], r["id"]))
+    show_table(
+        "Inventory",
+        ["Region", "Type", "ID", "Name", "VPC", "CIDR", "State"],
+        [(r["region"], r["type"], r["id"], r["name"], r["vpc_id"], r["cidr"], r["state"]) for r in rows],
+    )
+    for region, message in sorted(errors.items()):
+        show_failure(f"{region}: {message}")
+    return rows
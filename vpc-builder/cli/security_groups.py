@@ -0,0 +1,245 @@
+import bisect
+import ipaddress
+from collections import defaultdict, namedtuple
+
+from cli.helpers import get_name_tag, paginate
+
+ALL_PORTS = (0, 65535)
+WORLD = ("0.0.0.0/0", "::/0")
+
+# Ports the exposure report calls out when they are open to the world.
+SENSITIVE_PORTS = {
+    22: "SSH", 3389: "RDP", 3306: "MySQL", 5432: "PostgreSQL", 1433: "SQL Server",
+    1521: "Oracle", 6379: "Redis", 11211: "Memcached", 27017: "MongoDB", 9200: "Elasticsearch",
+}
+
+PROTOCOL_NAMES = {"6": "tcp", "17": "udp", "1": "icmp", "58": "icmpv6"}
+
+# One permission entry expanded to a single source. source_kind is cidr, prefix_list or group.
+Rule = namedtuple("Rule", "group_id direction protocol from_port to_port source_kind source description")
+
+
+def expand_permissions(group_id, direction, permissions):
+    """Flatten describe_security_groups IpPermissions into one Rule per source."""
+    rules = []
+    for perm in permissions:
+        protocol = PROTOCOL_NAMES.get(str(perm.get("IpProtocol")), str(perm.get("IpProtocol")))
+        if protocol == "-1" or perm.get("FromPort") is None:
+            from_port, to_port = ALL_PORTS
+        else:
+            # Kept as given (for ICMP they are type and code) so the rule can be revoked exactly.
+            from_port, to_port = perm["FromPort"], perm.get("ToPort", perm["FromPort"])
+        sources = (
+            [("cidr", r["CidrIp"], r.get("Description", "")) for r in perm.get("IpRanges", [])]
+            + [("cidr", r["CidrIpv6"], r.get("Description", "")) for r in perm.get("Ipv6Ranges", [])]
+            + [("prefix_list", p["PrefixListId"], p.get("Description", "")) for p in perm.get("PrefixListIds", [])]
+            + [("group", p["GroupId"], p.get("Description", "")) for p in perm.get("UserIdGroupPairs", [])]
+        )
+        for kind, source, description in sources:
+            rules.append(Rule(group_id, direction, protocol, from_port, to_port, kind, source, description))
+    return rules
+
+
+def format_ports(rule):
+    if rule.protocol == "-1":
+        return "all"
+    if (rule.from_port, rule.to_port) == ALL_PORTS:
+        return f"{rule.protocol} all"
+    if rule.from_port == rule.to_port:
+        return f"{rule.protocol} {rule.from_port}"
+    return f"{rule.protocol} {rule.from_port}-{rule.to_port}"
+
+
+class _PortIndex:
+    """
+    Static segment tree over port intervals.
+
+    Rule intervals are split at every start / end+1 into elementary segments;
+    each rule is stored in O(log n) tree nodes, and a port query walks one
+    root-to-leaf path: O(log n + matches) however wide or overlapping the
+    intervals are.
+    """
+
+    def __init__(self, rules):
+        self._points = sorted({r.from_port for r in rules} | {r.to_port + 1 for r in rules})
+        self._size = max(len(self._points) - 1, 0)
+        self._nodes = defaultdict(list)
+        for rule in rules:
+            lo = bisect.bisect_left(self._points, rule.from_port)
+            hi = bisect.bisect_left(self._points, rule.to_port + 1)
+            self._insert(1, 0, self._size, lo, hi, rule)
+
+    def _insert(self, node, start, end, lo, hi, rule):
+        if hi <= start or end <= lo:
+            return
+        if lo <= start and end <= hi:
+            self._nodes[node].append(rule)
+            return
+        mid = (start + end) // 2
+        self._insert(2 * node, start, mid, lo, hi, rule)
+        self._insert(2 * node + 1, mid, end, lo, hi, rule)
+
+    def stab(self, port):
+        segment = bisect.bisect_right(self._points, port) - 1
+        if segment < 0 or segment >= self._size:
+            return []
+        found, node, start, end = [], 1, 0, self._size
+        while True:
+            found.extend(self._nodes.get(node, ()))
+            if end - start == 1:
+                return found
+            mid = (start + end) // 2
+            node, start, end = (2 * node, start, mid) if segment < mid else (2 * node + 1, mid, end)
+
+
+class _SourceIndex:
+    """CIDR sources bucketed by (IP version, prefix length), so "which sources contain X" is one dict probe per length."""
+
+    def __init__(self, rules):
+        self._buckets = defaultdict(lambda: defaultdict(list))
+        for rule in rules:
+            network = ipaddress.ip_network(rule.source, strict=False)
+            self._buckets[(network.version, network.prefixlen)][int(network.network_address)].append(rule)
+
+    def exact(self, cidr):
+        network = ipaddress.ip_network(cidr, strict=False)
+        return list(self._buckets.get((network.version, network.prefixlen), {}).get(int(network.network_address), []))
+
+    def containing(self, cidr):
+        """Rules whose source CIDR contains cidr (an address or a network)."""
+        network = ipaddress.ip_network(cidr, strict=False)
+        address, bits = int(network.network_address), network.max_prefixlen
+        found = []
+        for (version, length), bucket in self._buckets.items():
+            if version == network.version and length <= network.prefixlen:
+                mask = ((1 << length) - 1) << (bits - length)
+                found.extend(bucket.get(address & mask, ()))
+        return found
+
+
+class SecurityGroupAnalyzer:
+    """
+    Every rule of a set of security groups, indexed for audits.
+
+    Built from one paginated describe_security_groups. Rules are expanded to
+    one source each and indexed by port interval (per direction and
+    protocol), by source CIDR and by referenced group.
+    """
+
+    def __init__(self, groups):
+        self.groups = {sg["GroupId"]: sg for sg in groups}
+        self.rules = []
+        for sg in groups:
+            self.rules += expand_permissions(sg["GroupId"], "ingress", sg.get("IpPermissions", []))
+            self.rules += expand_permissions(sg["GroupId"], "egress", sg.get("IpPermissionsEgress", []))
+
+        by_protocol = defaultdict(list)
+        for rule in self.rules:
+            by_protocol[(rule.direction, rule.protocol)].append(rule)
+        self._ports = {key: _PortIndex(rules) for key, rules in by_protocol.items()}
+        self._sources = _SourceIndex([r for r in self.rules if r.source_kind == "cidr"])
+        self._referenced_by = defaultdict(list)
+        for rule in self.rules:
+            if rule.source_kind == "group":
+                self._referenced_by[rule.source].append(rule)
+
+    @classmethod
+    def for_vpc(cls, ec2, vpc_id):
+        return cls(list(paginate(ec2, "describe_security_groups", "SecurityGroups", Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])))
+
+    def name(self, group_id):
+        sg = self.groups.get(group_id)
+        if sg is None:
+            return ""
+        return get_name_tag(sg) or sg.get("GroupName", "")
+
+    def allowing(self, port, protocol="tcp", source=None, direction="ingress"):
+        """Rules that allow protocol/port (from source, if given, which may be an address or CIDR)."""
+        rules = self._stab(direction, protocol, port)
+        if protocol != "-1":
+            rules += self._stab(direction, "-1", port)
+        if source is None:
+            return rules
+        matching = set(self._sources.containing(source))
+        return [rule for rule in rules if rule in matching]
+
+    def _stab(self, direction, protocol, port):
+        index = self._ports.get((direction, protocol))
+        return index.stab(port) if index else []
+
+    def open_to(self, cidr, direction="ingress"):
+        """Rules whose source is exactly cidr, e.g. open_to('0.0.0.0/0')."""
+        return [rule for rule in self._sources.exact(cidr) if rule.direction == direction]
+
+    def references_to(self, group_id):
+        """Rules in other groups that reference group_id; these block deleting it."""
+        return [rule for rule in self._referenced_by.get(group_id, []) if rule.group_id != group_id]
+
+    def unreferenced_groups(self):
+        """Groups no other group's rule refers to."""
+        return [group_id for group_id in self.groups if not self.references_to(group_id)]
+
+    def exposure_report(self):
+        """(rule, sensitive services it opens) for every ingress rule open to the whole internet."""
+        report = []
+        for cidr in WORLD:
+            for rule in self.open_to(cidr):
+                services = [
+                    name for port, name in SENSITIVE_PORTS.items()
+                    if rule.protocol in ("tcp", "-1") and rule.from_port <= port <= rule.to_port
+                ]
+                report.append((rule, services))
+        return sorted(report, key=lambda item: (not item[1], item[0].group_id, item[0].from_port))
+
+    def redundant_rules(self):
+        """
+        (rule, covering rule) for every rule another rule in the same group
+        and direction already allows: same or all protocols, a port range at
+        least as wide and the same or a containing source. Of two identical
+        rules only the later one is reported.
+        """
+        by_group = defaultdict(list)
+        for rule in self.rules:
+            by_group[(rule.group_id, rule.direction)].append(rule)
+        redundant = []
+        for rules in by_group.values():
+            position = {id(rule): i for i, rule in enumerate(rules)}
+            by_protocol = defaultdict(list)
+            by_source = defaultdict(list)
+            for rule in rules:
+                by_protocol[rule.protocol].append(rule)
+                if rule.source_kind != "cidr":
+                    by_source[(rule.source_kind, rule.source)].append(rule)
+            ports = {protocol: _PortIndex(protocol_rules) for protocol, protocol_rules in by_protocol.items()}
+            sources = _SourceIndex([rule for rule in rules if rule.source_kind == "cidr"])
+
+            for i, rule in enumerate(rules):
+                if rule.source_kind == "cidr":
+                    same_source = {id(other) for other in sources.containing(rule.source)}
+                else:
+                    same_source = {id(other) for other in by_source[(rule.source_kind, rule.source)]}
+                # A port range covers the rule's if it contains the rule's first port and reaches its last.
+                covering = [
+                    other
+                    for protocol in {rule.protocol, "-1"} if protocol in ports
+                    for other in ports[protocol].stab(rule.from_port)
+                    if other.to_port >= rule.to_port and id(other) in same_source
+                ]
+                covering = [
+                    other for other in covering
+                    if position[id(other)] != i and (other != rule or position[id(other)] < i)
+                ]
+                if covering:
+                    redundant.append((rule, min(covering, key=lambda other: position[id(other)])))
+        return redundant
+
+
+def reference_permissions(rules):
+    """Group the referencing rules per (group, direction) into IpPermissions for revoke_security_group_*."""
+    permissions = defaultdict(list)
+    for rule in rules:
+        perm = {"IpProtocol": rule.protocol, "UserIdGroupPairs": [{"GroupId": rule.source}]}
+        if rule.protocol in ("tcp", "udp", "icmp", "icmpv6"):
+            perm["FromPort"], perm["ToPort"] = rule.from_port, rule.to_port
+        permissions[(rule.group_id, rule.direction)].append(perm)
+    return permissions
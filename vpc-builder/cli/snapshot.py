@@ -0,0 +1,169 @@
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cli.cache import uncached
+from cli.helpers import STATE_DIR, get_name_tag, paginate
+
+SNAPSHOT_PATH = os.path.join(STATE_DIR, "inventory.db")
+
+# Kind -> (describe operation, result key, ID key), listed region-wide. Only the VPC pickers read the
+# snapshot; subnets, route tables and gateways are always listed live, since deletes act on them.
+SNAPSHOT_KINDS = {
+    "vpc": ("describe_vpcs", "Vpcs", "VpcId"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    account TEXT NOT NULL,
+    region TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    vpc_id TEXT,
+    name TEXT,
+    cidr TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (account, region, kind, id)
+);
+CREATE INDEX IF NOT EXISTS resources_by_cidr ON resources (account, region, cidr);
+CREATE TABLE IF NOT EXISTS refreshes (
+    account TEXT NOT NULL,
+    region TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (account, region, kind)
+);
+"""
+
+
+def _vpc_of(resource):
+    if resource.get("VpcId"):
+        return resource["VpcId"]
+    attachments = resource.get("Attachments") or []
+    return attachments[0].get("VpcId") if attachments else None
+
+
+class InventorySnapshot:
+    """
+    SQLite store of the last known inventory, keyed by account and region.
+
+    Rows keep the full describe record as JSON next to id, VPC, Name tag and
+    indexed CIDR columns, so the VPC pickers and CIDR lookups read straight
+    from disk without any API call. reconcile() rewrites only the rows that
+    changed.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def reconcile(self, account, region, kind, resources):
+        """Make the stored rows for (account, region, kind) match resources. Returns (added, changed, removed)."""
+        id_key = SNAPSHOT_KINDS[kind][2]
+        incoming = {}
+        for resource in resources:
+            incoming[resource[id_key]] = (
+                _vpc_of(resource) if kind != "vpc" else resource[id_key],
+                get_name_tag(resource) or None,
+                resource.get("CidrBlock"),
+                json.dumps(resource, sort_keys=True, default=str),
+            )
+
+        with self._lock, self._conn:
+            stored = {
+                row["id"]: row["data"]
+                for row in self._conn.execute(
+                    "SELECT id, data FROM resources WHERE account = ? AND region = ? AND kind = ?", (account, region, kind)
+                )
+            }
+            upserts = [
+                (account, region, kind, resource_id, *values)
+                for resource_id, values in incoming.items()
+                if stored.get(resource_id) != values[3]
+            ]
+            removed = [(account, region, kind, resource_id) for resource_id in stored.keys() - incoming.keys()]
+            self._conn.executemany("INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+            self._conn.executemany(
+                "DELETE FROM resources WHERE account = ? AND region = ? AND kind = ? AND id = ?", removed
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?, ?)", (account, region, kind, time.time())
+            )
+        added = len(incoming.keys() - stored.keys())
+        return added, len(upserts) - added, len(removed)
+
+    def age(self, account, region, kind):
+        """Seconds since (account, region, kind) was last refreshed, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM refreshes WHERE account = ? AND region = ? AND kind = ?", (account, region, kind)
+            ).fetchone()
+        return None if row is None else max(0.0, time.time() - row["refreshed_at"])
+
+    def _select(self, where, params):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM resources WHERE {where} ORDER BY id", params).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def resources(self, account, region, kind):
+        return self._select("account = ? AND region = ? AND kind = ?", (account, region, kind))
+
+    def find_by_cidr(self, account, region, cidr):
+        """Resources whose primary CIDR is exactly cidr (normalized, so 10.0.0.1/16 finds 10.0.0.0/16)."""
+        cidr = str(ipaddress.ip_network(cidr.strip(), strict=False))
+        return self._select("account = ? AND region = ? AND cidr = ?", (account, region, cidr))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def sync_snapshot(ec2, snapshot, account, region, kinds=tuple(SNAPSHOT_KINDS)):
+    """Fetch every kind region-wide concurrently and reconcile it into the snapshot. Returns kind -> counts or error."""
+    from cli.async_core import get_core
+
+    client = uncached(ec2)
+    calls = [
+        lambda kind=kind: list(paginate(client, SNAPSHOT_KINDS[kind][0], SNAPSHOT_KINDS[kind][1]))
+        for kind in kinds
+    ]
+    results = {}
+    for kind, fetched in zip(kinds, get_core().run_all(calls)):
+        results[kind] = fetched if isinstance(fetched, Exception) else snapshot.reconcile(account, region, kind, fetched)
+    return results
+
+
+_snapshot = None
+_snapshot_enabled = False
+_snapshot_lock = threading.Lock()
+
+
+def enable_snapshot():
+    """Let inventories built from now on read from and write to the on-disk snapshot."""
+    global _snapshot_enabled
+    _snapshot_enabled = True
+
+
+def get_snapshot():
+    """The shared InventorySnapshot, or None when snapshots are off or the store can't be opened."""
+    global _snapshot
+    if not _snapshot_enabled:
+        return None
+    with _snapshot_lock:
+        if _snapshot is None:
+            try:
+                _snapshot = InventorySnapshot()
+            except sqlite3.Error:
+                return None
+        return _snapshot
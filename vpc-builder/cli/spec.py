@@ -0,0 +1,298 @@
+import ipaddress
+import json
+import os
+
+from cli.cidr_index import load_cidr_index
+from cli.create import (
+    create_internet_gateway,
+    create_nat_gateway,
+    create_route_table,
+    create_security_group,
+    create_subnet,
+    create_vpc,
+)
+from cli.display import show_failure, show_info, show_success, show_table
+from cli.executor import MAX_WORKERS, OK, TaskGraph
+from cli.helpers import error_message
+from cli.preflight import MissingPermissions, require_permissions
+from cli.prompts import confirm_action
+
+# Example spec (YAML or JSON):
+#
+#   region: us-east-1
+#   vpc: {name: prod, cidr: 10.0.0.0/16}        # or {id: vpc-0123...} to build into an existing VPC
+#   internet_gateway: {name: prod-igw}
+#   subnets:
+#     - {name: public-a, cidr: 10.0.0.0/24, az: us-east-1a, type: public, route_table: public}
+#     - {name: private-a, cidr: 10.0.10.0/24, az: us-east-1a, route_table: private-a}
+#   route_tables:
+#     - {name: public, type: public, routes: [{destination: 0.0.0.0/0, target: internet_gateway}]}
+#     - {name: private-a, routes: [{destination: 0.0.0.0/0, target: "nat_gateway:nat-a"}]}
+#   nat_gateways:
+#     - {name: nat-a, subnet: public-a}
+#   security_groups:
+#     - {name: web, description: Web tier}
+
+
+class SpecError(ValueError):
+    pass
+
+
+class PlanStep:
+    def __init__(self, key, resource, details, run, deps=(), operations=()):
+        self.key = key
+        self.resource = resource
+        self.details = details
+        self.run = run
+        self.deps = list(deps)
+        # EC2 operations the step calls, checked by the permission preflight.
+        self.operations = tuple(operations)
+
+
+def load_spec(path):
+    with open(path) as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() == ".json":
+        return json.loads(text)
+    try:
+        import yaml
+    except ImportError:
+        raise SpecError("PyYAML is required to read YAML specs (pip install pyyaml), or use a .json spec.")
+    return yaml.safe_load(text)
+
+
+def validate_spec(spec):
+    if not isinstance(spec, dict) or not isinstance(spec.get("vpc"), dict):
+        raise SpecError("Spec must contain a 'vpc' section.")
+
+    vpc = spec["vpc"]
+    if not vpc.get("id") and not vpc.get("cidr"):
+        raise SpecError("The 'vpc' section needs either an 'id' or a 'cidr'.")
+    vpc_network = _network(vpc["cidr"], "vpc") if vpc.get("cidr") else None
+
+    subnets = _named(spec, "subnets")
+    route_tables = _named(spec, "route_tables")
+    nat_gateways = _named(spec, "nat_gateways")
+    _named(spec, "security_groups")
+
+    networks = []
+    for name, subnet in subnets.items():
+        network = _network(subnet.get("cidr"), f"subnet {name}")
+        if vpc_network and not network.subnet_of(vpc_network):
+            raise SpecError(f"Subnet {name} ({network}) is outside the VPC CIDR {vpc_network}.")
+        for other_name, other in networks:
+            if network.overlaps(other):
+                raise SpecError(f"Subnet {name} ({network}) overlaps subnet {other_name} ({other}).")
+        networks.append((name, network))
+        if subnet.get("route_table") and subnet["route_table"] not in route_tables:
+            raise SpecError(f"Subnet {name} uses unknown route table {subnet['route_table']}.")
+
+    for name, nat in nat_gateways.items():
+        if nat.get("subnet") not in subnets:
+            raise SpecError(f"NAT gateway {name} must name one of the spec's subnets.")
+
+    for name, rt in route_tables.items():
+        destinations = set()
+        for route in rt.get("routes", []):
+            destination = _network(route.get("destination"), f"route in {name}")
+            if destination in destinations:
+                raise SpecError(f"Route table {name} has more than one route to {destination}.")
+            destinations.add(destination)
+            target = route.get("target", "")
+            if target == "internet_gateway":
+                if not spec.get("internet_gateway"):
+                    raise SpecError(f"Route table {name} targets the internet gateway, but the spec has none.")
+            elif target.startswith("nat_gateway:"):
+                if target.split(":", 1)[1] not in nat_gateways:
+                    raise SpecError(f"Route table {name} targets unknown {target}.")
+            else:
+                raise SpecError(f"Route table {name} has unsupported target '{target}'.")
+
+
+def build_plan(ec2, spec):
+    """Turn a validated spec into PlanSteps. Each step's run(outputs) returns the ID it created."""
+    validate_spec(spec)
+    steps = []
+
+    def add(key, resource, details, run, deps=(), operations=()):
+        steps.append(PlanStep(key, resource, details, run, deps, operations))
+        return key
+
+    vpc = spec["vpc"]
+    if vpc.get("id"):
+        vpc_step = add("vpc", "VPC", f"use existing {vpc['id']}", lambda out: vpc["id"])
+    else:
+        vpc_step = add(
+            "vpc", "VPC", f"{vpc.get('name') or ''} {vpc['cidr']}".strip(),
+            lambda out: create_vpc(ec2, vpc["cidr"], vpc.get("name")),
+            operations=("create_vpc", "create_tags"),
+        )
+
+    igw_step = None
+    if spec.get("internet_gateway"):
+        igw = spec["internet_gateway"] if isinstance(spec["internet_gateway"], dict) else {}
+        igw_step = add(
+            "igw", "Internet Gateway", f"{igw.get('name') or ''} attached to VPC".strip(),
+            lambda out: create_internet_gateway(ec2, out[vpc_step], igw.get("name")),
+            deps=[vpc_step],
+            operations=("create_internet_gateway", "attach_internet_gateway", "create_tags"),
+        )
+
+    for name, subnet in _named(spec, "subnets").items():
+        add(
+            f"subnet:{name}", "Subnet",
+            f"{name} {subnet['cidr']} {subnet.get('az') or ''} {subnet.get('type', 'private')}".strip(),
+            lambda out, name=name, subnet=subnet: create_subnet(
+                ec2, out[vpc_step], subnet["cidr"], name, subnet.get("type", "private"), subnet.get("az")
+            ),
+            deps=[vpc_step],
+            operations=("create_subnet", "create_tags"),
+        )
+
+    for name, rt in _named(spec, "route_tables").items():
+        add(
+            f"route-table:{name}", "Route Table", f"{name} {rt.get('type', 'private')}",
+            lambda out, name=name, rt=rt: create_route_table(ec2, out[vpc_step], name, rt.get("type", "private")),
+            deps=[vpc_step],
+            operations=("create_route_table", "create_tags"),
+        )
+
+    for name, nat in _named(spec, "nat_gateways").items():
+        # A public NAT gateway can only be created once the VPC has an internet gateway. Steps
+        # wait for it to become available, but all NATs share one poll stream.
+        add(
+            f"nat:{name}", "NAT Gateway", f"{name} in {nat['subnet']}",
+            lambda out, name=name, nat=nat: create_nat_gateway(ec2, out[f"subnet:{nat['subnet']}"], name, wait=True),
+            deps=[f"subnet:{nat['subnet']}"] + ([igw_step] if igw_step else []),
+            operations=("allocate_address", "create_nat_gateway", "create_tags"),
+        )
+
+    for name, rt in _named(spec, "route_tables").items():
+        for route in rt.get("routes", []):
+            target = route["target"]
+            target_step = igw_step if target == "internet_gateway" else f"nat:{target.split(':', 1)[1]}"
+            add(
+                f"route:{name}:{route['destination']}", "Route", f"{name}: {route['destination']} -> {target}",
+                lambda out, name=name, route=route, target_step=target_step: _create_route(
+                    ec2, out[f"route-table:{name}"], route["destination"], target_step, out[target_step]
+                ),
+                deps=[f"route-table:{name}", target_step],
+                operations=("create_route",),
+            )
+
+    for name, subnet in _named(spec, "subnets").items():
+        if subnet.get("route_table"):
+            add(
+                f"association:{name}", "Association", f"{name} -> {subnet['route_table']}",
+                lambda out, name=name, subnet=subnet: ec2.associate_route_table(
+                    SubnetId=out[f"subnet:{name}"], RouteTableId=out[f"route-table:{subnet['route_table']}"]
+                )["AssociationId"],
+                deps=[f"subnet:{name}", f"route-table:{subnet['route_table']}"],
+                operations=("associate_route_table",),
+            )
+
+    for name, sg in _named(spec, "security_groups").items():
+        add(
+            f"sg:{name}", "Security Group", name,
+            lambda out, name=name, sg=sg: create_security_group(ec2, out[vpc_step], name, sg.get("description") or name),
+            deps=[vpc_step],
+            operations=("create_security_group", "create_tags"),
+        )
+
+    return steps
+
+
+def apply_plan(steps, max_workers=MAX_WORKERS, on_done=None):
+    """Run the plan with independent steps in parallel. Returns key -> TaskResult."""
+    outputs = {}
+    graph = TaskGraph()
+
+    def runner(step):
+        def run():
+            outputs[step.key] = step.run(outputs)
+            return outputs[step.key]
+        return run
+
+    for step in steps:
+        graph.add(step.key, runner(step), deps=step.deps)
+    return graph.run(max_workers=max_workers, on_done=on_done)
+
+
+def check_cidr_conflicts(spec, cidr_index):
+    """Reject a spec whose CIDRs collide with existing VPCs or subnets before anything is created."""
+    vpc = spec["vpc"]
+    if vpc.get("cidr") and not vpc.get("id"):
+        problems = cidr_index.problems(vpc["cidr"])
+        if problems:
+            raise SpecError(f"VPC CIDR {vpc['cidr']} {'; '.join(problems)}.")
+    if vpc.get("id"):
+        for subnet in spec.get("subnets") or []:
+            problems = cidr_index.problems(subnet["cidr"], vpc["id"])
+            if problems:
+                raise SpecError(f"Subnet {subnet['name']} CIDR {subnet['cidr']} {'; '.join(problems)}.")
+
+
+def run_spec(ec2, spec, plan_only=False, assume_yes=False):
+    try:
+        steps = build_plan(ec2, spec)
+        cidr_index = load_cidr_index(ec2)
+        if cidr_index:
+            check_cidr_conflicts(spec, cidr_index)
+    except SpecError as e:
+        show_failure(f"Invalid spec: {e}")
+        return None
+
+    show_table(
+        "Plan",
+        ["Step", "Resource", "Details", "Depends on"],
+        [(step.key, step.resource, step.details, ", ".join(step.deps)) for step in steps],
+    )
+    try:
+        require_permissions(ec2, {op for step in steps for op in step.operations},
+                            {"vpc": spec["vpc"].get("id"), "vpc_cidr": spec["vpc"].get("cidr")})
+    except MissingPermissions as e:
+        show_failure(f"{e}. Nothing was applied." if not plan_only else str(e))
+        return None
+
+    if plan_only:
+        return None
+    if not assume_yes and not confirm_action(f"Apply {len(steps)} step(s)?"):
+        show_info("Apply cancelled.")
+        return None
+
+    results = apply_plan(steps)
+    failed = {key: result for key, result in results.items() if result.status != OK}
+    if not failed:
+        show_success(f"Applied {len(steps)} step(s). VPC ID: {results['vpc'].value}")
+        return results
+
+    for key, result in failed.items():
+        show_failure(f"{key} {result.status}: {error_message(result.error)}")
+    show_failure(f"{len(failed)} of {len(steps)} step(s) did not complete.")
+    return results
+
+
+def _create_route(ec2, rt_id, destination, target_step, target_id):
+    target_arg = "GatewayId" if target_step == "igw" else "NatGatewayId"
+    ec2.create_route(RouteTableId=rt_id, DestinationCidrBlock=destination, **{target_arg: target_id})
+    return destination
+
+
+def _named(spec, section):
+    items = spec.get(section) or []
+    named = {}
+    for item in items:
+        name = item.get("name")
+        if not name:
+            raise SpecError(f"Every entry in '{section}' needs a name.")
+        if name in named:
+            raise SpecError(f"Duplicate name '{name}' in '{section}'.")
+        named[name] = item
+    return named
+
+
+def _network(cidr, what):
+    try:
+        return ipaddress.IPv4Network(cidr)
+    except (TypeError, ValueError):
+        raise SpecError(f"Invalid CIDR for {what}: {cidr!r}")
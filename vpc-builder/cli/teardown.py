@@ -0,0 +1,299 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from cli.cache import uncached
+from cli.cidr_index import forget_cidr
+from cli.executor import MAX_WORKERS, OK, TaskGraph
+from cli.helpers import paginate
+from cli.preflight import require_permissions
+from cli.waiters import get_waiter_service
+
+# Attributes of a security group rule that identify it for revoke_security_group_*.
+RULE_KEYS = ("IpProtocol", "FromPort", "ToPort", "UserIdGroupPairs")
+
+
+def discover_vpc_resources(ec2, vpc_id):
+    """Fetch every resource that can block deletion of the VPC, one describe per type, concurrently."""
+    vpc_filter = [{"Name": "vpc-id", "Values": [vpc_id]}]
+    queries = {
+        "subnets": ("describe_subnets", "Subnets", {"Filters": vpc_filter}),
+        "route_tables": ("describe_route_tables", "RouteTables", {"Filters": vpc_filter}),
+        "internet_gateways": ("describe_internet_gateways", "InternetGateways",
+                              {"Filters": [{"Name": "attachment.vpc-id", "Values": [vpc_id]}]}),
+        "nat_gateways": ("describe_nat_gateways", "NatGateways",
+                         {"Filters": [{"Name": "vpc-id", "Values": [vpc_id]},
+                                      {"Name": "state", "Values": ["pending", "available", "failed", "deleting"]}]}),
+        "vpc_endpoints": ("describe_vpc_endpoints", "VpcEndpoints", {"Filters": vpc_filter}),
+        "network_interfaces": ("describe_network_interfaces", "NetworkInterfaces", {"Filters": vpc_filter}),
+        "network_acls": ("describe_network_acls", "NetworkAcls", {"Filters": vpc_filter}),
+        "security_groups": ("describe_security_groups", "SecurityGroups", {"Filters": vpc_filter}),
+        "addresses": ("describe_addresses", "Addresses", {"Filters": [{"Name": "domain", "Values": ["vpc"]}]}),
+    }
+
+    # Always read live state here; a stale cache entry would leave blockers behind.
+    client = uncached(ec2)
+
+    def fetch(query):
+        operation, result_key, kwargs = query
+        return list(paginate(client, operation, result_key, **kwargs))
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(queries))) as pool:
+        fetched = dict(zip(queries, pool.map(fetch, queries.values())))
+
+    fetched["vpc_endpoints"] = [
+        ep for ep in fetched["vpc_endpoints"] if ep.get("State", "").lower() not in ("deleted", "deleting")
+    ]
+    fetched["network_acls"] = [acl for acl in fetched["network_acls"] if not acl.get("IsDefault")]
+    fetched["security_groups"] = [sg for sg in fetched["security_groups"] if sg.get("GroupName") != "default"]
+
+    # Only Elastic IPs owned by this VPC's NAT gateways or ENIs matter here.
+    eni_ids = {eni["NetworkInterfaceId"] for eni in fetched["network_interfaces"]}
+    nat_allocations = {
+        addr.get("AllocationId")
+        for nat in fetched["nat_gateways"]
+        for addr in nat.get("NatGatewayAddresses", [])
+    }
+    fetched["addresses"] = [
+        addr for addr in fetched["addresses"]
+        if addr.get("AllocationId") in nat_allocations or addr.get("NetworkInterfaceId") in eni_ids
+    ]
+    return fetched
+
+
+def build_teardown_graph(ec2, vpc_id, resources):
+    """
+    Turn discovered resources into a deletion DAG.
+
+    NAT gateways and VPC endpoints are deleted asynchronously by AWS, so each
+    group gets one wait task backed by the shared WaiterService, and only the
+    subnets, ENIs, Elastic IPs and gateways that actually depend on them wait
+    on it.
+    """
+    graph = TaskGraph()
+
+    waiters = get_waiter_service(ec2)
+
+    endpoint_ids = [ep["VpcEndpointId"] for ep in resources["vpc_endpoints"]]
+    endpoint_subnets = {subnet_id for ep in resources["vpc_endpoints"] for subnet_id in ep.get("SubnetIds", [])}
+    endpoint_enis = [eni_id for ep in resources["vpc_endpoints"] for eni_id in ep.get("NetworkInterfaceIds", [])]
+    wait_endpoints = None
+    if endpoint_ids:
+        graph.add("vpc-endpoints", lambda: ec2.delete_vpc_endpoints(VpcEndpointIds=endpoint_ids))
+        wait_endpoints = graph.add(
+            "wait:vpc-endpoints",
+            lambda: wait_until_deleted(waiters, {"vpc_endpoint": endpoint_ids, "network_interface": endpoint_enis}),
+            deps=["vpc-endpoints"],
+        )
+
+    nat_ids = [nat["NatGatewayId"] for nat in resources["nat_gateways"]]
+    nat_subnets = {nat.get("SubnetId") for nat in resources["nat_gateways"]}
+    nat_enis = [
+        addr["NetworkInterfaceId"] for nat in resources["nat_gateways"]
+        for addr in nat.get("NatGatewayAddresses", []) if addr.get("NetworkInterfaceId")
+    ]
+    wait_nats = None
+    if nat_ids:
+        for nat_id in nat_ids:
+            graph.add(f"nat:{nat_id}", lambda nat_id=nat_id: ec2.delete_nat_gateway(NatGatewayId=nat_id))
+        # The NAT's ENI is released after the gateway reports deleted; the subnet can't go before it.
+        wait_nats = graph.add(
+            "wait:nat-gateways",
+            lambda: wait_until_deleted(waiters, {"nat_gateway": nat_ids, "network_interface": nat_enis}),
+            deps=[f"nat:{nat_id}" for nat_id in nat_ids],
+        )
+
+    nat_allocations = {
+        addr.get("AllocationId") for nat in resources["nat_gateways"] for addr in nat.get("NatGatewayAddresses", [])
+    }
+    address_tasks = []
+    for addr in resources["addresses"]:
+        if addr.get("AllocationId") in nat_allocations:
+            address_tasks.append(graph.add(
+                f"eip:{addr['AllocationId']}",
+                lambda addr=addr: ec2.release_address(AllocationId=addr["AllocationId"]),
+                deps=[wait_nats],
+            ))
+        elif addr.get("AssociationId"):
+            address_tasks.append(graph.add(
+                f"eip-association:{addr['AssociationId']}",
+                lambda addr=addr: ec2.disassociate_address(AssociationId=addr["AssociationId"]),
+            ))
+
+    eni_tasks_by_subnet = {}
+    for eni in resources["network_interfaces"]:
+        # ENIs owned by NAT gateways, endpoints, load balancers etc. go away with their owner.
+        if eni.get("RequesterManaged") or eni.get("Attachment"):
+            continue
+        eni_id = eni["NetworkInterfaceId"]
+        task = graph.add(
+            f"eni:{eni_id}",
+            lambda eni_id=eni_id: ec2.delete_network_interface(NetworkInterfaceId=eni_id),
+            deps=[t for t in address_tasks if t.startswith("eip-association:")],
+        )
+        eni_tasks_by_subnet.setdefault(eni.get("SubnetId"), []).append(task)
+    eni_tasks = [task for tasks in eni_tasks_by_subnet.values() for task in tasks]
+
+    for igw in resources["internet_gateways"]:
+        igw_id = igw["InternetGatewayId"]
+        graph.add(
+            f"igw:{igw_id}",
+            lambda igw_id=igw_id: delete_internet_gateway(ec2, igw_id, vpc_id),
+            deps=[t for t in [wait_nats] + address_tasks if t],
+        )
+
+    subnet_tasks = {}
+    for subnet in resources["subnets"]:
+        subnet_id = subnet["SubnetId"]
+        deps = list(eni_tasks_by_subnet.get(subnet_id, []))
+        if wait_nats and subnet_id in nat_subnets:
+            deps.append(wait_nats)
+        if wait_endpoints and subnet_id in endpoint_subnets:
+            deps.append(wait_endpoints)
+        subnet_tasks[subnet_id] = graph.add(
+            f"subnet:{subnet_id}", lambda subnet_id=subnet_id: ec2.delete_subnet(SubnetId=subnet_id), deps=deps
+        )
+
+    for rt in resources["route_tables"]:
+        if any(assoc.get("Main") for assoc in rt.get("Associations", [])):
+            continue
+        rt_id = rt["RouteTableId"]
+        graph.add(
+            f"rtb:{rt_id}",
+            lambda rt=rt: delete_route_table(ec2, rt),
+            deps=[wait_endpoints] if wait_endpoints else [],
+        )
+
+    for acl in resources["network_acls"]:
+        acl_id = acl["NetworkAclId"]
+        deps = [subnet_tasks[a["SubnetId"]] for a in acl.get("Associations", []) if a.get("SubnetId") in subnet_tasks]
+        graph.add(f"acl:{acl_id}", lambda acl_id=acl_id: ec2.delete_network_acl(NetworkAclId=acl_id), deps=deps)
+
+    # Groups that reference each other must drop those rules before either can be deleted.
+    revoke_tasks = []
+    for sg in resources["security_groups"]:
+        if has_group_references(sg):
+            revoke_tasks.append(graph.add(f"sg-rules:{sg['GroupId']}", lambda sg=sg: revoke_group_references(ec2, sg)))
+    for sg in resources["security_groups"]:
+        deps = revoke_tasks + eni_tasks + ([wait_endpoints] if wait_endpoints else [])
+        graph.add(
+            f"sg:{sg['GroupId']}", lambda group_id=sg["GroupId"]: ec2.delete_security_group(GroupId=group_id), deps=deps
+        )
+
+    graph.add("vpc", lambda: ec2.delete_vpc(VpcId=vpc_id), deps=graph.keys())
+    return graph
+
+
+def teardown_operations(resources):
+    """The EC2 operations a teardown of these resources will call, for a permission preflight."""
+    operations = {"delete_vpc"}
+    needs = {
+        "subnets": ("delete_subnet",),
+        "route_tables": ("disassociate_route_table", "delete_route_table"),
+        "internet_gateways": ("detach_internet_gateway", "delete_internet_gateway"),
+        "nat_gateways": ("delete_nat_gateway",),
+        "vpc_endpoints": ("delete_vpc_endpoints",),
+        "network_interfaces": ("delete_network_interface",),
+        "network_acls": ("delete_network_acl",),
+        "security_groups": ("delete_security_group",),
+        "addresses": ("release_address",),
+    }
+    for kind, kind_operations in needs.items():
+        if resources.get(kind):
+            operations.update(kind_operations)
+    if any(has_group_references(sg) for sg in resources.get("security_groups", [])):
+        operations.update(("revoke_security_group_ingress", "revoke_security_group_egress"))
+    if any(addr.get("AssociationId") for addr in resources.get("addresses", [])):
+        operations.add("disassociate_address")
+    return operations
+
+
+def teardown_probe_ids(vpc_id, resources):
+    """Real IDs from the discovered resources for the preflight probes, so they aren't answered with NotFound."""
+    def first(items, key):
+        return next((item[key] for item in items if item.get(key)), None)
+
+    route_tables = [
+        rt for rt in resources.get("route_tables", []) if not any(a.get("Main") for a in rt.get("Associations", []))
+    ]
+    security_groups = resources.get("security_groups", [])
+    return {
+        "vpc": vpc_id,
+        "subnet": first(resources.get("subnets", []), "SubnetId"),
+        "route_table": first(route_tables, "RouteTableId"),
+        "association": first([a for rt in route_tables for a in rt.get("Associations", [])], "RouteTableAssociationId"),
+        "igw": first(resources.get("internet_gateways", []), "InternetGatewayId"),
+        "nat": first(resources.get("nat_gateways", []), "NatGatewayId"),
+        "sg": first([sg for sg in security_groups if has_group_references(sg)] or security_groups, "GroupId"),
+        "eni": first(resources.get("network_interfaces", []), "NetworkInterfaceId"),
+        "acl": first(resources.get("network_acls", []), "NetworkAclId"),
+        "vpce": first(resources.get("vpc_endpoints", []), "VpcEndpointId"),
+        "allocation": first(resources.get("addresses", []), "AllocationId"),
+        "eip_association": first(resources.get("addresses", []), "AssociationId"),
+    }
+
+
+def teardown_vpc(ec2, vpc_id, max_workers=MAX_WORKERS, on_done=None, preflight=False):
+    """
+    Delete the VPC and everything in it. Returns the per-task results of the DAG run.
+    With preflight, every operation is first tried with DryRun and MissingPermissions
+    is raised before anything is deleted.
+    """
+    resources = discover_vpc_resources(ec2, vpc_id)
+    if preflight:
+        require_permissions(ec2, teardown_operations(resources), teardown_probe_ids(vpc_id, resources))
+    graph = build_teardown_graph(ec2, vpc_id, resources)
+    results = graph.run(max_workers=max_workers, on_done=on_done)
+    deleted = [key.split(":", 1)[1] for key, result in results.items()
+               if key.startswith("subnet:") and result.status == OK]
+    forget_cidr(*deleted, *([vpc_id] if results["vpc"].status == OK else []))
+    return results
+
+
+def delete_internet_gateway(ec2, igw_id, vpc_id):
+    try:
+        ec2.detach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
+    except ClientError as e:
+        if "not attached" not in e.response["Error"]["Message"]:
+            raise
+    ec2.delete_internet_gateway(InternetGatewayId=igw_id)
+
+
+def delete_route_table(ec2, rt):
+    for assoc in rt.get("Associations", []):
+        if not assoc.get("Main") and assoc.get("RouteTableAssociationId"):
+            try:
+                ec2.disassociate_route_table(AssociationId=assoc["RouteTableAssociationId"])
+            except ClientError as e:
+                # Deleting the subnet (running in parallel) already removed the association.
+                if e.response["Error"]["Code"] != "InvalidAssociationID.NotFound":
+                    raise
+    ec2.delete_route_table(RouteTableId=rt["RouteTableId"])
+
+
+def has_group_references(sg):
+    return any(
+        perm.get("UserIdGroupPairs")
+        for perm in sg.get("IpPermissions", []) + sg.get("IpPermissionsEgress", [])
+    )
+
+
+def revoke_group_references(ec2, sg):
+    for key, revoke in (("IpPermissions", ec2.revoke_security_group_ingress),
+                        ("IpPermissionsEgress", ec2.revoke_security_group_egress)):
+        perms = [
+            {k: perm[k] for k in RULE_KEYS if k in perm}
+            for perm in sg.get(key, []) if perm.get("UserIdGroupPairs")
+        ]
+        if perms:
+            revoke(GroupId=sg["GroupId"], IpPermissions=perms)
+
+
+def wait_until_deleted(waiters, ids_by_kind):
+    """Wait for every listed resource to be gone; all kinds share the waiter's poll stream."""
+    futures = [
+        waiters.wait_for(kind, resource_id, "deleted")
+        for kind, resource_ids in ids_by_kind.items() for resource_id in resource_ids
+    ]
+    for future in futures:
+        future.result()
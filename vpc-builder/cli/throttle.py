@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+# Client-side request budgets shared by every thread in the process, per operation family.
+DESCRIBE_RATE = float(os.environ.get("VPC_BUILDER_DESCRIBE_RATE", "20"))
+DESCRIBE_BURST = int(os.environ.get("VPC_BUILDER_DESCRIBE_BURST", "40"))
+MUTATE_RATE = float(os.environ.get("VPC_BUILDER_MUTATE_RATE", "5"))
+MUTATE_BURST = int(os.environ.get("VPC_BUILDER_MUTATE_BURST", "10"))
+
+# botocore retry settings; adaptive mode backs off further on RequestLimitExceeded.
+RETRY_CONFIG = {"mode": "adaptive", "max_attempts": int(os.environ.get("VPC_BUILDER_MAX_ATTEMPTS", "10"))}
+
+READ_PREFIXES = ("Describe", "Get", "List", "Search")
+
+
+class TokenBucket:
+    """Thread-safe token bucket. acquire() blocks until a token is available."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now, possibly going into debt, so waiting threads queue up fairly.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, describe_rate=DESCRIBE_RATE, describe_burst=DESCRIBE_BURST,
+                 mutate_rate=MUTATE_RATE, mutate_burst=MUTATE_BURST):
+        self.buckets = {
+            "describe": TokenBucket(describe_rate, describe_burst),
+            "mutate": TokenBucket(mutate_rate, mutate_burst),
+        }
+
+    @staticmethod
+    def family(operation_name):
+        return "describe" if operation_name.startswith(READ_PREFIXES) else "mutate"
+
+    def acquire(self, operation_name):
+        return self.buckets[self.family(operation_name)].acquire()
+
+    def attach(self, client):
+        """Make every request a boto3 client sends, retries included, take a token first."""
+        client.meta.events.register("before-send.ec2", self._before_send)
+        return client
+
+    def _before_send(self, event_name, **kwargs):
+        # before-send fires once per attempt, so botocore's retries are paced like any other request.
+        self.acquire(event_name.rsplit(".", 1)[-1])
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The process-wide limiter every EC2 client built by AWSClient shares."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,119 @@
+import functools
+
+from rich.tree import Tree
+
+from cli.async_core import get_core
+from cli.helpers import get_name_tag, paginate
+
+# Section -> (describe operation, result key, filter name). Each is one describe for the whole VPC.
+TOPOLOGY_QUERIES = {
+    "subnets": ("describe_subnets", "Subnets", "vpc-id"),
+    "route_tables": ("describe_route_tables", "RouteTables", "vpc-id"),
+    "internet_gateways": ("describe_internet_gateways", "InternetGateways", "attachment.vpc-id"),
+    "nat_gateways": ("describe_nat_gateways", "NatGateways", "vpc-id"),
+    "security_groups": ("describe_security_groups", "SecurityGroups", "vpc-id"),
+    "vpc_endpoints": ("describe_vpc_endpoints", "VpcEndpoints", "vpc-id"),
+    "network_interfaces": ("describe_network_interfaces", "NetworkInterfaces", "vpc-id"),
+}
+
+
+def fetch_vpc_topology(ec2, vpc_id):
+    """
+    Fetch everything shown in the topology view with one concurrent fan-out,
+    so the wait is roughly one round trip instead of one per resource type.
+    Returns (resources, errors), both keyed by section.
+    """
+    calls = [
+        functools.partial(list, paginate(ec2, operation, result_key, Filters=[{"Name": name, "Values": [vpc_id]}]))
+        for operation, result_key, name in TOPOLOGY_QUERIES.values()
+    ]
+    resources, errors = {}, {}
+    for section, result in zip(TOPOLOGY_QUERIES, get_core().run_all(calls)):
+        if isinstance(result, Exception):
+            errors[section] = result
+            resources[section] = []
+        else:
+            resources[section] = result
+    return resources, errors
+
+
+def _label(resource_id, resource):
+    name = get_name_tag(resource)
+    return f"[bold]{resource_id}[/bold] ({name})" if name else f"[bold]{resource_id}[/bold]"
+
+
+def route_target(route):
+    for key in ("GatewayId", "NatGatewayId", "TransitGatewayId", "VpcPeeringConnectionId",
+                "EgressOnlyInternetGatewayId", "CarrierGatewayId", "LocalGatewayId",
+                "NetworkInterfaceId", "VpcEndpointId", "InstanceId"):
+        if route.get(key):
+            return route[key]
+    return "?"
+
+
+def build_topology_tree(vpc, resources):
+    """Render a VPC and its fetched resources as a rich Tree."""
+    name = f" ({vpc['Name']})" if vpc.get("Name") else ""
+    region = f" — {vpc['Region']}" if vpc.get("Region") else ""
+    tree = Tree(f"🌐 [bold]{vpc['VpcId']}[/bold]{name} {vpc.get('CidrBlock', '')}{region}")
+
+    # Subnets are explicitly associated with at most one route table; the rest use the main one.
+    table_of = {}
+    main_table = None
+    for rt in resources["route_tables"]:
+        for assoc in rt.get("Associations", []):
+            if assoc.get("Main"):
+                main_table = rt["RouteTableId"]
+            elif assoc.get("SubnetId"):
+                table_of[assoc["SubnetId"]] = rt["RouteTableId"]
+    public_tables = {
+        rt["RouteTableId"] for rt in resources["route_tables"]
+        if any(r.get("GatewayId", "").startswith("igw-") for r in rt.get("Routes", []))
+    }
+
+    subnets = tree.add(f"📦 Subnets ({len(resources['subnets'])})")
+    by_az = {}
+    for subnet in resources["subnets"]:
+        by_az.setdefault(subnet.get("AvailabilityZone", "?"), []).append(subnet)
+    for az in sorted(by_az):
+        az_node = subnets.add(f"[cyan]{az}[/cyan]")
+        for subnet in sorted(by_az[az], key=lambda s: s.get("CidrBlock", "")):
+            rt_id = table_of.get(subnet["SubnetId"], main_table)
+            kind = "public" if rt_id in public_tables else "private"
+            az_node.add(f"{_label(subnet['SubnetId'], subnet)} {subnet.get('CidrBlock', '')} [dim]{kind}, {rt_id or 'no route table'}[/dim]")
+
+    tables = tree.add(f"🧭 Route Tables ({len(resources['route_tables'])})")
+    for rt in resources["route_tables"]:
+        main = " [dim]main[/dim]" if rt["RouteTableId"] == main_table else ""
+        node = tables.add(f"{_label(rt['RouteTableId'], rt)}{main}")
+        for route in rt.get("Routes", []):
+            dest = route.get("DestinationCidrBlock") or route.get("DestinationIpv6CidrBlock") or route.get("DestinationPrefixListId")
+            state = "" if route.get("State", "active") == "active" else f" [red]{route['State']}[/red]"
+            node.add(f"{dest} → {route_target(route)}{state}")
+
+    igws = tree.add(f"🚪 Internet Gateways ({len(resources['internet_gateways'])})")
+    for igw in resources["internet_gateways"]:
+        igws.add(_label(igw["InternetGatewayId"], igw))
+
+    nats = tree.add(f"🔁 NAT Gateways ({len(resources['nat_gateways'])})")
+    for nat in resources["nat_gateways"]:
+        ips = ", ".join(a.get("PublicIp", "") for a in nat.get("NatGatewayAddresses", []) if a.get("PublicIp"))
+        nats.add(f"{_label(nat['NatGatewayId'], nat)} {nat.get('State', '')} in {nat.get('SubnetId', '?')} {ips}".rstrip())
+
+    groups = tree.add(f"🛡️ Security Groups ({len(resources['security_groups'])})")
+    for sg in resources["security_groups"]:
+        groups.add(
+            f"{_label(sg['GroupId'], sg)} {sg.get('GroupName', '')} "
+            f"[dim]{len(sg.get('IpPermissions', []))} inbound / {len(sg.get('IpPermissionsEgress', []))} outbound rules[/dim]"
+        )
+
+    endpoints = tree.add(f"🔌 VPC Endpoints ({len(resources['vpc_endpoints'])})")
+    for ep in resources["vpc_endpoints"]:
+        endpoints.add(f"{_label(ep['VpcEndpointId'], ep)} {ep.get('ServiceName', '')} [dim]{ep.get('VpcEndpointType', '')}, {ep.get('State', '')}[/dim]")
+
+    enis = tree.add(f"🔗 Network Interfaces ({len(resources['network_interfaces'])})")
+    for eni in resources["network_interfaces"]:
+        owner = eni.get("Description") or eni.get("InterfaceType", "")
+        enis.add(f"{_label(eni['NetworkInterfaceId'], eni)} {eni.get('PrivateIpAddress', '')} [dim]{owner}[/dim]")
+
+    return tree
@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from cli.cache import uncached
+
+# How each resource type is polled: describe operation, result key, ID key,
+# the filter that selects by ID, and how to read a resource's state.
+WAIT_TYPES = {
+    "nat_gateway": ("describe_nat_gateways", "NatGateways", "NatGatewayId", "nat-gateway-id",
+                    lambda r: r.get("State")),
+    "vpc_endpoint": ("describe_vpc_endpoints", "VpcEndpoints", "VpcEndpointId", "vpc-endpoint-id",
+                     lambda r: r.get("State", "").lower()),
+    "network_interface": ("describe_network_interfaces", "NetworkInterfaces", "NetworkInterfaceId",
+                          "network-interface-id", lambda r: r.get("Status")),
+    "internet_gateway": ("describe_internet_gateways", "InternetGateways", "InternetGatewayId",
+                         "internet-gateway-id", lambda r: "attached" if r.get("Attachments") else "detached"),
+}
+
+# States that mean a wait can never succeed.
+FAILURE_STATES = {"failed", "rejected"}
+
+# EC2 accepts at most this many values in one filter.
+MAX_FILTER_VALUES = 200
+
+
+class WaiterError(Exception):
+    pass
+
+
+class _Pending:
+    def __init__(self, kind, resource_id, target, deadline):
+        self.kind = kind
+        self.resource_id = resource_id
+        self.target = target
+        self.deadline = deadline
+        self.future = Future()
+
+
+class WaiterService:
+    """
+    Waits on many slow resources with one poll stream.
+
+    Every tick makes a single describe call per resource type covering all
+    pending IDs of that type, instead of one waiter per resource polling on
+    its own. The poll interval backs off while nothing changes and resets
+    when new work arrives. A resource that no longer shows up counts as
+    "deleted".
+    """
+
+    def __init__(self, ec2, initial_delay=2.0, max_delay=15.0, backoff=1.5, timeout=900):
+        self.ec2 = uncached(ec2)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self._pending = []
+        self._delay = initial_delay
+        self._thread = None
+        self._wakeup = threading.Condition()
+
+    def wait_for(self, kind, resource_id, target, timeout=None):
+        """Return a Future resolved with the resource (or None once deleted) when it reaches target."""
+        if kind not in WAIT_TYPES:
+            raise ValueError(f"Cannot wait on {kind}; supported: {sorted(WAIT_TYPES)}")
+        pending = _Pending(kind, resource_id, target, time.monotonic() + (timeout or self.timeout))
+        with self._wakeup:
+            self._pending.append(pending)
+            self._delay = self.initial_delay
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vpc-builder-waiter", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return pending.future
+
+    def wait_all(self, kind, resource_ids, target, timeout=None):
+        """Block until every resource reaches target; raises the first failure."""
+        futures = [self.wait_for(kind, resource_id, target, timeout) for resource_id in resource_ids]
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                if not self._pending:
+                    self._thread = None
+                    return
+                batch = list(self._pending)
+
+            changed = self._poll(batch)
+
+            with self._wakeup:
+                self._pending = [p for p in self._pending if not p.future.done()]
+                if not self._pending:
+                    continue
+                self._delay = self.initial_delay if changed else min(self._delay * self.backoff, self.max_delay)
+                self._wakeup.wait(self._delay)
+
+    def _poll(self, batch):
+        """One describe per resource type for the whole batch. Returns True if anything resolved."""
+        changed = False
+        by_kind = {}
+        for pending in batch:
+            by_kind.setdefault(pending.kind, []).append(pending)
+
+        for kind, pendings in by_kind.items():
+            operation, result_key, id_key, filter_name, state_of = WAIT_TYPES[kind]
+            ids = sorted({p.resource_id for p in pendings})
+            try:
+                found = {}
+                for i in range(0, len(ids), MAX_FILTER_VALUES):
+                    resp = getattr(self.ec2, operation)(Filters=[{"Name": filter_name, "Values": ids[i:i + MAX_FILTER_VALUES]}])
+                    found.update({r[id_key]: r for r in resp.get(result_key, [])})
+            except Exception as e:
+                for p in pendings:
+                    if time.monotonic() > p.deadline:
+                        p.future.set_exception(e)
+                        changed = True
+                continue
+
+            for p in pendings:
+                resource = found.get(p.resource_id)
+                state = state_of(resource) if resource else "deleted"
+                if state == p.target or (p.target == "deleted" and resource is None):
+                    p.future.set_result(resource)
+                    changed = True
+                elif state in FAILURE_STATES and p.target != "deleted":
+                    p.future.set_exception(WaiterError(f"{p.resource_id} is {state}, expected {p.target}"))
+                    changed = True
+                elif time.monotonic() > p.deadline:
+                    p.future.set_exception(TimeoutError(f"{p.resource_id} still {state}, expected {p.target}"))
+                    changed = True
+        return changed
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_waiter_service(ec2):
+    """The shared WaiterService for this client, so every flow's waits join the same poll stream."""
+    client = uncached(ec2)
+    with _services_lock:
+        if client not in _services:
+            _services[client] = WaiterService(client)
+        return _services[client]
@@ -1,28 +1,143 @@
-from cli.display import show_title
-from cli.prompts import main_menu
-from cli.access import run_access_flow
-from cli.create import run_create_flow
-from cli.modify import run_modify_flow
-from cli.delete import run_delete_flow
+import argparse
+import contextlib
+import sys
+
+from cli.display import console, enable_quiet, show_title, use_stderr
 from cli.aws_client import AWSClient
+from cli.metrics import DEFAULT_TRACE_PATH, enable_metrics, get_metrics, track_flow
+from cli.output import OUTPUT_FORMATS, close_output, enable_output
 
-def main():
-    show_title("🚀 VPC Builder CLI")
-    ec2 = AWSClient.get_ec2_client()  # get EC2 client once
+# Flow modules pull in boto3 and questionary, so they are imported only when a
+# menu entry or command-line mode actually needs them.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="VPC Builder CLI")
+    parser.add_argument("--spec", metavar="FILE", help="build from a YAML/JSON spec file instead of the menus")
+    parser.add_argument("--plan", action="store_true", help="with --spec, show the plan without applying it")
+    parser.add_argument("--scan", action="store_true", help="list VPCs, subnets and gateways across AWS_REGIONS")
+    parser.add_argument("--all-regions", action="store_true", help="with --scan or --bulk-delete, cover every enabled region")
+    parser.add_argument("--bulk-delete", action="store_true", help="delete every VPC matching --tag, --older-than and --name")
+    parser.add_argument("--tag", action="append", metavar="KEY[=VALUE]", help="with --bulk-delete, only VPCs with this tag (repeatable)")
+    parser.add_argument("--older-than", metavar="AGE", help="with --bulk-delete, only VPCs created more than AGE ago (e.g. 12h, 7d)")
+    parser.add_argument("--name", metavar="PATTERN", help="with --bulk-delete, only VPCs whose Name matches PATTERN (e.g. 'ci-*')")
+    parser.add_argument("--region", help="AWS region to use (default: AWS_REGION, then the profile, then a prompt)")
+    parser.add_argument("--aws-profile", help="named AWS profile to use")
+    parser.add_argument("--yes", action="store_true", help="apply without asking for confirmation")
+    parser.add_argument("--quiet", action="store_true", help="no progress or info output, only warnings, errors and final summaries")
+    parser.add_argument("--output", choices=OUTPUT_FORMATS, default="text",
+                        help="also write listed resources and create/delete results to stdout as NDJSON or a JSON array; "
+                             "everything else goes to stderr")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="keep the last listed VPCs (full describe output, including tags and CIDRs) in "
+                             "~/.vpc-builder/inventory.db and show them while refreshing")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_TRACE_PATH, metavar="TRACE_FILE",
+                        help=f"time every AWS call, print a summary at exit and write a Chrome trace (default {DEFAULT_TRACE_PATH})")
+    return parser.parse_args(argv)
+
+def run_spec_file(args):
+    from cli.spec import load_spec, run_spec
+
+    try:
+        spec = load_spec(args.spec)
+    except (OSError, ValueError) as e:
+        console.print(f"Could not read spec {args.spec}: {e}")
+        return
+    if spec and spec.get("region") and not args.region:
+        AWSClient.use_region(spec["region"])
+    run_spec(AWSClient.get_ec2_client(), spec, plan_only=args.plan, assume_yes=args.yes)
+
+def run_bulk_delete_mode(args):
+    from cli.bulk_delete import parse_age, parse_tag_filters, run_bulk_delete
+    from cli.prompts import confirm_action
+
+    try:
+        older_than = parse_age(args.older_than) if args.older_than else None
+    except ValueError as e:
+        console.print(e)
+        return
+    if args.all_regions:
+        from cli.scan import enabled_regions
+        regions = enabled_regions()
+    else:
+        regions = [AWSClient.get_session().region_name]
+    run_bulk_delete(regions, parse_tag_filters(args.tag), older_than, args.name,
+                    assume_yes=args.yes, confirm=confirm_action)
+
+def run_menu():
+    from cli.prompts import main_menu
 
     while True:
         choice = main_menu()
         if choice == "Access":
-            run_access_flow()
+            from cli.access import run_access_flow
+            with track_flow("run_access_flow"):
+                run_access_flow()
         elif choice == "Create":
-            run_create_flow()
+            from cli.create import run_create_flow
+            with track_flow("run_create_flow"):
+                run_create_flow()
         elif choice == "Modify":
-            run_modify_flow()
+            from cli.modify import run_modify_flow
+            with track_flow("run_modify_flow"):
+                run_modify_flow()
         elif choice == "Delete":
-            run_delete_flow(ec2)
+            from cli.delete import run_delete_flow
+            with track_flow("run_delete_flow"):
+                run_delete_flow(AWSClient.get_ec2_client())
         elif choice == "Exit":
-            print("Goodbye 👋")
+            console.print("Goodbye 👋")
             break
 
+def show_profile(trace_path):
+    metrics = get_metrics()
+    metrics.render()
+    metrics.export_chrome_trace(trace_path)
+    console.print(f"Chrome trace written to {trace_path} (open it in chrome://tracing or ui.perfetto.dev)")
+
+def prompts_on_terminal():
+    """
+    With stdout piped into another tool, draw questionary prompts on the
+    terminal (stderr) instead, so they don't end up in the records.
+    """
+    if sys.stdout.isatty():
+        return contextlib.nullcontext()
+    from prompt_toolkit.application import create_app_session
+    from prompt_toolkit.output import create_output
+    return create_app_session(output=create_output(always_prefer_tty=True))
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.output != "text":
+        enable_output(args.output)
+        use_stderr()
+    if args.profile:
+        enable_metrics()
+    if args.quiet:
+        enable_quiet()
+    if args.snapshot:
+        from cli.snapshot import enable_snapshot
+        enable_snapshot()
+    AWSClient.configure(profile=args.aws_profile, region=args.region)
+    show_title("🚀 VPC Builder CLI")
+
+    try:
+        with prompts_on_terminal():
+            if args.spec:
+                with track_flow("run_spec"):
+                    run_spec_file(args)
+            elif args.bulk_delete:
+                with track_flow("run_bulk_delete"):
+                    run_bulk_delete_mode(args)
+            elif args.scan:
+                from cli.scan import run_scan
+                with track_flow("run_scan"):
+                    run_scan(all_regions=args.all_regions)
+            else:
+                run_menu()
+    finally:
+        if args.profile:
+            show_profile(args.profile)
+        close_output()
+
 if __name__ == "__main__":
     main()
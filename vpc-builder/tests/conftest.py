@@ -0,0 +1,10 @@
+import pytest
+
+import cli.cidr_index as cidr_index_module
+
+
+@pytest.fixture(autouse=True)
+def isolated_cidr_index(tmp_path, monkeypatch):
+    """Keep every test off the developer's ~/.vpc-builder/cidr-index.json and the index loaded by other tests."""
+    monkeypatch.setattr(cidr_index_module, "CIDR_INDEX_PATH", str(tmp_path / "cidr-index.json"))
+    monkeypatch.setattr(cidr_index_module, "_index", None)
@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from cli.async_core import AsyncCore, prefetch
+from cli.cache import CachingEC2Client
+
+
+def test_run_all_preserves_order_and_returns_exceptions():
+    core = AsyncCore(max_workers=4)
+
+    def boom():
+        raise ValueError("nope")
+
+    results = core.run_all([lambda: 1, boom, lambda: 3])
+
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 3
+
+
+def test_gather_limited_caps_concurrency():
+    core = AsyncCore(max_workers=8)
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def work():
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+
+    core.run_all([work] * 10, limit=3)
+
+    assert active["peak"] <= 3
+
+
+def test_prefetch_warms_the_describe_cache():
+    client = MagicMock()
+    client.describe_subnets.return_value = {"Subnets": [{"SubnetId": "subnet-1"}]}
+    ec2 = CachingEC2Client(client)
+
+    prefetch(lambda: ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}])).result(5)
+    ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}])
+
+    assert client.describe_subnets.call_count == 1
+
+
+def test_run_stream_starts_calls_before_the_source_is_exhausted():
+    core = AsyncCore(max_workers=4)
+    first_done = threading.Event()
+
+    def source():
+        yield first_done.set
+        # Like a paginator fetching page two: the first call is already running.
+        assert first_done.wait(2)
+        yield lambda: 2
+
+    assert core.run_stream(source()) == [None, 2]
+
+
+def test_gateway_deletes_start_before_the_listing_finishes():
+    from unittest.mock import MagicMock
+
+    from cli.delete import delete_internet_gateways_in_vpc
+
+    first_deleted = threading.Event()
+    ec2 = MagicMock()
+    ec2.can_paginate.return_value = True
+    ec2.delete_internet_gateway.side_effect = lambda InternetGatewayId: first_deleted.set()
+
+    def pages(**kwargs):
+        yield {"InternetGateways": [{"InternetGatewayId": "igw-1"}]}
+        # Page two is only requested once the first gateway is already gone.
+        assert first_deleted.wait(2)
+        yield {"InternetGateways": [{"InternetGatewayId": "igw-2"}]}
+
+    ec2.get_paginator.return_value.paginate.side_effect = pages
+    delete_internet_gateways_in_vpc(ec2, "vpc-1")
+
+    assert ec2.delete_internet_gateway.call_count == 2
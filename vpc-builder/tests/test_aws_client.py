@@ -0,0 +1,56 @@
+import os
+import threading
+from unittest.mock import patch
+
+from cli.aws_client import ClientPool, region_codes, select_region
+
+CREDENTIALS = {"AWS_ACCESS_KEY_ID": "x", "AWS_SECRET_ACCESS_KEY": "y", "AWS_CONFIG_FILE": os.devnull}
+
+
+def test_pool_reuses_clients_per_profile_region_and_service():
+    pool = ClientPool(max_connections=7)
+    with patch.dict(os.environ, CREDENTIALS):
+        east = pool.get("ec2", "us-east-1")
+        assert pool.get("ec2", "us-east-1") is east
+        assert pool.get("ec2", "eu-west-1") is not east
+        sts = pool.get("sts", "us-east-1")
+
+    assert east.client.meta.config.max_pool_connections == 7
+    assert east.client.meta.region_name == "us-east-1"
+    assert sts.meta.service_model.service_name == "sts"
+
+
+def test_pool_is_safe_to_use_from_many_threads():
+    pool = ClientPool()
+    clients, sessions = [], []
+
+    def worker():
+        clients.append(pool.get("ec2", "us-west-2"))
+        sessions.append(pool.session())
+
+    with patch.dict(os.environ, CREDENTIALS):
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert len({id(c) for c in clients}) == 1
+    assert len({id(s) for s in sessions}) == 8
+
+
+def test_region_codes_skip_custom_entry():
+    codes = region_codes()
+    assert "us-east-1" in codes
+    assert all(" " not in code for code in codes)
+
+
+def test_empty_custom_region_warns_without_writing_to_stdout(capsys):
+    with patch("questionary.select") as select, patch("questionary.text") as text, \
+         patch("cli.display.show_warning") as warning:
+        select.return_value.ask.return_value = "Custom Region"
+        text.return_value.ask.return_value = "  "
+        assert select_region() == "us-east-1"
+
+    warning.assert_called_once_with("Empty input, defaulting to us-east-1")
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import cli.cidr_index as cidr_index_module
+from benchmarks.bench_flows import SCENARIOS, run_scenario
+from benchmarks.fake_ec2 import FakeEC2, synthetic_vpc
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_every_scenario_runs_to_completion(scenario, tmp_path):
+    result = run_scenario(scenario, 10, state_dir=str(tmp_path))
+
+    assert result["unanswered_prompts"] == 0
+    assert result["api_calls"] == sum(result["calls_by_operation"].values()) > 0
+    assert result["peak_memory_kb"] > 0
+
+
+def test_delete_scenario_removes_the_vpc(tmp_path):
+    result = run_scenario("delete_entire_vpc", 10, state_dir=str(tmp_path))
+
+    assert result["calls_by_operation"]["delete_subnet"] == 10
+    assert result["calls_by_operation"]["delete_vpc"] == 1
+
+
+def test_scenarios_leave_the_state_directory_and_environment_alone(tmp_path, monkeypatch):
+    user_index = tmp_path / "user" / "cidr-index.json"
+    monkeypatch.setattr(cidr_index_module, "CIDR_INDEX_PATH", str(user_index))
+    monkeypatch.delenv("VPC_BUILDER_CIDR_REGIONS", raising=False)
+    run_scenario("create_subnet_flow", 10, state_dir=str(tmp_path))
+
+    assert not user_index.exists()
+    assert (tmp_path / "cidr-index.json").exists()
+    assert "VPC_BUILDER_CIDR_REGIONS" not in os.environ
+
+
+def test_fake_rejects_deleting_a_vpc_with_dependencies():
+    from botocore.exceptions import ClientError
+
+    fake = FakeEC2()
+    vpc_id = synthetic_vpc(fake, 3)
+    with pytest.raises(ClientError):
+        fake.delete_vpc(VpcId=vpc_id)
+
+
+def test_fake_throttles_over_its_rate():
+    fake = FakeEC2(rate=2, retry_delay=0.01)
+    for _ in range(3):
+        fake.describe_vpcs()
+    assert fake.throttled > 0
@@ -0,0 +1,95 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.fake_ec2 import FakeEC2, synthetic_vpc
+from cli import bulk_delete
+from cli.bulk_delete import matches, parse_age, parse_tag_filters, vpc_age
+from cli.helpers import TIMESTAMP_FORMAT, tag_specifications
+
+
+def created(seconds_ago):
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(time.time() - seconds_ago))
+
+
+def tagged(ec2, name, cidr, **tags):
+    vpc_id = synthetic_vpc(ec2, 2, cidr=cidr, name=name)
+    ec2.create_tags(Resources=[vpc_id], Tags=[{"Key": k.replace("_", "-"), "Value": v} for k, v in tags.items()])
+    return vpc_id
+
+
+def test_parsers():
+    assert parse_age("90m") == 5400
+    assert parse_age("2") == 7200
+    assert parse_age("7d") == 604800
+    with pytest.raises(ValueError):
+        parse_age("soon")
+    assert parse_tag_filters(["env=test,ephemeral", "team = ci"]) == {"env": "test", "ephemeral": None, "team": "ci"}
+
+
+def test_created_at_tag_gives_the_age():
+    tags = tag_specifications("vpc", "ci-1")[0]["Tags"]
+    assert vpc_age({"Tags": tags}) < 5
+    assert vpc_age({"Tags": []}) is None
+
+
+def test_matches_every_filter_and_never_default_vpcs():
+    vpc = {"Tags": [{"Key": "Name", "Value": "ci-42"}, {"Key": "env", "Value": "test"},
+                    {"Key": "created-at", "Value": created(3 * 3600)}]}
+
+    assert matches(vpc, tags={"env": "test"}, older_than=3600, name_pattern="ci-*")
+    assert matches(vpc, tags={"env": None})
+    assert not matches(vpc, tags={"env": "prod"})
+    assert not matches(vpc, older_than=4 * 3600)
+    assert not matches(vpc, name_pattern="prod-*")
+    assert not matches({**vpc, "IsDefault": True}, tags={"env": "test"})
+    # Without a created-at tag the age is unknown, so an age filter never selects it.
+    assert not matches({"Tags": [{"Key": "env", "Value": "test"}]}, older_than=60)
+
+
+def test_bulk_delete_across_regions_with_a_per_region_cap():
+    fakes = {"r-1": FakeEC2("r-1", latency=0.01), "r-2": FakeEC2("r-2", latency=0.01)}
+    doomed = [
+        tagged(fakes["r-1"], "ci-1", "10.1.0.0/16", env="test", created_at=created(7200)),
+        tagged(fakes["r-1"], "ci-2", "10.2.0.0/16", env="test", created_at=created(7200)),
+        tagged(fakes["r-1"], "ci-3", "10.3.0.0/16", env="test", created_at=created(7200)),
+        tagged(fakes["r-2"], "ci-4", "10.4.0.0/16", env="test", created_at=created(7200)),
+    ]
+    young = tagged(fakes["r-1"], "ci-5", "10.5.0.0/16", env="test", created_at=created(60))
+    prod = tagged(fakes["r-2"], "prod", "10.6.0.0/16", env="prod", created_at=created(7200))
+
+    running, peak, lock = {}, {}, threading.Lock()
+    real_teardown = bulk_delete.teardown_vpc
+
+    def counting_teardown(ec2, vpc_id, **kwargs):
+        region = ec2.meta.region_name
+        with lock:
+            running[region] = running.get(region, 0) + 1
+            peak[region] = max(peak.get(region, 0), running[region])
+        try:
+            return real_teardown(ec2, vpc_id, **kwargs)
+        finally:
+            with lock:
+                running[region] -= 1
+
+    with patch("cli.bulk_delete.AWSClient.get_regional_client", side_effect=fakes.__getitem__), \
+         patch("cli.bulk_delete.teardown_vpc", counting_teardown), \
+         patch("cli.preflight.current_principal", return_value="arn:aws:iam::123456789012:user/ci"), \
+         patch("cli.bulk_delete.show_table"):
+        targets, errors = bulk_delete.select_vpcs(["r-1", "r-2"], {"env": "test"}, older_than=3600)
+        assert errors == {}
+        assert sorted(t["VpcId"] for t in targets) == sorted(doomed)
+
+        outcomes = bulk_delete.bulk_teardown(targets, per_region=2)
+
+    assert [o["Status"] for o in outcomes] == ["deleted"] * 4
+    assert peak["r-1"] <= 2
+    assert set(fakes["r-1"].vpcs) == {young}
+    assert set(fakes["r-2"].vpcs) == {prod}
+
+
+def test_bulk_delete_needs_a_filter():
+    with pytest.raises(ValueError):
+        bulk_delete.select_vpcs(["r-1"])
@@ -0,0 +1,170 @@
+from unittest.mock import MagicMock
+
+from cli.cache import CachingEC2Client, cache_key
+from cli.helpers import iter_vpc_resources
+
+
+def test_describe_results_are_cached_by_normalized_filters():
+    client = MagicMock()
+    client.describe_subnets.return_value = {"Subnets": [{"SubnetId": "subnet-1"}]}
+    ec2 = CachingEC2Client(client)
+
+    first = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}, {"Name": "state", "Values": ["available"]}])
+    second = ec2.describe_subnets(Filters=[{"Name": "state", "Values": ["available"]}, {"Name": "vpc-id", "Values": ["vpc-1"]}])
+
+    assert first == second
+    assert client.describe_subnets.call_count == 1
+
+
+def test_mutation_invalidates_only_related_describes():
+    client = MagicMock()
+    ec2 = CachingEC2Client(client)
+
+    ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}])
+    ec2.describe_internet_gateways(Filters=[{"Name": "attachment.vpc-id", "Values": ["vpc-1"]}])
+    ec2.create_subnet(VpcId="vpc-1", CidrBlock="10.0.1.0/24")
+    ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}])
+    ec2.describe_internet_gateways(Filters=[{"Name": "attachment.vpc-id", "Values": ["vpc-1"]}])
+
+    assert client.describe_subnets.call_count == 2
+    assert client.describe_internet_gateways.call_count == 1
+
+
+def test_create_tags_invalidates_by_resource_id_prefix():
+    client = MagicMock()
+    ec2 = CachingEC2Client(client)
+
+    ec2.describe_route_tables()
+    ec2.describe_subnets()
+    ec2.create_tags(Resources=["rtb-123"], Tags=[{"Key": "Name", "Value": "public"}])
+    ec2.describe_route_tables()
+    ec2.describe_subnets()
+
+    assert client.describe_route_tables.call_count == 2
+    assert client.describe_subnets.call_count == 1
+
+
+def test_dry_run_does_not_invalidate():
+    client = MagicMock()
+    ec2 = CachingEC2Client(client)
+
+    ec2.describe_subnets()
+    ec2.delete_subnet(SubnetId="subnet-1", DryRun=True)
+    ec2.describe_subnets()
+
+    assert client.describe_subnets.call_count == 1
+
+
+def test_paginated_describes_are_replayed_from_cache():
+    client = MagicMock()
+    client.get_paginator.return_value.paginate.return_value = [{"Vpcs": [{"VpcId": "vpc-1"}]}, {"Vpcs": []}]
+    ec2 = CachingEC2Client(client)
+
+    assert list(ec2.get_paginator("describe_vpcs").paginate()) == list(ec2.get_paginator("describe_vpcs").paginate())
+    assert client.get_paginator.return_value.paginate.call_count == 1
+
+
+def test_callers_cannot_change_cached_responses():
+    client = MagicMock()
+    client.describe_subnets.return_value = {"Subnets": [{"SubnetId": "subnet-1"}]}
+    client.get_paginator.return_value.paginate.return_value = [{"Vpcs": [{"VpcId": "vpc-1"}]}]
+    ec2 = CachingEC2Client(client)
+
+    ec2.describe_subnets()["Subnets"].clear()
+    for page in ec2.get_paginator("describe_vpcs").paginate():
+        page["Vpcs"][0]["VpcId"] = "changed"
+
+    assert ec2.describe_subnets() == {"Subnets": [{"SubnetId": "subnet-1"}]}
+    assert list(ec2.get_paginator("describe_vpcs").paginate()) == [{"Vpcs": [{"VpcId": "vpc-1"}]}]
+    assert client.describe_subnets.call_count == 1
+
+
+def test_lru_eviction():
+    client = MagicMock()
+    ec2 = CachingEC2Client(client, max_entries=2)
+
+    ec2.describe_subnets(SubnetIds=["subnet-1"])
+    ec2.describe_subnets(SubnetIds=["subnet-2"])
+    ec2.describe_subnets(SubnetIds=["subnet-3"])
+    ec2.describe_subnets(SubnetIds=["subnet-1"])
+
+    assert client.describe_subnets.call_count == 4
+    assert cache_key("describe_subnets", {"SubnetIds": ["b", "a"]}) == cache_key("describe_subnets", {"SubnetIds": ["a", "b"]})
+
+
+def test_concurrent_identical_describes_share_one_request():
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_describe(**kwargs):
+        started.set()
+        release.wait(5)
+        return {"Subnets": []}
+
+    client = MagicMock()
+    client.describe_subnets.side_effect = slow_describe
+    ec2 = CachingEC2Client(client)
+
+    background = threading.Thread(target=ec2.describe_subnets, kwargs={"Filters": [{"Name": "vpc-id", "Values": ["vpc-1"]}]})
+    background.start()
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    result = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": ["vpc-1"]}])
+    background.join(5)
+
+    assert result == {"Subnets": []}
+    assert client.describe_subnets.call_count == 1
+
+
+def test_listing_joins_a_prefetch_that_is_still_paginating():
+    import threading
+
+    first_page, release = threading.Event(), threading.Event()
+
+    def pages(**kwargs):
+        yield {"Subnets": [{"SubnetId": "subnet-1"}]}
+        first_page.set()
+        release.wait(5)
+        yield {"Subnets": [{"SubnetId": "subnet-2"}]}
+
+    client = MagicMock()
+    client.can_paginate.return_value = True
+    client.get_paginator.return_value.paginate.side_effect = pages
+    ec2 = CachingEC2Client(client)
+
+    prefetched = []
+    background = threading.Thread(
+        target=lambda: prefetched.extend(iter_vpc_resources(ec2, "describe_subnets", "Subnets", "vpc-1")))
+    background.start()
+    first_page.wait(5)
+    threading.Timer(0.05, release.set).start()
+    listed = list(iter_vpc_resources(ec2, "describe_subnets", "Subnets", "vpc-1"))
+    background.join(5)
+
+    assert listed == prefetched == [{"SubnetId": "subnet-1"}, {"SubnetId": "subnet-2"}]
+    assert client.get_paginator.return_value.paginate.call_count == 1
+
+
+def test_listing_goes_on_alone_when_the_owner_abandons_its_pages(monkeypatch):
+    import threading
+
+    from cli import cache
+
+    monkeypatch.setattr(cache, "IN_FLIGHT_PAGE_WAIT", 0.05)
+    client = MagicMock()
+    client.get_paginator.return_value.paginate.side_effect = lambda **kwargs: iter([{"Vpcs": [1]}, {"Vpcs": [2]}])
+    ec2 = CachingEC2Client(client)
+
+    # A picker that breaks after the first page and keeps its generator suspended.
+    abandoned = ec2.get_paginator("describe_vpcs").paginate()
+    next(abandoned)
+    listed = []
+    follower = threading.Thread(target=lambda: listed.extend(ec2.get_paginator("describe_vpcs").paginate()))
+    follower.start()
+    follower.join(5)
+
+    assert not follower.is_alive()
+    assert listed == [{"Vpcs": [1]}, {"Vpcs": [2]}]
+    # The same thread paginating again doesn't wait on its own suspended generator either.
+    assert list(ec2.get_paginator("describe_vpcs").paginate()) == listed
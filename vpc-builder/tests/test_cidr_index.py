@@ -0,0 +1,140 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import cli.cidr_index as cidr_index_module
+from cli.cidr_index import CidrIndex, build_cidr_index, forget_cidr, get_cidr_index
+from cli.create import validate_cidr
+
+
+def sample_index():
+    index = CidrIndex(["us-east-1", "eu-west-1"])
+    index.add("10.0.0.0/16", "vpc", "vpc-a", "vpc-a", "us-east-1")
+    index.add("10.50.0.0/16", "vpc", "vpc-a", "vpc-a", "us-east-1")
+    index.add("10.1.0.0/16", "vpc", "vpc-b", "vpc-b", "eu-west-1")
+    index.add("10.0.1.0/24", "subnet", "subnet-1", "vpc-a", "us-east-1")
+    return index
+
+
+def test_vpc_overlaps_cover_nested_and_containing_blocks():
+    index = sample_index()
+
+    assert [e["id"] for e in index.vpc_overlaps("10.0.4.0/22")] == ["vpc-a"]
+    assert {e["id"] for e in index.vpc_overlaps("10.0.0.0/8")} == {"vpc-a", "vpc-b"}
+    assert index.vpc_overlaps("172.16.0.0/12") == []
+    assert index.problems("10.50.1.0/24") == ["overlaps vpc-a 10.50.0.0/16 in us-east-1"]
+
+
+def test_subnet_checks_stay_within_the_vpc():
+    index = sample_index()
+
+    assert index.problems("10.0.2.0/24", "vpc-a") == []
+    assert index.problems("10.50.2.0/24", "vpc-a") == []
+    assert index.problems("10.0.1.128/25", "vpc-a") == ["overlaps subnet subnet-1 10.0.1.0/24"]
+    assert index.problems("10.9.0.0/24", "vpc-a")[0].startswith("is outside vpc-a")
+
+
+def test_validate_cidr_consults_the_index():
+    index = sample_index()
+
+    assert validate_cidr("10.2.0.0/16", index)
+    assert not validate_cidr("10.1.0.0/20", index)
+    assert not validate_cidr("10.0.1.0/24", index, "vpc-a")
+    assert not validate_cidr("not-a-cidr", index)
+
+
+def test_round_trip_through_disk(tmp_path):
+    path = str(tmp_path / "index.json")
+    sample_index().save(path)
+    loaded = CidrIndex.load(path)
+
+    assert len(loaded) == 4
+    assert loaded.regions == ["eu-west-1", "us-east-1"]
+    assert [e["id"] for e in loaded.vpc_overlaps("10.1.2.0/24")] == ["vpc-b"]
+
+
+def test_queries_scale_to_large_orgs():
+    index = CidrIndex(["us-east-1"])
+    for i in range(20000):
+        index.add(f"10.{i // 256}.{i % 256}.0/24", "vpc", f"vpc-{i}", f"vpc-{i}", "us-east-1")
+    index.vpc_overlaps("192.168.0.0/16")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        assert len(index.vpc_overlaps(f"10.{i % 78}.{i % 256}.0/24")) == 1
+    assert time.perf_counter() - start < 0.5
+
+
+def test_a_wide_block_at_the_front_does_not_slow_queries():
+    index = CidrIndex(["us-east-1"])
+    index.add("10.0.0.0/8", "vpc", "vpc-org", "vpc-org", "us-east-1")
+    for i in range(20000):
+        index.add(f"10.{i // 256}.{i % 256}.0/24", "vpc", f"vpc-{i}", f"vpc-{i}", "us-east-1")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        found = {e["id"] for e in index.vpc_overlaps(f"10.{70 + i % 8}.{i % 256}.0/24")}
+        assert found == {"vpc-org", f"vpc-{(70 + i % 8) * 256 + i % 256}"}
+    assert time.perf_counter() - start < 0.5
+    assert index.remove(["vpc-org"]) == 1
+    assert [e["id"] for e in index.vpc_overlaps("10.1.2.0/24")] == ["vpc-258"]
+
+
+def test_build_reads_secondary_cidrs():
+    ec2 = MagicMock()
+    ec2.can_paginate.return_value = True
+    pages = {
+        "describe_vpcs": [{"Vpcs": [{"VpcId": "vpc-a", "CidrBlock": "10.0.0.0/16", "CidrBlockAssociationSet": [
+            {"CidrBlock": "10.0.0.0/16", "CidrBlockState": {"State": "associated"}},
+            {"CidrBlock": "100.64.0.0/16", "CidrBlockState": {"State": "associated"}},
+            {"CidrBlock": "10.9.0.0/16", "CidrBlockState": {"State": "disassociated"}},
+        ]}]}],
+        "describe_subnets": [{"Subnets": [{"SubnetId": "subnet-1", "VpcId": "vpc-a", "CidrBlock": "100.64.1.0/24"}]}],
+    }
+    ec2.get_paginator.side_effect = lambda op: MagicMock(**{"paginate.return_value": pages[op]})
+    with patch("cli.cidr_index.AWSClient.get_regional_client", return_value=ec2):
+        index, errors = build_cidr_index(["us-east-1"])
+
+    assert errors == {}
+    assert index.problems("100.64.0.0/20")
+    assert not index.problems("10.9.0.0/16")
+    assert index.problems("100.64.1.0/24", "vpc-a") == ["overlaps subnet subnet-1 100.64.1.0/24"]
+
+
+def test_fresh_index_on_disk_is_reused():
+    fresh = sample_index()
+    with patch.object(cidr_index_module, "_index", None), \
+         patch.object(CidrIndex, "load", return_value=fresh), \
+         patch("cli.cidr_index.configured_regions", return_value=["us-east-1"]), \
+         patch("cli.cidr_index.build_cidr_index") as build:
+        assert get_cidr_index(["eu-west-1"]) is fresh
+
+    build.assert_not_called()
+
+
+def test_deleted_resources_free_their_cidrs():
+    index = sample_index()
+    index.save()
+    with patch.object(cidr_index_module, "_index", None):
+        forget_cidr("subnet-1")
+        assert not cidr_index_module._index.problems("10.0.1.0/24", "vpc-a")
+
+        forget_cidr("vpc-a")
+        assert not validate_cidr("10.1.0.0/20", cidr_index_module._index)
+        assert validate_cidr("10.50.0.0/16", cidr_index_module._index)
+
+    # The deletes survive a restart.
+    assert [e["id"] for e in CidrIndex.load()._entries] == ["vpc-b"]
+
+
+def test_regions_that_failed_to_load_are_not_saved_as_covered():
+    partial = sample_index()
+    with patch.object(cidr_index_module, "_index", None), \
+         patch.object(CidrIndex, "load", return_value=None), \
+         patch("cli.cidr_index.configured_regions", return_value=["us-east-1", "eu-west-1"]), \
+         patch("cli.cidr_index.build_cidr_index", return_value=(partial, {"eu-west-1": "AccessDenied"})), \
+         patch("cli.cidr_index.show_warning") as warning:
+        index = get_cidr_index()
+
+    assert index.regions == ["us-east-1"]
+    assert "eu-west-1" in warning.call_args.args[0]
+    assert index.is_stale(["eu-west-1"])
@@ -1,23 +1,40 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from cli.create import create_vpc_flow, run_create_flow
+from botocore.exceptions import ClientError
+from cli.create import create_nat_gateway, create_vpc, run_create_flow
 
 def test_run_create_flow_creates_vpc():
     ec2_mock = MagicMock()
-    with patch("cli.create.create_vpc") as mock_create_vpc, \
+    with patch("cli.create.create_vpc_flow") as mock_create_vpc_flow, \
+         patch("cli.create.AWSClient") as mock_client, \
          patch("questionary.select") as mock_select:
 
+        mock_client.get_ec2_client.return_value = ec2_mock
         mock_select.return_value.ask.return_value = "VPC"
-        mock_create_vpc.return_value = None
 
-        run_create_flow(ec2_mock)
+        run_create_flow()
 
-        mock_create_vpc.assert_called_once_with(ec2_mock)
+        mock_create_vpc_flow.assert_called_once_with(ec2_mock)
 
-def test_create_vpc_success(capsys):
+def test_create_vpc_success():
     ec2_mock = MagicMock()
-    create_vpc_flow = {"Vpc": {"VpcId": "vpc-1234"}}
+    ec2_mock.create_vpc.return_value = {"Vpc": {"VpcId": "vpc-1234"}}
 
-    create_vpc_flow(ec2_mock)
-    captured = capsys.readouterr()
-    assert "VPC created with ID: vpc-1234" in captured.out
+    with patch("cli.create.AWSClient"), patch("cli.create.remember_cidr"):
+        vpc_id = create_vpc(ec2_mock, "10.0.0.0/16", "dev")
+
+    assert vpc_id == "vpc-1234"
+    assert ec2_mock.create_vpc.call_args.kwargs["CidrBlock"] == "10.0.0.0/16"
+
+
+def test_create_nat_gateway_releases_the_eip_when_creation_fails():
+    ec2_mock = MagicMock()
+    ec2_mock.allocate_address.return_value = {"AllocationId": "eipalloc-1"}
+    ec2_mock.create_nat_gateway.side_effect = ClientError(
+        {"Error": {"Code": "InvalidSubnetID.NotFound", "Message": "no such subnet"}}, "CreateNatGateway"
+    )
+
+    with pytest.raises(ClientError):
+        create_nat_gateway(ec2_mock, "subnet-missing")
+
+    ec2_mock.release_address.assert_called_once_with(AllocationId="eipalloc-1")
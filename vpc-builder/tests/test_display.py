@@ -15,3 +15,29 @@ def test_show_failure(capsys):
     display.show_failure("Failure message")
     captured = capsys.readouterr()
     assert "Failure message" in captured.out
+
+def test_bulk_progress_keeps_a_bounded_window_and_summarizes(capsys):
+    with display.BulkProgress("Deleting subnets", total=500) as progress:
+        for i in range(500):
+            progress.start(f"subnet-{i}")
+            if i % 100 == 0:
+                progress.failed(f"subnet-{i}", "DependencyViolation")
+            else:
+                progress.done(f"subnet-{i}")
+        assert len(progress._rows) <= display.MAX_LIVE_ROWS
+
+    out = capsys.readouterr().out
+    assert "495 ok" in out and "5 failed" in out
+    assert "subnet-400" in out and "subnet-399" not in out
+
+def test_quiet_mode_prints_only_the_summary(capsys, monkeypatch):
+    monkeypatch.setattr(display, "_quiet", True)
+    display.show_info("hidden")
+    display.show_success("hidden too")
+    with display.BulkProgress("Deleting route tables", total=1) as progress:
+        progress.done("rtb-1")
+    display.show_failure("still shown")
+
+    out = capsys.readouterr().out
+    assert "hidden" not in out
+    assert "1 ok" in out and "still shown" in out
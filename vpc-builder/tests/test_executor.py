@@ -0,0 +1,53 @@
+import threading
+
+from cli.executor import FAILED, OK, SKIPPED, TaskGraph
+
+
+def test_tasks_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def record(name):
+        def run():
+            with lock:
+                order.append(name)
+            return name
+        return run
+
+    graph = TaskGraph()
+    graph.add("a", record("a"))
+    graph.add("b", record("b"))
+    graph.add("c", record("c"), deps=["a", "b"])
+    results = graph.run(max_workers=4)
+
+    assert order[-1] == "c"
+    assert all(result.status == OK for result in results.values())
+    assert results["c"].value == "c"
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    graph = TaskGraph()
+    for i in range(3):
+        graph.add(i, barrier.wait)
+
+    results = graph.run(max_workers=3)
+
+    assert all(result.status == OK for result in results.values())
+
+
+def test_failure_skips_dependents_only():
+    def boom():
+        raise RuntimeError("boom")
+
+    graph = TaskGraph()
+    graph.add("bad", boom)
+    graph.add("good", lambda: 1)
+    graph.add("child", lambda: 2, deps=["bad"])
+    graph.add("grandchild", lambda: 3, deps=["child", "good"])
+    results = graph.run()
+
+    assert results["bad"].status == FAILED
+    assert results["good"].status == OK
+    assert results["child"].status == SKIPPED
+    assert results["grandchild"].status == SKIPPED
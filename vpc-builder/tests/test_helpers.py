@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+from cli.helpers import DEFAULT_TAGS, get_name_tag, iter_resources, paginate, tag_specifications
+
+
+def test_tag_specifications_include_defaults_name_and_extra_tags():
+    spec = tag_specifications("subnet", "public-a", {"Type": "public"})
+
+    assert spec[0]["ResourceType"] == "subnet"
+    tags = {t["Key"]: t["Value"] for t in spec[0]["Tags"]}
+    assert tags["Name"] == "public-a"
+    assert tags["Type"] == "public"
+    assert tags["created-by"] == "vpc-builder"
+    assert set(DEFAULT_TAGS) <= set(tags)
+
+
+def test_tag_specifications_without_name():
+    tags = {t["Key"] for t in tag_specifications("elastic-ip")[0]["Tags"]}
+    assert "Name" not in tags
+
+
+def test_get_name_tag():
+    assert get_name_tag({"Tags": [{"Key": "Name", "Value": "dev"}]}) == "dev"
+    assert get_name_tag({}) == ""
+
+
+def test_paginate_falls_back_to_single_call():
+    ec2 = MagicMock()
+    ec2.can_paginate.return_value = False
+    ec2.describe_addresses.return_value = {"Addresses": [{"AllocationId": "eipalloc-1"}]}
+
+    assert list(paginate(ec2, "describe_addresses", "Addresses")) == [{"AllocationId": "eipalloc-1"}]
+
+
+def test_iter_resources_filters_on_the_server_and_follows_every_page():
+    from benchmarks.fake_ec2 import FakeEC2, synthetic_vpc
+
+    ec2 = FakeEC2()
+    vpc_id = synthetic_vpc(ec2, 12)
+    synthetic_vpc(ec2, 3, cidr="10.1.0.0/16", name="other")
+
+    subnets = iter_resources(ec2, "describe_subnets", "Subnets", {"vpc-id": [vpc_id]}, page_size=5)
+    assert next(subnets)["VpcId"] == vpc_id
+    assert ec2.calls["describe_subnets"] == 1  # later pages are fetched only when reached
+    assert len(list(subnets)) == 11
+    assert ec2.calls["describe_subnets"] == 3
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from cli.inventory import VpcInventory, looks_like_vpc_id
+
+
+def make_ec2(*pages):
+    ec2 = MagicMock()
+    ec2.get_paginator.return_value.paginate.return_value = list(pages)
+    return ec2
+
+
+def test_inventory_reads_every_page():
+    ec2 = make_ec2(
+        {"Vpcs": [{"VpcId": "vpc-1", "CidrBlock": "10.0.0.0/16", "Tags": [{"Key": "Name", "Value": "dev"}]}]},
+        {"Vpcs": [{"VpcId": "vpc-2", "CidrBlock": "10.1.0.0/16"}]},
+    )
+    inventory = VpcInventory(ec2)
+
+    assert inventory.vpcs() == [("vpc-1", "dev"), ("vpc-2", "")]
+    ec2.get_paginator.assert_called_once_with("describe_vpcs")
+
+
+def test_inventory_find_by_id_and_name():
+    ec2 = make_ec2({"Vpcs": [
+        {"VpcId": "vpc-0a1b2c3d", "CidrBlock": "10.0.0.0/16", "Tags": [{"Key": "Name", "Value": "prod"}]},
+    ]})
+    inventory = VpcInventory(ec2)
+
+    assert inventory.find("vpc-0a1b2c3d")["CidrBlock"] == "10.0.0.0/16"
+    assert inventory.find("prod")["VpcId"] == "vpc-0a1b2c3d"
+    assert inventory.find("missing") is None
+
+
+def test_vpc_input_is_classified_locally():
+    assert looks_like_vpc_id("vpc-0a1b2c3d")
+    assert looks_like_vpc_id("vpc-0123456789abcdef0")
+    assert not looks_like_vpc_id("vpc-prod")
+    assert not looks_like_vpc_id("prod")
+
+
+def test_inventory_only_refetches_when_stale():
+    ec2 = make_ec2({"Vpcs": [{"VpcId": "vpc-1", "CidrBlock": "10.0.0.0/16"}]})
+    inventory = VpcInventory(ec2, ttl=300)
+
+    inventory.vpcs()
+    inventory.get("vpc-1")
+    assert ec2.get_paginator.return_value.paginate.call_count == 1
+
+    inventory.invalidate()
+    inventory.vpcs()
+    assert ec2.get_paginator.return_value.paginate.call_count == 2
@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.stub import Stubber
+
+from cli.metrics import ApiMetrics
+from cli.throttle import RateLimiter
+
+
+def stubbed_client(metrics):
+    client = boto3.client("ec2", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    metrics.attach(client)
+    return client, Stubber(client)
+
+
+def test_calls_are_recorded_per_flow_and_operation():
+    metrics = ApiMetrics()
+    client, stubber = stubbed_client(metrics)
+    stubber.add_response("describe_vpcs", {"Vpcs": []})
+    stubber.add_response("describe_vpcs", {"Vpcs": []})
+    stubber.add_client_error("delete_vpc", "DependencyViolation")
+
+    with stubber:
+        with metrics.flow("run_delete_flow"):
+            client.describe_vpcs()
+            client.describe_vpcs()
+            try:
+                client.delete_vpc(VpcId="vpc-1")
+            except Exception:
+                pass
+
+    summary = metrics.summary()["run_delete_flow"]
+    assert summary["DescribeVpcs"]["calls"] == 2
+    assert summary["DeleteVpc"]["errors"] == 1
+    assert sum(summary["DescribeVpcs"]["histogram"].values()) == 2
+
+
+def test_throttled_attempts_are_counted():
+    metrics = ApiMetrics()
+    operation = SimpleNamespace(name="DescribeSubnets")
+    throttled = (None, {"Error": {"Code": "RequestLimitExceeded"}})
+
+    assert metrics._needs_retry(response=throttled, operation=operation) is None
+    metrics._needs_retry(response=(None, {}), operation=operation)
+
+    assert metrics.stats[("-", "DescribeSubnets")].throttles == 1
+
+
+def test_chrome_trace_export(tmp_path):
+    metrics = ApiMetrics()
+    client, stubber = stubbed_client(metrics)
+    stubber.add_response("describe_subnets", {"Subnets": []})
+    with stubber, metrics.flow("run_modify_flow"):
+        client.describe_subnets()
+
+    path = metrics.export_chrome_trace(str(tmp_path / "trace.json"))
+    events = json.load(open(path))["traceEvents"]
+
+    assert {e["name"] for e in events} == {"DescribeSubnets", "run_modify_flow"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+
+    def stream(self, **kwargs):
+        yield self._data
+
+
+def test_rate_limiter_wait_is_reported_apart_from_latency():
+    client = boto3.client("ec2", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    RateLimiter(describe_rate=10, describe_burst=1).attach(client)
+    metrics = ApiMetrics()
+    metrics.attach(client)
+    client.meta.events.register("before-send", lambda **kwargs: AWSResponse(
+        "", 200, {}, _Body(b"<DescribeVpcsResponse><vpcSet/></DescribeVpcsResponse>")
+    ))
+
+    client.describe_vpcs()
+    client.describe_vpcs()
+
+    stats = metrics.summary()["-"]["DescribeVpcs"]
+    assert stats["wait_ms"] >= 80
+    assert stats["max_ms"] < 50
@@ -0,0 +1,116 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from cli import output
+from cli.output import RecordWriter, close_output, enable_output, stream_resources
+
+
+@pytest.fixture
+def records():
+    stream = io.StringIO()
+    enable_output("ndjson", stream)
+    yield lambda: [json.loads(line) for line in stream.getvalue().splitlines()]
+    close_output()
+
+
+def test_json_format_is_one_array():
+    stream = io.StringIO()
+    writer = RecordWriter("json", stream)
+    writer.close()
+    assert json.loads(stream.getvalue()) == []
+
+    stream = io.StringIO()
+    writer = RecordWriter("json", stream)
+    writer.write({"id": "a"})
+    writer.write({"id": "b"})
+    writer.close()
+    assert json.loads(stream.getvalue()) == [{"id": "a"}, {"id": "b"}]
+
+
+def test_records_stream_before_the_listing_finishes(records):
+    def pages():
+        yield {"SubnetId": "subnet-1", "Tags": [{"Key": "Name", "Value": "web"}]}
+        # The first record is already out while the next page is being fetched.
+        assert [r["id"] for r in records()] == ["subnet-1"]
+        yield {"SubnetId": "subnet-2"}
+
+    list(stream_resources("subnet", pages(), "SubnetId", "eu-west-1"))
+
+    first, second = records()
+    assert first == {
+        "type": "resource", "resource_type": "subnet", "id": "subnet-1", "name": "web", "region": "eu-west-1",
+        "data": {"SubnetId": "subnet-1", "Tags": [{"Key": "Name", "Value": "web"}]},
+    }
+    assert second["id"] == "subnet-2"
+
+
+def test_list_helpers_emit_resources(records):
+    from cli import modify
+
+    ec2 = MagicMock()
+    ec2.meta.region_name = "eu-west-1"
+    ec2.get_paginator.return_value.paginate.return_value = [{"RouteTables": [{"RouteTableId": "rtb-1"}]},
+                                                            {"RouteTables": [{"RouteTableId": "rtb-2"}]}]
+
+    assert modify.list_vpc_resources(ec2, "vpc-1", "route tables") == [{"RouteTableId": "rtb-1"}, {"RouteTableId": "rtb-2"}]
+    assert [(r["resource_type"], r["id"]) for r in records()] == [("route-table", "rtb-1"), ("route-table", "rtb-2")]
+
+
+def test_create_and_delete_emit_results(records):
+    from cli import create, delete
+
+    ec2 = MagicMock()
+    ec2.meta.region_name = "eu-west-1"
+    ec2.create_route_table.return_value = {"RouteTable": {"RouteTableId": "rtb-new"}}
+    create.create_route_table(ec2, "vpc-1", "private-rt")
+
+    ec2.create_security_group.side_effect = ClientError(
+        {"Error": {"Code": "InvalidGroup.Duplicate", "Message": "already exists"}}, "CreateSecurityGroup")
+    with pytest.raises(ClientError):
+        create.create_security_group(ec2, "vpc-1", "web", "web servers")
+
+    ec2.delete_security_group.side_effect = [None, ClientError(
+        {"Error": {"Code": "DependencyViolation", "Message": "in use"}}, "DeleteSecurityGroup")]
+    delete.delete_resources(
+        [{"GroupId": "sg-1"}, {"GroupId": "sg-2"}, {"GroupId": "sg-default", "GroupName": "default"}],
+        "GroupId", ec2.delete_security_group, skip_condition=lambda sg: sg.get("GroupName") == "default",
+        resource_type="security-group", context=delete.record_context(ec2, "vpc-1"),
+    )
+
+    results = {(r["action"], r["id"]): r for r in records()}
+    assert results[("create", "rtb-new")]["status"] == "ok"
+    assert results[("create", None)]["error"] == "already exists"
+    assert results[("delete", "sg-default")]["status"] == "skipped"
+    assert {results[("delete", sg)]["status"] for sg in ("sg-1", "sg-2")} == {"ok", "failed"}
+    assert {r["vpc_id"] for (action, _), r in results.items() if action == "delete"} == {"vpc-1"}
+
+
+def test_text_output_writes_nothing():
+    enable_output("text")
+    assert not output.machine_output()
+    output.emit_result("delete", "subnet", "subnet-1", "ok")
+    close_output()
+
+
+def test_vpc_records_stream_page_by_page(records):
+    from cli import access
+    from cli.inventory import VpcInventory
+
+    def pages():
+        yield {"Vpcs": [{"VpcId": "vpc-1", "CidrBlock": "10.0.0.0/16", "Tags": [{"Key": "Name", "Value": "prod"}]}]}
+        assert [r["id"] for r in records()] == ["vpc-1"]
+        yield {"Vpcs": [{"VpcId": "vpc-2", "CidrBlock": "10.1.0.0/16"}]}
+
+    ec2 = MagicMock()
+    ec2.meta.region_name = "eu-west-1"
+    ec2.get_paginator.return_value.paginate.side_effect = lambda **kwargs: pages()
+    with patch("cli.access.AWSClient.get_vpc_inventory", return_value=VpcInventory(ec2)):
+        assert access.list_accessible_vpcs(ec2) == [("vpc-1", "prod"), ("vpc-2", "")]
+
+    first, second = records()
+    assert (first["name"], first["data"]["CidrBlock"]) == ("prod", "10.0.0.0/16")
+    assert second["id"] == "vpc-2"
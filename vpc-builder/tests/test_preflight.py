@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from cli.preflight import (
+    ALLOWED, DENIED, UNVERIFIED, MissingPermissions, PermissionCache, check_permissions, require_permissions,
+)
+from cli.teardown import teardown_vpc
+
+PRINCIPAL = "arn:aws:iam::123456789012:user/dev"
+
+
+def error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "op")
+
+
+def make_ec2(denied=(), unverified=()):
+    ec2 = MagicMock()
+    ec2.meta = SimpleNamespace(region_name="us-east-1")
+
+    def dry_run(operation):
+        def call(**kwargs):
+            assert kwargs["DryRun"] is True
+            if operation in denied:
+                raise error("UnauthorizedOperation")
+            if operation in unverified:
+                raise error("InvalidSubnetID.Malformed")
+            raise error("DryRunOperation")
+        return call
+
+    for operation in ("create_vpc", "create_subnet", "create_tags", "delete_subnet", "delete_vpc"):
+        getattr(ec2, operation).side_effect = dry_run(operation)
+    return ec2
+
+
+def test_results_are_classified():
+    ec2 = make_ec2(denied=("create_subnet",), unverified=("create_tags",))
+
+    results = check_permissions(ec2, ["create_vpc", "create_subnet", "create_tags"], principal=PRINCIPAL, cache=PermissionCache())
+
+    assert results == {"create_vpc": ALLOWED, "create_subnet": DENIED, "create_tags": UNVERIFIED}
+
+
+def test_every_missing_permission_is_reported_at_once():
+    ec2 = make_ec2(denied=("create_vpc", "create_subnet"))
+
+    with patch("cli.preflight._cache", PermissionCache()), pytest.raises(MissingPermissions) as excinfo:
+        require_permissions(ec2, ["create_vpc", "create_subnet", "create_tags"], principal=PRINCIPAL)
+
+    assert excinfo.value.denied == ["create_subnet", "create_vpc"]
+    assert "ec2:CreateSubnet, ec2:CreateVpc" in str(excinfo.value)
+
+
+def test_cached_results_cost_no_calls():
+    ec2 = make_ec2()
+    cache = PermissionCache()
+
+    check_permissions(ec2, ["create_vpc", "create_subnet"], principal=PRINCIPAL, cache=cache)
+    check_permissions(ec2, ["create_vpc", "create_subnet"], principal=PRINCIPAL, cache=cache)
+
+    assert ec2.create_vpc.call_count == 1
+    assert ec2.create_subnet.call_count == 1
+
+
+def test_cache_is_keyed_by_principal_and_expires():
+    ec2 = make_ec2()
+    cache = PermissionCache(ttl=0)
+
+    check_permissions(ec2, ["create_vpc"], principal=PRINCIPAL, cache=cache)
+    check_permissions(ec2, ["create_vpc"], principal=PRINCIPAL, cache=cache)
+
+    assert ec2.create_vpc.call_count == 2
+
+
+def test_teardown_preflight_stops_before_any_deletion():
+    ec2 = make_ec2(denied=("delete_subnet",))
+    resources = {"subnets": [{"SubnetId": "subnet-1"}]}
+
+    with patch("cli.teardown.discover_vpc_resources", return_value=resources), \
+         patch("cli.preflight._cache", PermissionCache()), \
+         patch("cli.preflight.current_principal", return_value=PRINCIPAL), \
+         patch("cli.teardown.build_teardown_graph") as build:
+        with pytest.raises(MissingPermissions):
+            teardown_vpc(ec2, "vpc-0a1b2c3d", preflight=True)
+
+    build.assert_not_called()
+
+
+def test_teardown_probes_the_real_resources():
+    ec2 = make_ec2()
+    resources = {"subnets": [{"SubnetId": "subnet-1"}]}
+
+    with patch("cli.teardown.discover_vpc_resources", return_value=resources), \
+         patch("cli.preflight._cache", PermissionCache()), \
+         patch("cli.preflight.current_principal", return_value=PRINCIPAL), \
+         patch("cli.teardown.build_teardown_graph"), patch("cli.teardown.forget_cidr"):
+        teardown_vpc(ec2, "vpc-0a1b2c3d", preflight=True)
+
+    ec2.delete_subnet.assert_called_once_with(DryRun=True, SubnetId="subnet-1")
+    ec2.delete_vpc.assert_called_once_with(DryRun=True, VpcId="vpc-0a1b2c3d")
+
+
+def test_unverified_operations_are_listed_once_and_probed_again_with_other_ids():
+    ec2 = make_ec2(unverified=("delete_subnet",))
+
+    with patch("cli.preflight._cache", PermissionCache()), patch("cli.preflight._reported_unverified", set()), \
+         patch("cli.preflight.show_warning") as warning:
+        require_permissions(ec2, ["delete_subnet", "delete_vpc"], principal=PRINCIPAL)
+        require_permissions(ec2, ["delete_subnet", "delete_vpc"], principal=PRINCIPAL)
+        assert ec2.delete_subnet.call_count == 1
+        require_permissions(ec2, ["delete_subnet"], {"subnet": "subnet-1"}, principal=PRINCIPAL)
+
+    assert warning.call_count == 1
+    assert "ec2:DeleteSubnet" in warning.call_args.args[0]
+    assert "ec2:DeleteVpc" not in warning.call_args.args[0]
+    assert ec2.delete_subnet.call_count == 2
+    assert ec2.delete_vpc.call_count == 1
+
+
+def test_a_call_that_ignores_dry_run_is_never_allowed():
+    ec2 = make_ec2()
+    ec2.create_subnet.side_effect = None
+
+    with patch("cli.preflight.show_warning") as warning:
+        results = check_permissions(ec2, ["create_subnet"], principal=PRINCIPAL, cache=PermissionCache())
+
+    assert results == {"create_subnet": UNVERIFIED}
+    assert "ignored DryRun" in warning.call_args.args[0]
+
+
+def test_subnet_probe_stays_inside_the_vpc():
+    ec2 = make_ec2()
+
+    check_permissions(ec2, ["create_subnet"], {"vpc": "vpc-1", "vpc_cidr": "10.20.0.0/16"},
+                      principal=PRINCIPAL, cache=PermissionCache())
+
+    assert ec2.create_subnet.call_args.kwargs["CidrBlock"] == "10.20.255.240/28"
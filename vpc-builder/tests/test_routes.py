@@ -0,0 +1,106 @@
+import ipaddress
+import random
+from unittest.mock import MagicMock, patch
+
+from cli.routes import RouteResolver
+
+MAIN = {
+    "RouteTableId": "rtb-main",
+    "Associations": [{"Main": True}],
+    "Routes": [
+        {"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local", "State": "active"},
+        {"DestinationCidrBlock": "0.0.0.0/0", "NatGatewayId": "nat-1", "State": "active"},
+    ],
+}
+PUBLIC = {
+    "RouteTableId": "rtb-public",
+    "Associations": [{"SubnetId": "subnet-public"}],
+    "Routes": [
+        {"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local", "State": "active"},
+        {"DestinationCidrBlock": "0.0.0.0/0", "GatewayId": "igw-1", "State": "active"},
+        {"DestinationCidrBlock": "10.4.0.0/16", "TransitGatewayId": "tgw-1", "State": "active"},
+        {"DestinationCidrBlock": "10.4.2.0/24", "VpcPeeringConnectionId": "pcx-old", "State": "blackhole"},
+        {"DestinationCidrBlock": "10.8.0.0/23", "TransitGatewayId": "tgw-1", "State": "active"},
+        {"DestinationCidrBlock": "10.8.0.0/24", "GatewayId": "igw-1", "State": "active"},
+        {"DestinationCidrBlock": "10.8.1.0/24", "GatewayId": "igw-1", "State": "active"},
+        {"DestinationPrefixListId": "pl-123", "GatewayId": "vpce-1", "State": "active"},
+        {"DestinationIpv6CidrBlock": "::/0", "EgressOnlyInternetGatewayId": "eigw-1", "State": "active"},
+    ],
+}
+
+
+def target(route):
+    return route and next(v for k, v in route.items() if k.endswith("Id") and not k.startswith("Destination"))
+
+
+def test_subnets_use_their_association_or_the_main_table():
+    resolver = RouteResolver([MAIN, PUBLIC])
+
+    assert resolver.table_for_subnet("subnet-public") == "rtb-public"
+    assert resolver.table_for_subnet("subnet-other") == "rtb-main"
+    assert target(resolver.resolve("subnet-other", "8.8.8.8")) == "nat-1"
+    assert target(resolver.resolve("subnet-public", "8.8.8.8")) == "igw-1"
+
+
+def test_longest_prefix_wins():
+    resolver = RouteResolver([MAIN, PUBLIC])
+    matches = resolver.resolve_many("subnet-public", ["10.4.2.7", "10.4.3.7", "10.0.1.1", "2001:db8::1"])
+
+    assert matches["10.4.2.7"]["State"] == "blackhole"
+    assert target(matches["10.4.3.7"]) == "tgw-1"
+    assert target(matches["10.0.1.1"]) == "local"
+    assert target(matches["2001:db8::1"]) == "eigw-1"
+
+
+def test_batch_lookup_matches_single_lookups():
+    resolver = RouteResolver([MAIN, PUBLIC])
+    rng = random.Random(7)
+    destinations = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(2000)]
+    destinations += ["10.4.2.1", "10.8.1.255", "10.0.255.255", "0.0.0.0", "255.255.255.255"]
+
+    batch = resolver.resolve_many("subnet-public", destinations)
+
+    for destination in destinations:
+        assert batch[destination] is resolver.resolve("subnet-public", destination)
+
+
+def test_no_match_without_default_route():
+    resolver = RouteResolver([{"RouteTableId": "rtb-a", "Associations": [{"Main": True}], "Routes": [
+        {"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local", "State": "active"},
+    ]}])
+
+    assert resolver.resolve_many("subnet-x", ["192.168.1.1"]) == {"192.168.1.1": None}
+
+
+def test_audit_finds_blackholes_and_shadowed_routes():
+    resolver = RouteResolver([MAIN, PUBLIC])
+
+    assert [r["DestinationCidrBlock"] for _, r in resolver.blackholes()] == ["10.4.2.0/24"]
+    assert [(rt, r["DestinationCidrBlock"]) for rt, r in resolver.shadowed()] == [("rtb-public", "10.8.0.0/23")]
+
+
+def test_check_new_route():
+    resolver = RouteResolver([MAIN, PUBLIC])
+
+    assert resolver.check_new_route("rtb-main", "172.16.0.0/12", "tgw-1") == []
+    assert "already routes" in resolver.check_new_route("rtb-public", "0.0.0.0/0", "igw-1")[0]
+    assert "never be used" in resolver.check_new_route("rtb-public", "10.8.0.0/23", "tgw-2")[1]
+    assert "blackhole route" in resolver.check_new_route("rtb-main", "192.168.0.0/16", "pcx-old")[0]
+    assert resolver.check_new_route("rtb-main", "10.4.0.0/16", "tgw-1") == []
+    assert any("10.4.2.0/24" in p for p in resolver.check_new_route("rtb-public", "10.4.0.0/15", "tgw-1"))
+
+
+def test_modify_route_table_warns_before_create_route():
+    from cli import modify
+
+    ec2 = MagicMock()
+    ec2.can_paginate.return_value = False
+    ec2.describe_route_tables.return_value = {"RouteTables": [MAIN, PUBLIC]}
+
+    with patch.object(modify, "show_warning") as warn, patch.object(modify, "confirm_action", return_value=False):
+        assert modify.check_route(ec2, "vpc-0123abcd", "rtb-public", "10.8.0.0/23", "tgw-2") is False
+    assert warn.called
+
+    with patch.object(modify, "show_warning") as warn:
+        assert modify.check_route(ec2, "vpc-0123abcd", "rtb-main", "172.16.0.0/12", "tgw-1") is True
+    warn.assert_not_called()
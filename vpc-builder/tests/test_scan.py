@@ -0,0 +1,76 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from cli.scan import find_vpc_in_regions, scan_regions
+
+PAGES = {
+    "describe_vpcs": [{"Vpcs": [{"VpcId": "vpc-1", "CidrBlock": "10.0.0.0/16", "Tags": [{"Key": "Name", "Value": "dev"}]}]}],
+    "describe_subnets": [{"Subnets": [{"SubnetId": "subnet-1", "VpcId": "vpc-1", "CidrBlock": "10.0.1.0/24"}]}],
+    "describe_internet_gateways": [{"InternetGateways": [{"InternetGatewayId": "igw-1", "Attachments": [{"VpcId": "vpc-1"}]}]}],
+    "describe_nat_gateways": [{"NatGateways": []}],
+}
+
+
+def regional_client(delay=0.0):
+    client = MagicMock()
+    client.can_paginate.return_value = True
+
+    def get_paginator(operation):
+        paginator = MagicMock()
+
+        def paginate(**kwargs):
+            time.sleep(delay)
+            return PAGES[operation]
+        paginator.paginate.side_effect = paginate
+        return paginator
+
+    client.get_paginator.side_effect = get_paginator
+    return client
+
+
+def test_scan_merges_regions_into_one_table():
+    clients = {"us-east-1": regional_client(), "eu-west-1": regional_client()}
+    with patch("cli.scan.AWSClient.get_regional_client", side_effect=clients.get):
+        rows, errors = scan_regions(list(clients))
+
+    assert errors == {}
+    assert {(r["region"], r["type"]) for r in rows} == {
+        (region, kind) for region in clients for kind in ("VPC", "Subnet", "Internet Gateway")
+    }
+    igw = next(r for r in rows if r["id"] == "igw-1")
+    assert igw["vpc_id"] == "vpc-1"
+
+
+def test_scan_runs_regions_concurrently():
+    regions = [f"region-{i}" for i in range(8)]
+    clients = {region: regional_client(delay=0.1) for region in regions}
+    with patch("cli.scan.AWSClient.get_regional_client", side_effect=clients.get):
+        start = time.monotonic()
+        scan_regions(regions, max_workers=32)
+        elapsed = time.monotonic() - start
+
+    assert elapsed < 0.1 * len(regions)
+
+
+def test_scan_reports_unreadable_regions():
+    broken = MagicMock()
+    broken.get_paginator.side_effect = ClientError({"Error": {"Code": "AuthFailure", "Message": "denied"}}, "DescribeVpcs")
+    clients = {"us-east-1": regional_client(), "ap-south-1": broken}
+    with patch("cli.scan.AWSClient.get_regional_client", side_effect=clients.get):
+        rows, errors = scan_regions(list(clients))
+
+    assert errors == {"ap-south-1": "denied"}
+    assert all(r["region"] == "us-east-1" for r in rows)
+
+
+def test_find_vpc_in_regions_adds_region():
+    inventories = {"us-east-1": MagicMock(), "eu-west-1": MagicMock()}
+    inventories["us-east-1"].find.return_value = None
+    inventories["eu-west-1"].find.return_value = {"VpcId": "vpc-9", "CidrBlock": "10.9.0.0/16"}
+    with patch("cli.scan.AWSClient.get_regional_client", side_effect=lambda region: region), \
+         patch("cli.scan.AWSClient.get_vpc_inventory", side_effect=inventories.get):
+        vpc = find_vpc_in_regions("prod", list(inventories))
+
+    assert vpc == {"VpcId": "vpc-9", "CidrBlock": "10.9.0.0/16", "Region": "eu-west-1"}
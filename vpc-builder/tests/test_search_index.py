@@ -0,0 +1,73 @@
+import random
+import time
+from unittest.mock import patch
+
+from utils.search_index import SearchIndex
+
+
+def subnet_index(count, seed=7):
+    rng = random.Random(seed)
+    index = SearchIndex()
+    for i in range(count):
+        subnet_id = f"subnet-{rng.getrandbits(68):017x}"
+        name = f"{rng.choice(['web', 'db', 'app'])}-{rng.choice(['public', 'private'])}-{'abc'[i % 3]}-{i}"
+        index.add(subnet_id, f"{subnet_id} ({name})", [name, f"10.{i // 256}.{i % 256}.0/24", f"env={rng.choice(['prod', 'dev'])}"])
+    return index
+
+
+SMALL = SearchIndex([
+    ("subnet-0a1b2c", "subnet-0a1b2c (web-public-a)", ["web-public-a", "10.0.1.0/24", "env=prod"]),
+    ("subnet-0d4e5f", "subnet-0d4e5f (db-private-a)", ["db-private-a", "10.0.2.0/24", "env=prod"]),
+    ("subnet-7f8e9d", "subnet-7f8e9d (web-private-b)", ["web-private-b", "10.0.3.0/24", "env=dev"]),
+])
+
+
+def test_prefix_matches_on_ids_names_cidrs_and_tags():
+    assert SMALL.search("subnet-0") == ["subnet-0a1b2c", "subnet-0d4e5f"]
+    assert SMALL.search("7f8") == ["subnet-7f8e9d"]
+    assert SMALL.search("web priv") == ["subnet-7f8e9d"]
+    assert SMALL.search("10.0.2") == ["subnet-0d4e5f"]
+    assert SMALL.search("env=dev") == ["subnet-7f8e9d"]
+    assert SMALL.search("") == ["subnet-0a1b2c", "subnet-0d4e5f", "subnet-7f8e9d"]
+
+
+def test_fuzzy_matches_follow_prefix_matches():
+    assert SMALL.search("privte") == ["subnet-0d4e5f", "subnet-7f8e9d"]
+    assert SMALL.search("zzzz") == []
+
+
+def test_resolve_needs_an_exact_id_or_a_single_match():
+    assert SMALL.resolve("SUBNET-0A1B2C") == "subnet-0a1b2c"
+    assert SMALL.resolve("db-private") == "subnet-0d4e5f"
+    assert SMALL.resolve("web") is None
+    assert SMALL.resolve("") is None
+
+
+def test_queries_take_under_a_millisecond():
+    index = subnet_index(5000)
+    queries = ["s", "subnet-3", "web", "web pub", "10.4", "10.4.12", "env=dev db", "privte", "app-public-c-41"]
+    index.search("warm up")
+
+    started = time.perf_counter()
+    for _ in range(20):
+        for query in queries:
+            index.search(query)
+    assert (time.perf_counter() - started) / (20 * len(queries)) < 0.001
+
+
+def test_long_lists_use_the_search_picker():
+    from cli import picker
+
+    index = subnet_index(picker.PICKER_LIST_LIMIT + 1)
+    choices = [(key, index.label(key)) for key in index.keys()]
+    with patch("questionary.autocomplete") as autocomplete, patch("questionary.select") as select:
+        autocomplete.return_value.ask.return_value = choices[5][0].upper()
+        assert picker.pick("Select Subnet:", choices) == choices[5][0]
+        select.assert_not_called()
+
+        completer = autocomplete.call_args.kwargs["completer"]
+        assert autocomplete.call_args.kwargs["validate"]("nothing-like-it") is not True
+
+    from prompt_toolkit.document import Document
+    completions = list(completer.get_completions(Document(choices[5][0][:12]), None))
+    assert completions[0].text == choices[5][0]
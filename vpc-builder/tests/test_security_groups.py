@@ -0,0 +1,125 @@
+import ipaddress
+import random
+from unittest.mock import MagicMock, patch
+
+from cli.security_groups import SecurityGroupAnalyzer, reference_permissions
+
+
+def group(group_id, ingress=(), egress=(), name=None):
+    return {"GroupId": group_id, "GroupName": name or group_id, "IpPermissions": list(ingress), "IpPermissionsEgress": list(egress)}
+
+
+def tcp(from_port, to_port=None, cidrs=(), groups=()):
+    return {
+        "IpProtocol": "tcp", "FromPort": from_port, "ToPort": to_port if to_port is not None else from_port,
+        "IpRanges": [{"CidrIp": c} for c in cidrs],
+        "UserIdGroupPairs": [{"GroupId": g} for g in groups],
+    }
+
+
+BASTION = group("sg-bastion", [tcp(22, cidrs=["0.0.0.0/0"]), tcp(22, cidrs=["10.0.0.0/8"])])
+WEB = group("sg-web", [tcp(443, cidrs=["0.0.0.0/0"]), tcp(8000, 8100, cidrs=["10.0.0.0/16"]), tcp(8080, cidrs=["10.0.1.0/24"])])
+DB = group("sg-db", [tcp(5432, groups=["sg-web"]), tcp(5432, groups=["sg-db"]), {"IpProtocol": "-1", "IpRanges": [{"CidrIp": "10.9.0.0/16"}]}])
+
+
+def test_who_allows_a_port():
+    analyzer = SecurityGroupAnalyzer([BASTION, WEB, DB])
+
+    assert {r.group_id for r in analyzer.allowing(22)} == {"sg-bastion", "sg-db"}
+    assert {r.source for r in analyzer.allowing(22, source="0.0.0.0/0")} == {"0.0.0.0/0"}
+    assert {r.source for r in analyzer.allowing(8080, source="10.0.1.7")} == {"10.0.0.0/16", "10.0.1.0/24"}
+    assert analyzer.allowing(9000, source="192.168.0.1") == []
+
+
+def test_port_index_matches_a_scan():
+    rng = random.Random(3)
+    perms = []
+    for _ in range(2000):
+        start = rng.randrange(0, 65535)
+        perms.append(tcp(start, min(65535, start + rng.choice([0, 1, 10, 1000, 40000])), cidrs=["10.0.0.0/8"]))
+    analyzer = SecurityGroupAnalyzer([group("sg-big", perms)])
+
+    for port in [0, 1, 22, 443, 8080, 65535] + [rng.randrange(0, 65536) for _ in range(200)]:
+        expected = sorted(r for r in analyzer.rules if r.from_port <= port <= r.to_port)
+        assert sorted(analyzer.allowing(port)) == expected
+
+
+def test_exposure_report_lists_sensitive_ports_first():
+    report = SecurityGroupAnalyzer([BASTION, WEB, DB]).exposure_report()
+
+    assert [(r.group_id, services) for r, services in report] == [("sg-bastion", ["SSH"]), ("sg-web", [])]
+
+
+def test_references_and_unreferenced_groups():
+    analyzer = SecurityGroupAnalyzer([BASTION, WEB, DB])
+
+    assert [r.group_id for r in analyzer.references_to("sg-web")] == ["sg-db"]
+    # Self-references don't block deleting a group.
+    assert analyzer.references_to("sg-db") == []
+    assert analyzer.unreferenced_groups() == ["sg-bastion", "sg-db"]
+
+
+def test_redundant_rules():
+    duplicate = group("sg-dup", [tcp(80, cidrs=["10.0.0.0/16"]), tcp(80, cidrs=["10.0.0.0/16"])])
+    redundant = SecurityGroupAnalyzer([BASTION, WEB, DB, duplicate]).redundant_rules()
+
+    found = {(r.group_id, r.source, r.from_port): (c.source, c.from_port) for r, c in redundant}
+    assert found == {
+        ("sg-bastion", "10.0.0.0/8", 22): ("0.0.0.0/0", 22),
+        ("sg-web", "10.0.1.0/24", 8080): ("10.0.0.0/16", 8000),
+        ("sg-dup", "10.0.0.0/16", 80): ("10.0.0.0/16", 80),
+    }
+
+
+def test_redundant_rules_match_a_pairwise_scan():
+    rng = random.Random(5)
+    cidrs = ["0.0.0.0/0", "10.0.0.0/8", "10.0.0.0/16", "10.0.1.0/24", "10.0.1.7/32", "192.168.0.0/16"]
+    perms = []
+    for _ in range(400):
+        start = rng.choice([0, 22, 80, 443, 8000])
+        perms.append(tcp(start, start + rng.choice([0, 0, 100, 60000 - start]),
+                         cidrs=[rng.choice(cidrs)] if rng.random() < 0.8 else (),
+                         groups=[rng.choice(["sg-a", "sg-b"])] if rng.random() < 0.2 else ()))
+    analyzer = SecurityGroupAnalyzer([group("sg-big", perms)])
+
+    def covers(broad, narrow):
+        if broad.source_kind != narrow.source_kind or not broad.from_port <= narrow.from_port <= narrow.to_port <= broad.to_port:
+            return False
+        if broad.source_kind != "cidr":
+            return broad.source == narrow.source
+        return ipaddress.ip_network(narrow.source).subnet_of(ipaddress.ip_network(broad.source))
+
+    expected = []
+    for i, rule in enumerate(analyzer.rules):
+        for j, other in enumerate(analyzer.rules):
+            if i != j and covers(other, rule) and (other != rule or j < i):
+                expected.append((rule, other))
+                break
+    assert analyzer.redundant_rules() == expected
+
+
+def test_reference_permissions_revoke_only_the_reference():
+    analyzer = SecurityGroupAnalyzer([WEB, DB])
+
+    assert reference_permissions(analyzer.references_to("sg-web")) == {
+        ("sg-db", "ingress"): [{"IpProtocol": "tcp", "FromPort": 5432, "ToPort": 5432, "UserIdGroupPairs": [{"GroupId": "sg-web"}]}],
+    }
+
+
+def test_delete_skips_referenced_groups_unless_revoked():
+    from cli import delete
+
+    ec2 = MagicMock()
+    ec2.get_paginator.return_value.paginate.return_value = [{"SecurityGroups": [WEB, DB, group("sg-default", name="default")]}]
+
+    with patch.object(delete, "show_table") as table, patch.object(delete, "confirm_action", return_value=False):
+        delete.delete_security_groups_in_vpc(ec2, "vpc-0123abcd")
+    assert table.called
+    assert [c.kwargs["GroupId"] for c in ec2.delete_security_group.call_args_list] == ["sg-db"]
+    ec2.revoke_security_group_ingress.assert_not_called()
+
+    ec2.reset_mock()
+    with patch.object(delete, "show_table"), patch.object(delete, "confirm_action", return_value=True):
+        delete.delete_security_groups_in_vpc(ec2, "vpc-0123abcd")
+    ec2.revoke_security_group_ingress.assert_called_once()
+    assert sorted(c.kwargs["GroupId"] for c in ec2.delete_security_group.call_args_list) == ["sg-db", "sg-web"]
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+
+from benchmarks.fake_ec2 import FakeEC2
+from cli.inventory import VpcInventory
+from cli.snapshot import InventorySnapshot
+
+ACCOUNT = "123456789012"
+PRINCIPAL = f"arn:aws:iam::{ACCOUNT}:user/dev"
+
+
+def vpc(vpc_id, cidr, name=None):
+    record = {"VpcId": vpc_id, "CidrBlock": cidr}
+    if name:
+        record["Tags"] = [{"Key": "Name", "Value": name}]
+    return record
+
+
+def test_reconcile_rewrites_only_changed_rows():
+    snapshot = InventorySnapshot(":memory:")
+    assert snapshot.age(ACCOUNT, "us-east-1", "vpc") is None
+
+    first = [vpc("vpc-0a1b2c3d", "10.0.0.0/16", "prod"), vpc("vpc-0a1b2c3e", "10.1.0.0/16")]
+    assert snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", first) == (2, 0, 0)
+    assert snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", first) == (0, 0, 0)
+
+    second = [vpc("vpc-0a1b2c3d", "10.0.0.0/16", "prod-renamed"), vpc("vpc-0a1b2c3f", "10.2.0.0/16")]
+    assert snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", second) == (1, 1, 1)
+    assert [v["VpcId"] for v in snapshot.resources(ACCOUNT, "us-east-1", "vpc")] == ["vpc-0a1b2c3d", "vpc-0a1b2c3f"]
+    assert snapshot.age(ACCOUNT, "us-east-1", "vpc") < 5
+
+
+def test_lookups_are_scoped_to_account_and_region():
+    snapshot = InventorySnapshot(":memory:")
+    snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", [vpc("vpc-0a1b2c3d", "10.0.0.0/16", "prod")])
+    snapshot.reconcile(ACCOUNT, "eu-west-1", "vpc", [vpc("vpc-0a1b2c3e", "10.0.0.0/16", "prod")])
+
+    assert [v["VpcId"] for v in snapshot.resources(ACCOUNT, "us-east-1", "vpc")] == ["vpc-0a1b2c3d"]
+    assert [v["VpcId"] for v in snapshot.find_by_cidr(ACCOUNT, "eu-west-1", "10.0.0.1/16")] == ["vpc-0a1b2c3e"]
+    assert snapshot.find_by_cidr("999999999999", "us-east-1", "10.0.0.0/16") == []
+
+
+def test_inventory_serves_snapshot_then_swaps_in_live_data():
+    snapshot = InventorySnapshot(":memory:")
+    ec2 = FakeEC2("us-east-1")
+    live_id = ec2.create_vpc(CidrBlock="10.9.0.0/16")["Vpc"]["VpcId"]
+    snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", [vpc("vpc-0a1b2c3d", "10.0.0.0/16", "stale")])
+
+    with patch("cli.preflight.current_principal", return_value=PRINCIPAL):
+        inventory = VpcInventory(ec2, snapshot=snapshot)
+        assert inventory.vpcs() == [("vpc-0a1b2c3d", "stale")]
+        assert inventory.snapshot_age is not None
+        assert ec2.calls["describe_vpcs"] == 0
+
+        inventory.wait_for_sync(timeout=5)
+
+    assert [vpc_id for vpc_id, _ in inventory.vpcs()] == [live_id]
+    assert inventory.snapshot_age is None
+    assert inventory.find("10.9.0.0/16")["VpcId"] == live_id
+    assert [v["VpcId"] for v in snapshot.resources(ACCOUNT, "us-east-1", "vpc")] == [live_id]
+
+
+def test_snapshot_keeps_refreshing_in_the_background():
+    snapshot = InventorySnapshot(":memory:")
+    ec2 = FakeEC2("us-east-1")
+    snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", [vpc("vpc-0a1b2c3d", "10.0.0.0/16", "stale")])
+
+    with patch("cli.preflight.current_principal", return_value=PRINCIPAL):
+        inventory = VpcInventory(ec2, ttl=0, snapshot=snapshot)
+        inventory.vpcs()
+        inventory.wait_for_sync(timeout=5)
+        later_id = ec2.create_vpc(CidrBlock="10.9.0.0/16")["Vpc"]["VpcId"]
+
+        # Past the TTL, the next lookup is answered at once and starts another refresh.
+        inventory.vpcs()
+        inventory.wait_for_sync(timeout=5)
+
+    assert ec2.calls["describe_vpcs"] == 2
+    assert later_id in dict(inventory.vpcs())
+
+
+def test_inventory_without_known_account_skips_snapshot():
+    snapshot = InventorySnapshot(":memory:")
+    snapshot.reconcile(ACCOUNT, "us-east-1", "vpc", [vpc("vpc-0a1b2c3d", "10.0.0.0/16")])
+    ec2 = FakeEC2("us-east-1")
+
+    with patch("cli.preflight.current_principal", return_value="unknown"):
+        inventory = VpcInventory(ec2, snapshot=snapshot)
+        assert inventory.vpcs() == []
+
+    assert inventory.snapshot_age is None
+
+
+def test_account_is_looked_up_once_per_session():
+    from cli import preflight
+
+    sts = MagicMock()
+    sts.get_caller_identity.return_value = {"Arn": PRINCIPAL}
+    with patch.object(preflight, "_principals", {}), patch("cli.aws_client.AWSClient.get_client", return_value=sts):
+        for region in ("us-east-1", "eu-west-1", "ap-south-1"):
+            VpcInventory(FakeEC2(region), snapshot=InventorySnapshot(":memory:"))._snapshot_region()
+
+    assert sts.get_caller_identity.call_count == 1
+
+
+def test_snapshot_is_opt_in():
+    from cli import snapshot
+    from main import parse_args
+
+    assert not parse_args([]).snapshot
+    with patch.object(snapshot, "_snapshot_enabled", False):
+        assert snapshot.get_snapshot() is None
@@ -0,0 +1,84 @@
+import itertools
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cli.executor import OK
+from cli.spec import SpecError, apply_plan, build_plan, load_spec, validate_spec
+
+SPEC = {
+    "vpc": {"name": "prod", "cidr": "10.0.0.0/16"},
+    "internet_gateway": {"name": "prod-igw"},
+    "subnets": [
+        {"name": "public-a", "cidr": "10.0.0.0/24", "az": "us-east-1a", "type": "public", "route_table": "public"},
+        {"name": "private-a", "cidr": "10.0.10.0/24", "az": "us-east-1a", "route_table": "private-a"},
+    ],
+    "route_tables": [
+        {"name": "public", "type": "public", "routes": [{"destination": "0.0.0.0/0", "target": "internet_gateway"}]},
+        {"name": "private-a", "routes": [{"destination": "0.0.0.0/0", "target": "nat_gateway:nat-a"}]},
+    ],
+    "nat_gateways": [{"name": "nat-a", "subnet": "public-a"}],
+    "security_groups": [{"name": "web", "description": "Web tier"}],
+}
+
+
+def fake_ec2():
+    ec2 = MagicMock()
+    counter = itertools.count()
+    ec2.create_vpc.return_value = {"Vpc": {"VpcId": "vpc-1"}}
+    ec2.create_subnet.side_effect = lambda **kw: {"Subnet": {"SubnetId": f"subnet-{next(counter)}"}}
+    ec2.create_route_table.side_effect = lambda **kw: {"RouteTable": {"RouteTableId": f"rtb-{next(counter)}"}}
+    ec2.create_internet_gateway.return_value = {"InternetGateway": {"InternetGatewayId": "igw-1"}}
+    ec2.allocate_address.return_value = {"AllocationId": "eipalloc-1"}
+    ec2.create_nat_gateway.return_value = {"NatGateway": {"NatGatewayId": "nat-1"}}
+    ec2.create_security_group.return_value = {"GroupId": "sg-1"}
+    ec2.associate_route_table.return_value = {"AssociationId": "rtbassoc-1"}
+    return ec2
+
+
+def test_plan_orders_dependent_steps():
+    steps = {step.key: step for step in build_plan(MagicMock(), SPEC)}
+
+    assert steps["subnet:public-a"].deps == ["vpc"]
+    assert steps["nat:nat-a"].deps == ["subnet:public-a", "igw"]
+    assert steps["route:private-a:0.0.0.0/0"].deps == ["route-table:private-a", "nat:nat-a"]
+    assert steps["association:private-a"].deps == ["subnet:private-a", "route-table:private-a"]
+
+
+def test_apply_creates_every_resource_without_prompts():
+    ec2 = fake_ec2()
+    with patch("cli.create.AWSClient"), patch("cli.create.get_waiter_service") as waiters:
+        results = apply_plan(build_plan(ec2, SPEC))
+
+    assert all(result.status == OK for result in results.values())
+    assert ec2.create_subnet.call_count == 2
+    waiters.return_value.wait_for.assert_called_once_with("nat_gateway", "nat-1", "available")
+    assert {c.kwargs["AvailabilityZone"] for c in ec2.create_subnet.call_args_list} == {"us-east-1a"}
+    ec2.create_route.assert_any_call(RouteTableId=results["route-table:public"].value,
+                                     DestinationCidrBlock="0.0.0.0/0", GatewayId="igw-1")
+    ec2.create_route.assert_any_call(RouteTableId=results["route-table:private-a"].value,
+                                     DestinationCidrBlock="0.0.0.0/0", NatGatewayId="nat-1")
+    assert ec2.associate_route_table.call_count == 2
+
+
+@pytest.mark.parametrize("change", [
+    {"subnets": [{"name": "a", "cidr": "192.168.0.0/24"}]},
+    {"subnets": [{"name": "a", "cidr": "10.0.0.0/24"}, {"name": "b", "cidr": "10.0.0.128/25"}]},
+    {"nat_gateways": [{"name": "nat", "subnet": "missing"}]},
+    {"vpc": {"name": "no-cidr"}},
+    {"subnets": [{"name": "a", "cidr": "10.0.0.0/24"}, {"name": "a", "cidr": "10.0.1.0/24"}]},
+    {"internet_gateway": {"name": "igw"}, "route_tables": [{"name": "public", "routes": [
+        {"destination": "0.0.0.0/0", "target": "internet_gateway"},
+        {"destination": "0.0.0.0/0", "target": "internet_gateway"},
+    ]}]},
+])
+def test_invalid_specs_are_rejected(change):
+    spec = {"vpc": {"cidr": "10.0.0.0/16"}, **change}
+    with pytest.raises(SpecError):
+        validate_spec(spec)
+
+
+def test_load_json_spec(tmp_path):
+    path = tmp_path / "vpc.json"
+    path.write_text('{"vpc": {"cidr": "10.0.0.0/16"}}')
+    assert load_spec(str(path)) == {"vpc": {"cidr": "10.0.0.0/16"}}
@@ -0,0 +1,33 @@
+import os
+from unittest.mock import MagicMock, patch
+
+from benchmarks.bench_startup import measure_import
+from cli.aws_client import AWSClient
+
+
+def test_importing_main_stays_lightweight():
+    assert measure_import()["loaded"] == []
+
+
+def test_region_from_environment_skips_the_prompt():
+    AWSClient.configure()
+    session = MagicMock(region_name=None)
+    with patch.dict(os.environ, {"AWS_REGION": "eu-west-1"}), \
+         patch.object(AWSClient, "new_session", side_effect=[session, MagicMock(region_name="eu-west-1")]) as new, \
+         patch("cli.aws_client.select_region") as prompt:
+        assert AWSClient.get_session().region_name == "eu-west-1"
+
+    prompt.assert_not_called()
+    new.assert_called_with("eu-west-1")
+    AWSClient.configure()
+
+
+def test_region_from_profile_skips_the_prompt():
+    AWSClient.configure(profile="ops")
+    with patch.dict(os.environ, {}, clear=True), \
+         patch.object(AWSClient, "new_session", return_value=MagicMock(region_name="ap-south-1")), \
+         patch("cli.aws_client.select_region") as prompt:
+        assert AWSClient.get_session().region_name == "ap-south-1"
+
+    prompt.assert_not_called()
+    AWSClient.configure()
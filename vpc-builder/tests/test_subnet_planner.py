@@ -0,0 +1,47 @@
+import ipaddress
+import itertools
+import time
+
+import pytest
+
+from utils.subnet_planner import plan_subnet_layout
+
+
+def networks(layout):
+    return [ipaddress.IPv4Network(s["cidr"]) for s in layout]
+
+
+def test_auto_layout_fills_vpc_evenly_across_azs():
+    layout = plan_subnet_layout("10.0.0.0/16", 3, 3, ["us-east-1a", "us-east-1b", "us-east-1c"])
+
+    assert [s["cidr"] for s in layout[:2]] == ["10.0.0.0/19", "10.0.32.0/19"]
+    assert [s["az"] for s in layout] == ["us-east-1a", "us-east-1b", "us-east-1c"] * 2
+    assert [s["type"] for s in layout] == ["public"] * 3 + ["private"] * 3
+
+
+def test_mixed_sizes_are_aligned_and_skip_reserved_space():
+    layout = plan_subnet_layout("10.0.0.0/16", 2, 2, ["a", "b"], public_prefix=24, private_prefix=20,
+                                reserved=["10.0.0.0/24"])
+    nets = networks(layout)
+
+    assert all(n.subnet_of(ipaddress.IPv4Network("10.0.0.0/16")) for n in nets)
+    assert not any(a.overlaps(b) for a, b in itertools.combinations(nets + [ipaddress.IPv4Network("10.0.0.0/24")], 2))
+    assert [n.prefixlen for n in nets] == [24, 24, 20, 20]
+
+
+def test_sixty_subnets_plan_in_milliseconds():
+    start = time.perf_counter()
+    layout = plan_subnet_layout("10.0.0.0/16", 30, 30, ["a", "b", "c"], public_prefix=24, private_prefix=22)
+    elapsed = time.perf_counter() - start
+
+    nets = networks(layout)
+    assert len(nets) == 60
+    assert not any(a.overlaps(b) for a, b in itertools.combinations(nets, 2))
+    assert elapsed < 0.05
+
+
+def test_layout_that_does_not_fit_is_rejected():
+    with pytest.raises(ValueError):
+        plan_subnet_layout("10.0.0.0/24", 3, 0, ["a"], public_prefix=25)
+    with pytest.raises(ValueError):
+        plan_subnet_layout("10.0.0.0/16", 1, 0, ["a"], public_prefix=30)
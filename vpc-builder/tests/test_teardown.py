@@ -0,0 +1,94 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from cli.executor import OK
+from cli.teardown import build_teardown_graph, teardown_vpc
+
+
+def empty_resources(**overrides):
+    resources = {
+        "subnets": [], "route_tables": [], "internet_gateways": [], "nat_gateways": [],
+        "vpc_endpoints": [], "network_interfaces": [], "network_acls": [],
+        "security_groups": [], "addresses": [],
+    }
+    resources.update(overrides)
+    return resources
+
+
+def test_only_subnets_hosting_a_nat_wait_for_it():
+    resources = empty_resources(
+        subnets=[{"SubnetId": "subnet-a"}, {"SubnetId": "subnet-b"}],
+        nat_gateways=[{"NatGatewayId": "nat-1", "SubnetId": "subnet-a",
+                       "NatGatewayAddresses": [{"AllocationId": "eipalloc-1"}]}],
+        addresses=[{"AllocationId": "eipalloc-1"}],
+        internet_gateways=[{"InternetGatewayId": "igw-1"}],
+    )
+    graph = build_teardown_graph(MagicMock(), "vpc-1", resources)
+
+    assert graph.dependencies("subnet:subnet-a") == {"wait:nat-gateways"}
+    assert graph.dependencies("subnet:subnet-b") == set()
+    assert graph.dependencies("eip:eipalloc-1") == {"wait:nat-gateways"}
+    assert graph.dependencies("igw:igw-1") == {"wait:nat-gateways", "eip:eipalloc-1"}
+    assert graph.dependencies("vpc") == set(graph.keys()) - {"vpc"}
+
+
+def test_teardown_deletes_everything_then_the_vpc():
+    ec2 = MagicMock()
+    resources = empty_resources(
+        subnets=[{"SubnetId": f"subnet-{i}"} for i in range(40)],
+        route_tables=[
+            {"RouteTableId": "rtb-main", "Associations": [{"Main": True}]},
+            {"RouteTableId": "rtb-1", "Associations": [{"Main": False, "RouteTableAssociationId": "rtbassoc-1"}]},
+        ],
+        network_acls=[{"NetworkAclId": "acl-1", "Associations": [{"SubnetId": "subnet-0"}]}],
+        security_groups=[
+            {"GroupId": "sg-1", "IpPermissions": [{"IpProtocol": "-1", "UserIdGroupPairs": [{"GroupId": "sg-2"}]}]},
+            {"GroupId": "sg-2"},
+        ],
+    )
+    graph = build_teardown_graph(ec2, "vpc-1", resources)
+    results = graph.run(max_workers=8)
+
+    assert all(result.status == OK for result in results.values())
+    assert ec2.delete_subnet.call_count == 40
+    ec2.disassociate_route_table.assert_called_once_with(AssociationId="rtbassoc-1")
+    ec2.delete_route_table.assert_called_once_with(RouteTableId="rtb-1")
+    ec2.revoke_security_group_ingress.assert_called_once()
+    assert graph.dependencies("acl:acl-1") == {"subnet:subnet-0"}
+    assert "sg-rules:sg-1" in graph.dependencies("sg:sg-2")
+    ec2.delete_vpc.assert_called_once_with(VpcId="vpc-1")
+
+
+def test_teardown_forgets_the_cidrs_it_deleted():
+    ec2 = MagicMock()
+    resources = empty_resources(subnets=[{"SubnetId": "subnet-a"}, {"SubnetId": "subnet-b"}])
+    with patch("cli.teardown.discover_vpc_resources", return_value=resources), \
+         patch("cli.teardown.get_waiter_service"), patch("cli.teardown.forget_cidr") as forget:
+        teardown_vpc(ec2, "vpc-1")
+
+    assert sorted(forget.call_args.args) == ["subnet-a", "subnet-b", "vpc-1"]
+
+
+def test_route_table_survives_its_subnet_being_deleted_first():
+    ec2 = MagicMock()
+    subnet_deleted = threading.Event()
+    ec2.delete_subnet.side_effect = lambda SubnetId: subnet_deleted.set()
+
+    def disassociate(AssociationId):
+        subnet_deleted.wait(5)
+        raise ClientError({"Error": {"Code": "InvalidAssociationID.NotFound", "Message": "gone"}},
+                          "DisassociateRouteTable")
+
+    ec2.disassociate_route_table.side_effect = disassociate
+    resources = empty_resources(
+        subnets=[{"SubnetId": "subnet-a"}],
+        route_tables=[{"RouteTableId": "rtb-1", "Associations": [
+            {"Main": False, "RouteTableAssociationId": "rtbassoc-1", "SubnetId": "subnet-a"}]}],
+    )
+    results = build_teardown_graph(ec2, "vpc-1", resources).run(max_workers=4)
+
+    assert all(result.status == OK for result in results.values())
+    ec2.delete_route_table.assert_called_once_with(RouteTableId="rtb-1")
+    ec2.delete_vpc.assert_called_once_with(VpcId="vpc-1")
@@ -0,0 +1,84 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+
+from cli.aws_client import build_ec2_client
+from cli.throttle import RateLimiter, TokenBucket
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_bucket_is_shared_across_threads():
+    bucket = TokenBucket(rate=100, capacity=1)
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert time.monotonic() - start >= 0.18
+
+
+def test_operation_families():
+    assert RateLimiter.family("DescribeSubnets") == "describe"
+    assert RateLimiter.family("DeleteSubnet") == "mutate"
+    assert RateLimiter.family("CreateTags") == "mutate"
+
+
+def test_limiter_attaches_to_before_send():
+    limiter = RateLimiter()
+    client = MagicMock()
+    limiter.attach(client)
+    event, handler = client.meta.events.register.call_args.args
+    assert event == "before-send.ec2"
+
+    limiter.buckets["mutate"] = MagicMock()
+    handler(event_name="before-send.ec2.DeleteVpc", request=None)
+    limiter.buckets["mutate"].acquire.assert_called_once()
+
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+
+    def stream(self, **kwargs):
+        yield self._data
+
+
+def test_every_retry_attempt_takes_a_token():
+    client = boto3.client(
+        "ec2", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="y",
+        config=Config(retries={"mode": "standard", "max_attempts": 3}),
+    )
+    limiter = RateLimiter()
+    limiter.buckets["describe"] = MagicMock()
+    limiter.attach(client)
+    responses = iter([
+        AWSResponse("", 500, {}, _Body(b"<Response><Errors><Error><Code>InternalError</Code></Error></Errors></Response>")),
+        AWSResponse("", 200, {}, _Body(b"<DescribeVpcsResponse><vpcSet/></DescribeVpcsResponse>")),
+    ])
+    client.meta.events.register_last("before-send.ec2", lambda **kwargs: next(responses))
+
+    with patch("time.sleep"):
+        assert client.describe_vpcs()["Vpcs"] == []
+
+    assert limiter.buckets["describe"].acquire.call_count == 2
+
+
+def test_built_client_uses_adaptive_retries():
+    session = boto3.Session(region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="y")
+    ec2 = build_ec2_client(session)
+    assert ec2.client.meta.config.retries["mode"] == "adaptive"
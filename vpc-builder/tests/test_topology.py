@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+from rich.console import Console
+
+from cli.topology import TOPOLOGY_QUERIES, build_topology_tree, fetch_vpc_topology
+
+RESPONSES = {
+    "describe_subnets": {"Subnets": [
+        {"SubnetId": "subnet-a", "CidrBlock": "10.0.1.0/24", "AvailabilityZone": "us-east-1a"},
+        {"SubnetId": "subnet-b", "CidrBlock": "10.0.2.0/24", "AvailabilityZone": "us-east-1b"},
+    ]},
+    "describe_route_tables": {"RouteTables": [
+        {"RouteTableId": "rtb-main", "Associations": [{"Main": True}], "Routes": [{"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local"}]},
+        {"RouteTableId": "rtb-pub", "Associations": [{"SubnetId": "subnet-a"}],
+         "Routes": [{"DestinationCidrBlock": "0.0.0.0/0", "GatewayId": "igw-1"}]},
+    ]},
+    "describe_internet_gateways": {"InternetGateways": [{"InternetGatewayId": "igw-1"}]},
+    "describe_nat_gateways": {"NatGateways": []},
+    "describe_security_groups": {"SecurityGroups": [{"GroupId": "sg-1", "GroupName": "default"}]},
+    "describe_vpc_endpoints": {"VpcEndpoints": []},
+    "describe_network_interfaces": {"NetworkInterfaces": []},
+}
+
+
+def make_ec2(delay=0.0, failing=()):
+    ec2 = MagicMock()
+    ec2.can_paginate.return_value = False
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def describe(operation):
+        def call(**kwargs):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(delay)
+            with lock:
+                active["now"] -= 1
+            if operation in failing:
+                raise ClientError({"Error": {"Code": "UnauthorizedOperation", "Message": "denied"}}, operation)
+            return RESPONSES[operation]
+        return call
+
+    for operation in RESPONSES:
+        getattr(ec2, operation).side_effect = describe(operation)
+    return ec2, active
+
+
+def test_all_sections_are_fetched_concurrently():
+    ec2, active = make_ec2(delay=0.05)
+
+    resources, errors = fetch_vpc_topology(ec2, "vpc-0a1b2c3d")
+
+    assert errors == {}
+    assert set(resources) == set(TOPOLOGY_QUERIES)
+    assert active["peak"] == len(TOPOLOGY_QUERIES)
+
+
+def test_a_failing_section_does_not_hide_the_rest():
+    ec2, _ = make_ec2(failing=("describe_vpc_endpoints",))
+
+    resources, errors = fetch_vpc_topology(ec2, "vpc-0a1b2c3d")
+
+    assert list(errors) == ["vpc_endpoints"]
+    assert resources["vpc_endpoints"] == []
+    assert len(resources["subnets"]) == 2
+
+
+def test_tree_marks_subnets_public_by_their_route_table():
+    ec2, _ = make_ec2()
+    resources, _ = fetch_vpc_topology(ec2, "vpc-0a1b2c3d")
+    console = Console(record=True, width=200)
+
+    console.print(build_topology_tree({"VpcId": "vpc-0a1b2c3d", "Name": "prod", "CidrBlock": "10.0.0.0/16"}, resources))
+    text = console.export_text()
+
+    assert "subnet-a 10.0.1.0/24 public, rtb-pub" in text
+    assert "subnet-b 10.0.2.0/24 private, rtb-main" in text
+    assert "0.0.0.0/0 → igw-1" in text
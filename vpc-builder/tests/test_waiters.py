@@ -0,0 +1,71 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from cli.waiters import WaiterError, WaiterService
+
+
+class FakeNatApi:
+    """Each describe call advances every NAT one step through its state list."""
+
+    def __init__(self, states):
+        self.states = states
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def describe_nat_gateways(self, Filters):
+        with self.lock:
+            ids = Filters[0]["Values"]
+            self.calls.append(list(ids))
+            found = []
+            for nat_id in ids:
+                states = self.states[nat_id]
+                state = states.pop(0) if len(states) > 1 else states[0]
+                if state is not None:
+                    found.append({"NatGatewayId": nat_id, "State": state})
+            return {"NatGateways": found}
+
+
+def service(api):
+    ec2 = MagicMock()
+    ec2.describe_nat_gateways.side_effect = api.describe_nat_gateways
+    return ec2, WaiterService(ec2, initial_delay=0.01, max_delay=0.02, timeout=5)
+
+
+def test_many_nats_share_one_batched_poll():
+    api = FakeNatApi({
+        "nat-a": ["pending", "available"],
+        "nat-b": ["pending", "pending", "available"],
+        "nat-c": ["available"],
+    })
+    ec2, waiters = service(api)
+
+    results = waiters.wait_all("nat_gateway", ["nat-a", "nat-b", "nat-c"], "available")
+
+    assert [r["State"] for r in results] == ["available"] * 3
+    assert len(api.calls) <= 3
+    assert api.calls[0] == ["nat-a", "nat-b", "nat-c"]
+
+
+def test_missing_resource_counts_as_deleted():
+    api = FakeNatApi({"nat-a": ["deleting", None]})
+    _, waiters = service(api)
+
+    assert waiters.wait_for("nat_gateway", "nat-a", "deleted").result(timeout=5) is None
+
+
+def test_failed_nat_raises():
+    api = FakeNatApi({"nat-a": ["pending", "failed"]})
+    _, waiters = service(api)
+
+    with pytest.raises(WaiterError):
+        waiters.wait_for("nat_gateway", "nat-a", "available").result(timeout=5)
+
+
+def test_timeout():
+    api = FakeNatApi({"nat-a": ["pending"]})
+    _, waiters = service(api)
+
+    with pytest.raises(TimeoutError):
+        waiters.wait_for("nat_gateway", "nat-a", "available", timeout=0.05).result(timeout=5)
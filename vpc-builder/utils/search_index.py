@@ -0,0 +1,156 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import repeat
+from operator import itemgetter
+
+# Share of a query's trigrams a resource must contain to count as a fuzzy match.
+FUZZY_MIN_SIMILARITY = 0.5
+# Resources scored per fuzzy query at most (the first ones, when a typo is in a very common word).
+MAX_FUZZY_CANDIDATES = 300
+# Largest word range turned into a set when intersecting query words; wider ones are checked word by word.
+MAX_SET_RANGE = 5000
+
+# Characters that split a value into separately searchable words ("subnet-0abc" -> "subnet", "0abc").
+_WORD_SEPARATORS = re.compile(r"[\s\-_:,=]+")
+# Sorts after every character that can follow a prefix.
+_PREFIX_END = "\U0010ffff"
+
+
+def _words(value):
+    value = value.lower()
+    return {value, *(word for word in _WORD_SEPARATORS.split(value) if word)}
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory search over resources by ID, Name tag, CIDR and other tag values.
+
+    Prefix matches come from a flattened trie: every word of every value is
+    kept once per resource in one sorted array of (word, position) pairs, so
+    all words under a prefix form a contiguous range found with two bisects,
+    and the first matches come straight off that range. Typo-tolerant
+    matches come from an inverted trigram index: a resource sharing at least
+    FUZZY_MIN_SIMILARITY of the query's trigrams must contain one of its
+    rarest few, so only those posting lists are scored. Queries over 10,000
+    resources take well under a millisecond.
+    """
+
+    def __init__(self, entries=()):
+        self._keys = []
+        self._labels = []
+        self._position = {}
+        self._doc_words = []
+        self._doc_grams = []
+        self._postings = defaultdict(list)
+        self._pending = []
+        self._sorted = []
+        for key, label, values in entries:
+            self.add(key, label, values)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key, label, values=()):
+        """Index a resource under its key (e.g. the ID) and any other searchable values."""
+        if key.lower() in self._position:
+            return
+        position = len(self._keys)
+        self._keys.append(key)
+        self._labels.append(label)
+        self._position[key.lower()] = position
+
+        # IDs are random hex, so they are only matched by prefix; trigrams cover the human-chosen values.
+        words, grams = _words(key), set()
+        for value in values:
+            if value:
+                words |= _words(value)
+                grams |= _trigrams(value.lower())
+        self._doc_words.append(words)
+        self._doc_grams.append(grams)
+        self._pending.extend(zip(words, repeat(position)))
+        for gram in grams:
+            self._postings[gram].append(position)
+
+    def _range(self, prefix):
+        if self._pending:
+            self._sorted = sorted(self._sorted + self._pending)
+            self._pending = []
+        lo = bisect_left(self._sorted, (prefix,))
+        return lo, bisect_left(self._sorted, (prefix + _PREFIX_END,), lo)
+
+    def keys(self):
+        return list(self._keys)
+
+    def label(self, key):
+        return self._labels[self._position[key.lower()]]
+
+    def search(self, query, limit=20):
+        """
+        Keys of the best matches for query, at most limit: the exact key
+        first, then resources with a word starting with every query word
+        (closest words first). Only when there are none, fuzzy matches by
+        similarity, so a typo still finds something.
+        """
+        terms = []
+        for term in query.lower().split():
+            lo, hi = self._range(term)
+            if lo == hi and _WORD_SEPARATORS.search(term):
+                # "privat-b" finds "web-private-b" through its words.
+                terms += [(word, *self._range(word)) for word in _WORD_SEPARATORS.split(term) if word]
+            else:
+                terms.append((term, lo, hi))
+        if not terms:
+            return self._keys[:limit]
+
+        exact = self._position.get(query.strip().lower())
+        found = [] if exact is None else [exact]
+        seen = set(found)
+        # Walk the narrowest word range, filtering by the other words' ranges (as sets
+        # while they are small) or, for very common words, by each resource's own words.
+        (_, lo, hi), *others = sorted(terms, key=lambda t: t[2] - t[1])
+        candidates = map(itemgetter(1), map(self._sorted.__getitem__, range(lo, hi)))
+        prefixes = []
+        for term, o_lo, o_hi in others:
+            if o_hi - o_lo <= MAX_SET_RANGE:
+                candidates = filter(set(map(itemgetter(1), self._sorted[o_lo:o_hi])).__contains__, candidates)
+            else:
+                prefixes.append(term)
+        for position in candidates:
+            if len(found) >= limit:
+                break
+            if position in seen:
+                continue
+            words = self._doc_words[position]
+            if all(any(word.startswith(term) for word in words) for term in prefixes):
+                found.append(position)
+                seen.add(position)
+
+        if not found:
+            found = self._fuzzy(query.lower().split())[:limit]
+        return [self._keys[p] for p in found]
+
+    def _fuzzy(self, terms):
+        grams = set().union(*(_trigrams(term) for term in terms))
+        if not grams:
+            return []
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        need = max(1, round(len(grams) * FUZZY_MIN_SIMILARITY))
+        # A resource sharing `need` trigrams shares one of the len - need + 1 rarest, so only those
+        # posting lists (ascending positions) give candidates, and only their first ones are scored.
+        rarest = postings[:len(grams) - need + 1]
+        candidates = sorted(set().union(*(positions[:MAX_FUZZY_CANDIDATES] for positions in rarest)))
+        scored = ((len(grams & self._doc_grams[p]), p) for p in candidates[:MAX_FUZZY_CANDIDATES])
+        return [p for _, p in sorted((-score, p) for score, p in scored if score >= need)]
+
+    def resolve(self, text):
+        """The key text stands for: an exact key, or the only match. None if it is ambiguous or unknown."""
+        text = (text or "").strip()
+        if text.lower() in self._position:
+            return self._keys[self._position[text.lower()]]
+        matches = self.search(text, limit=2) if text else []
+        return matches[0] if len(matches) == 1 else None
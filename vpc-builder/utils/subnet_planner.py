@@ -0,0 +1,92 @@
+import ipaddress
+
+# AWS only allows subnet prefixes between /16 and /28.
+MIN_SUBNET_PREFIX = 16
+MAX_SUBNET_PREFIX = 28
+
+
+def _free_ranges(network, reserved):
+    """Integer [start, end] ranges of the network not covered by any reserved CIDR."""
+    taken = sorted(
+        (int(r.network_address), int(r.broadcast_address))
+        for r in (ipaddress.IPv4Network(c) for c in reserved)
+        if r.overlaps(network)
+    )
+    free = []
+    cursor = int(network.network_address)
+    last = int(network.broadcast_address)
+    for start, end in taken:
+        if start > cursor:
+            free.append([cursor, start - 1])
+        cursor = max(cursor, end + 1)
+    if cursor <= last:
+        free.append([cursor, last])
+    return free
+
+
+def _auto_prefix(network, count, free):
+    """Largest equal-sized block (smallest prefix) that fits count subnets in the free space."""
+    for prefix in range(max(network.prefixlen, MIN_SUBNET_PREFIX), MAX_SUBNET_PREFIX + 1):
+        size = 1 << (32 - prefix)
+        fits = sum(max(0, end + 1 - (start + size - 1) // size * size) // size for start, end in free)
+        if fits >= count:
+            return prefix
+    raise ValueError(f"{count} subnets do not fit in the free space of {network}.")
+
+
+def plan_subnet_layout(vpc_cidr, public_count, private_count, azs,
+                       public_prefix=None, private_prefix=None, reserved=(), name_prefix=""):
+    """
+    Compute a non-overlapping subnet layout inside vpc_cidr.
+
+    Blocks are allocated largest first, each aligned to its own size, straight
+    from integer address ranges, so the layout is exact and never needs
+    trial-and-error. Reserved CIDRs (e.g. existing subnets) are skipped.
+    Subnets of each type are spread round-robin across azs.
+
+    Returns a list of {"name", "type", "cidr", "az"} dicts, public subnets
+    first. Raises ValueError if the layout does not fit.
+    """
+    network = ipaddress.IPv4Network(vpc_cidr)
+    if not azs:
+        raise ValueError("At least one availability zone is required.")
+    if public_count < 0 or private_count < 0 or public_count + private_count == 0:
+        raise ValueError("Ask for at least one subnet.")
+
+    free = _free_ranges(network, reserved)
+    if public_prefix is None and private_prefix is None:
+        public_prefix = private_prefix = _auto_prefix(network, public_count + private_count, free)
+    else:
+        public_prefix = public_prefix or private_prefix
+        private_prefix = private_prefix or public_prefix
+    for prefix in (public_prefix, private_prefix):
+        if not max(network.prefixlen, MIN_SUBNET_PREFIX) <= prefix <= MAX_SUBNET_PREFIX:
+            raise ValueError(f"Subnet prefix /{prefix} must be between /{max(network.prefixlen, MIN_SUBNET_PREFIX)} "
+                             f"and /{MAX_SUBNET_PREFIX} for VPC {network}.")
+
+    requests = [("public", i, public_prefix) for i in range(public_count)]
+    requests += [("private", i, private_prefix) for i in range(private_count)]
+
+    allocated = {}
+    # Largest blocks first: every later (smaller) block stays aligned, so no space is wasted.
+    for s_type, index, prefix in sorted(requests, key=lambda r: r[2]):
+        size = 1 << (32 - prefix)
+        for i, (start, end) in enumerate(free):
+            aligned = (start + size - 1) // size * size
+            if aligned + size - 1 > end:
+                continue
+            allocated[(s_type, index)] = f"{ipaddress.IPv4Address(aligned)}/{prefix}"
+            free[i:i + 1] = [r for r in ([start, aligned - 1], [aligned + size, end]) if r[0] <= r[1]]
+            break
+        else:
+            raise ValueError(f"Not enough free space in {network} for another /{prefix} subnet.")
+
+    return [
+        {
+            "name": f"{name_prefix}{s_type}-{index + 1}",
+            "type": s_type,
+            "cidr": allocated[(s_type, index)],
+            "az": azs[index % len(azs)],
+        }
+        for s_type, index, _ in requests
+    ]